@@ -27,6 +27,37 @@
 #define BAUD_RATE 115200
 #define TX_INTERVAL 50  // Minimum time between transmissions (ms)
 
+// Binary protocol (see raspberry_pi/communication/binary_protocol.py)
+// Frame: COBS(type, fields..., crc8) then 0x00, fields little-endian
+#define MSG_READY 0x01
+#define MSG_DIST 0x02
+#define MSG_SCAN 0x03
+#define MSG_SCAN_END 0x04
+#define MSG_BATTERY 0x05
+#define MSG_ACK 0x06
+#define MSG_PONG 0x07
+#define MSG_ERROR 0x08
+#define MSG_DONE 0x09
+#define MSG_MOTOR 0x10
+#define MSG_SERVO 0x11
+#define MSG_SCAN_REQUEST 0x12
+#define MSG_BATTERY_REQUEST 0x13
+#define MSG_PING 0x14
+#define MSG_MOTOR_TIMED 0x15
+
+// Command codes used by MSG_MOTOR, MSG_ACK, MSG_ERROR and MSG_DONE
+#define CMD_FWD 1
+#define CMD_BCK 2
+#define CMD_LFT 3
+#define CMD_RGT 4
+#define CMD_STP 5
+#define CMD_SRV 6
+#define CMD_SCAN 7
+#define CMD_BAT 8
+#define CMD_PING 9
+
+#define MAX_FRAME 32
+
 // Constants
 #define MAX_COMMAND_LENGTH 32
 #define SCAN_MIN_ANGLE 0
@@ -42,6 +73,11 @@ int commandIndex = 0;
 int distance = 0;
 int currentServoAngle = 90;  // Default to center position
 boolean isScanning = false;
+boolean binaryMode = false;  // Switched on when the Pi sends PROTO:BIN1
+int timedCommand = 0;  // Motor command code of a timed move in progress
+unsigned long timedMoveEnd = 0;
+uint8_t frame[MAX_FRAME];
+int frameIndex = 0;
 
 // Objects
 Servo scanServo;
@@ -80,6 +116,13 @@ void loop() {
   // Process any incoming commands
   processSerial();
   
+  // Finish a timed move on time, however busy the Pi is
+  if (timedCommand != 0 && (long)(millis() - timedMoveEnd) >= 0) {
+    stopMotors();
+    sendDone(timedCommand);
+    timedCommand = 0;
+  }
+  
   // Read distance sensor
   if (millis() - lastDistance > 100) {  // Every 100ms
     distance = readDistance();
@@ -98,6 +141,11 @@ void processSerial() {
   while (Serial.available() > 0) {
     char c = Serial.read();
     
+    if (binaryMode) {
+      processFrameByte((uint8_t)c);
+      continue;
+    }
+    
     // Check for end of command
     if (c == '\n' || c == '\r') {
       if (commandIndex > 0) {
@@ -114,57 +162,31 @@ void processSerial() {
 
 // Execute a command from the Raspberry Pi
 void executeCommand(char* cmd) {
-  // Motor commands
-  if (strcmp(cmd, "FWD") == 0) {
-    moveForward(255);
-    Serial.println("ACK:FWD");
-  } 
-  else if (strncmp(cmd, "FWD:", 4) == 0) {
-    int speed = atoi(cmd + 4);
-    moveForward(speed);
-    Serial.println("ACK:FWD");
-  }
-  else if (strcmp(cmd, "BCK") == 0) {
-    moveBackward(255);
-    Serial.println("ACK:BCK");
-  }
-  else if (strncmp(cmd, "BCK:", 4) == 0) {
-    int speed = atoi(cmd + 4);
-    moveBackward(speed);
-    Serial.println("ACK:BCK");
+  // Sequenced commands end in #<seq>, which is echoed back in the ACK
+  char* seq = strchr(cmd, '#');
+  if (seq != NULL) {
+    *seq++ = '\0';
   }
-  else if (strcmp(cmd, "LFT") == 0) {
-    turnLeft(255);
-    Serial.println("ACK:LFT");
-  }
-  else if (strncmp(cmd, "LFT:", 4) == 0) {
-    int speed = atoi(cmd + 4);
-    turnLeft(speed);
-    Serial.println("ACK:LFT");
-  }
-  else if (strcmp(cmd, "RGT") == 0) {
-    turnRight(255);
-    Serial.println("ACK:RGT");
-  }
-  else if (strncmp(cmd, "RGT:", 4) == 0) {
-    int speed = atoi(cmd + 4);
-    turnRight(speed);
-    Serial.println("ACK:RGT");
-  }
-  else if (strcmp(cmd, "STP") == 0) {
-    stopMotors();
-    Serial.println("ACK:STP");
+  
+  // Motor commands: NAME, NAME:speed or NAME:speed:duration_ms
+  int speed;
+  unsigned long duration;
+  int motorCode = parseMotorCommand(cmd, &speed, &duration);
+  if (motorCode != 0) {
+    startMotorCommand(motorCode, speed, duration);
+    sendAck(commandName(motorCode), seq);
   }
   
   // Servo control commands
   else if (strncmp(cmd, "SRV:", 4) == 0) {
     int angle = atoi(cmd + 4);
     setServoAngle(angle);
-    Serial.println("ACK:SRV");
+    sendAck("SRV", seq);
   }
   else if (strcmp(cmd, "SCAN") == 0) {
+    // Acknowledge first: the sweep takes most of a second, SCAN:END marks its end
+    sendAck("SCAN", seq);
     performScan();
-    Serial.println("ACK:SCAN");
   }
   
   // System commands
@@ -174,10 +196,220 @@ void executeCommand(char* cmd) {
   else if (strcmp(cmd, "BAT") == 0) {
     sendBatteryLevel();
   }
+  else if (strcmp(cmd, "PROTO:BIN1") == 0) {
+    // Reply in text, then both sides talk in frames
+    Serial.println("PROTO:BIN1:OK");
+    binaryMode = true;
+    frameIndex = 0;
+  }
   else {
     Serial.print("ERR:UNKNOWN_CMD:");
-    Serial.println(cmd);
+    Serial.print(cmd);
+    if (seq != NULL) {
+      Serial.print("#");
+      Serial.print(seq);
+    }
+    Serial.println();
+  }
+}
+
+// Parse a text motor command; returns its command code, or 0 if it isn't one
+int parseMotorCommand(const char* cmd, int* speed, unsigned long* duration) {
+  for (int code = CMD_FWD; code <= CMD_STP; code++) {
+    const char* name = commandName(code);
+    if (strncmp(cmd, name, 3) != 0) {
+      continue;
+    }
+    if (cmd[3] == '\0') {
+      *speed = 255;
+      *duration = 0;
+      return code;
+    }
+    if (cmd[3] == ':' && code != CMD_STP) {
+      *speed = atoi(cmd + 4);
+      const char* rest = strchr(cmd + 4, ':');
+      *duration = (rest != NULL) ? strtoul(rest + 1, NULL, 10) : 0;
+      return code;
+    }
+  }
+  return 0;
+}
+
+const char* commandName(int code) {
+  switch (code) {
+    case CMD_FWD: return "FWD";
+    case CMD_BCK: return "BCK";
+    case CMD_LFT: return "LFT";
+    case CMD_RGT: return "RGT";
+    case CMD_STP: return "STP";
+    case CMD_SRV: return "SRV";
+    case CMD_SCAN: return "SCAN";
+    case CMD_BAT: return "BAT";
+    case CMD_PING: return "PING";
+  }
+  return "UNKNOWN";
+}
+
+// Drive the motors; with a duration they stop by themselves and report DONE
+void startMotorCommand(int code, int speed, unsigned long duration) {
+  switch (code) {
+    case CMD_FWD: moveForward(speed); break;
+    case CMD_BCK: moveBackward(speed); break;
+    case CMD_LFT: turnLeft(speed); break;
+    case CMD_RGT: turnRight(speed); break;
+    case CMD_STP: stopMotors(); break;
+  }
+  // Any new motor command replaces a timed move still running
+  timedCommand = (duration > 0 && code != CMD_STP) ? code : 0;
+  timedMoveEnd = millis() + duration;
+}
+
+void sendDone(int code) {
+  if (binaryMode) {
+    sendFrame1(MSG_DONE, code);
+    return;
+  }
+  Serial.print("DONE:");
+  Serial.println(commandName(code));
+}
+
+// Acknowledge a text command, echoing its sequence number if it had one
+void sendAck(const char* name, const char* seq) {
+  Serial.print("ACK:");
+  Serial.print(name);
+  if (seq != NULL) {
+    Serial.print("#");
+    Serial.print(seq);
+  }
+  Serial.println();
+}
+
+// Binary protocol functions
+
+// CRC-8, polynomial 0x07, init 0
+uint8_t crc8(const uint8_t* data, int length) {
+  uint8_t crc = 0;
+  for (int i = 0; i < length; i++) {
+    crc ^= data[i];
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
   }
+  return crc;
+}
+
+// Collect bytes until the 0x00 delimiter, then decode and run the frame
+void processFrameByte(uint8_t b) {
+  if (b != 0) {
+    if (frameIndex < MAX_FRAME) {
+      frame[frameIndex] = b;
+    }
+    if (frameIndex <= MAX_FRAME) {
+      frameIndex++;  // Oversized frames are dropped at the delimiter
+    }
+    return;
+  }
+  
+  int length = frameIndex;
+  frameIndex = 0;
+  if (length == 0 || length > MAX_FRAME) {
+    return;
+  }
+  
+  // COBS decode in place
+  int read = 0;
+  int write = 0;
+  while (read < length) {
+    uint8_t code = frame[read];
+    if (code == 0 || read + code > length) {
+      return;
+    }
+    read++;
+    for (int i = 1; i < code; i++) {
+      frame[write++] = frame[read++];
+    }
+    if (code < 0xFF && read < length) {
+      frame[write++] = 0;
+    }
+  }
+  
+  if (write < 2 || crc8(frame, write - 1) != frame[write - 1]) {
+    return;  // Corrupted on the wire, drop it
+  }
+  executeFrame(frame, write - 1);
+}
+
+void executeFrame(const uint8_t* msg, int length) {
+  switch (msg[0]) {
+    case MSG_MOTOR:
+    case MSG_MOTOR_TIMED:
+      if ((msg[0] == MSG_MOTOR && length == 3) || (msg[0] == MSG_MOTOR_TIMED && length == 5)) {
+        if (msg[1] < CMD_FWD || msg[1] > CMD_STP) {
+          break;
+        }
+        unsigned long duration = (msg[0] == MSG_MOTOR_TIMED) ? (msg[3] | ((unsigned long)msg[4] << 8)) : 0;
+        startMotorCommand(msg[1], msg[2], duration);
+        sendFrame1(MSG_ACK, msg[1]);
+        return;
+      }
+      break;
+    case MSG_SERVO:
+      if (length == 2) {
+        setServoAngle(msg[1]);
+        sendFrame1(MSG_ACK, CMD_SRV);
+        return;
+      }
+      break;
+    case MSG_SCAN_REQUEST:
+      sendFrame1(MSG_ACK, CMD_SCAN);
+      performScan();
+      return;
+    case MSG_BATTERY_REQUEST:
+      sendBatteryLevel();
+      return;
+    case MSG_PING:
+      if (length == 3) {
+        uint8_t pong[3] = {MSG_PONG, msg[1], msg[2]};
+        sendFrame(pong, 3);
+        return;
+      }
+      break;
+  }
+  sendFrame1(MSG_ERROR, 0);
+}
+
+// COBS-encode a message with its CRC and write it with the delimiter
+void sendFrame(const uint8_t* msg, int length) {
+  uint8_t out[MAX_FRAME];
+  int codeIndex = 0;
+  int outIndex = 1;
+  uint8_t code = 1;
+  uint8_t crc = crc8(msg, length);
+  
+  for (int i = 0; i <= length; i++) {
+    uint8_t b = (i < length) ? msg[i] : crc;
+    if (b != 0) {
+      out[outIndex++] = b;
+      code++;
+    } else {
+      out[codeIndex] = code;
+      codeIndex = outIndex++;
+      code = 1;
+    }
+  }
+  out[codeIndex] = code;
+  out[outIndex++] = 0;
+  Serial.write(out, outIndex);
+}
+
+void sendFrame1(uint8_t type, uint8_t value) {
+  uint8_t msg[2] = {type, value};
+  sendFrame(msg, 2);
+}
+
+void sendFrameU16(uint8_t type, int value) {
+  uint8_t msg[3] = {type, (uint8_t)(value & 0xFF), (uint8_t)(value >> 8)};
+  sendFrame(msg, 3);
 }
 
 // Motor control functions
@@ -277,22 +509,36 @@ void performScan() {
     int dist = readDistance();
     
     // Send scan data to Pi
-    Serial.print("SCAN:");
-    Serial.print(angle);
-    Serial.print(":");
-    Serial.println(dist);
+    if (binaryMode) {
+      uint8_t msg[4] = {MSG_SCAN, (uint8_t)angle, (uint8_t)(dist & 0xFF), (uint8_t)(dist >> 8)};
+      sendFrame(msg, 4);
+    } else {
+      Serial.print("SCAN:");
+      Serial.print(angle);
+      Serial.print(":");
+      Serial.println(dist);
+    }
   }
   
   // Return to center position
   setServoAngle(90);
   
   // Send end of scan marker
-  Serial.println("SCAN:END");
+  if (binaryMode) {
+    uint8_t msg[1] = {MSG_SCAN_END};
+    sendFrame(msg, 1);
+  } else {
+    Serial.println("SCAN:END");
+  }
   isScanning = false;
 }
 
 // Send distance reading to the Raspberry Pi
 void sendDistanceReading(int dist) {
+  if (binaryMode) {
+    sendFrameU16(MSG_DIST, dist);
+    return;
+  }
   Serial.print("DIST:");
   Serial.println(dist);
 }
@@ -304,6 +550,10 @@ void sendBatteryLevel() {
   int batteryPercent = map(batteryValue, 614, 768, 0, 100);
   batteryPercent = constrain(batteryPercent, 0, 100);
   
+  if (binaryMode) {
+    sendFrame1(MSG_BATTERY, batteryPercent);
+    return;
+  }
   Serial.print("BAT:");
   Serial.println(batteryPercent);
 }
@@ -22,10 +22,13 @@ class CommandProcessor:
         "dance": "dance"
     }
     
-    def __init__(self, voice_recognizer=None, state_machine=None, personality=None):
+    def __init__(self, voice_recognizer=None, state_machine=None, personality=None, rng=None,
+                 recorder=None):
         self.voice_recognizer = voice_recognizer
         self.state_machine = state_machine
         self.personality = personality
+        self.rng = rng or random  # Pass a random.Random for seeded, reproducible runs
+        self.recorder = recorder  # Optional FlightRecorder logging every command
         self.running = False
         self.command_handlers = {
             "come": self._handle_come_command,
@@ -69,10 +72,43 @@ class CommandProcessor:
             command = self.voice_recognizer.get_next_command(block=True, timeout=0.5)
             if command:
                 print(f"Processing command: {command}")
+                self.handle_command(command)
+    
+    async def run_async(self):
+        """Command processing as a task on the AsyncRuntime
+
+        Wakes the moment the recognizer queues a command instead of polling
+        with a 0.5 s timeout.
+        """
+        if not self.voice_recognizer:
+            print("Error: No voice recognizer provided")
+            return
+        
+        self.running = True
+        print("Command processor started")
+        while self.running:
+            command = await self.voice_recognizer.command_queue.get_async()
+            print(f"Processing command: {command}")
+            self.handle_command(command)
+    
+    def handle_command(self, command):
+        """Process one recognized command, logged first when recording"""
+        if self.recorder:
+            from raspberry_pi.runtime.flight_recorder import VOICE
+            with self.recorder.input(VOICE, command):
                 self._process_command(command)
+        else:
+            self._process_command(command)
     
     def _process_command(self, command):
         """Process a recognized command"""
+        # Phrases the robot has learned stand in for one of its commands
+        if command not in self.command_handlers and self.personality:
+            learned = self.personality.get_learned_response(command)
+            if learned in self.command_handlers:
+                print(f"Learned command: {command} -> {learned}")
+                command = learned
+
         # Check if we have a handler for this command
         if command in self.command_handlers:
             try:
@@ -107,7 +143,7 @@ class CommandProcessor:
                 self.personality.set_emotion(Emotion.SLEEPY)
             else:
                 # General positive response
-                self.personality.set_emotion(random.choice([Emotion.HAPPY, Emotion.NEUTRAL]))
+                self.personality.set_emotion(self.rng.choice([Emotion.HAPPY, Emotion.NEUTRAL]))
         else:
             # If command failed, show confusion
             from raspberry_pi.behavior.robot_personality import Emotion
@@ -4,19 +4,22 @@ This uses a simulated recognizer that doesn't depend on hardware or
 difficult-to-install libraries.
 """
 
-import time
 import threading
 import queue
 import random
 import numpy as np
 
+from raspberry_pi.runtime.async_runtime import BridgeQueue
+from raspberry_pi.runtime.clock import SystemClock
+
 class SimpleMicrophoneInterface:
     """Simple fallback microphone implementation that doesn't require PyAudio"""
     
-    def __init__(self, simulation=True):
+    def __init__(self, simulation=True, clock=None):
         self.simulation = True  # Always simulation mode
+        self.clock = clock or SystemClock()
         self.running = False
-        self.audio_queue = queue.Queue()
+        self.audio_queue = BridgeQueue(maxsize=100)  # Bounded, nothing may be reading
         self.sample_rate = 16000
         self.channels = 1
         
@@ -34,14 +37,25 @@ class SimpleMicrophoneInterface:
     def _simulate_audio(self):
         """Generate fake audio data"""
         while self.running:
-            # Generate random noise once in a while
-            if random.random() < 0.05:
-                data = np.random.normal(0, 0.1, (1600, self.channels))
-            else:
-                data = np.zeros((1600, self.channels))
-                
-            self.audio_queue.put(data)
-            time.sleep(0.1)
+            self.audio_queue.put(self._fake_chunk())
+            self.clock.sleep(0.1)
+    
+    async def run_async(self):
+        """Generate fake audio as a task on the AsyncRuntime"""
+        self.running = True
+        print("Simple microphone simulation started")
+        try:
+            while self.running:
+                self.audio_queue.put(self._fake_chunk())
+                await self.clock.sleep_async(0.1)
+        finally:
+            self.running = False
+    
+    def _fake_chunk(self):
+        # Generate random noise once in a while
+        if random.random() < 0.05:
+            return np.random.normal(0, 0.1, (1600, self.channels))
+        return np.zeros((1600, self.channels))
     
     def get_audio_chunk(self, timeout=0.1):
         """Get a chunk of audio data"""
@@ -62,9 +76,10 @@ class SimpleMicrophoneInterface:
 class SimpleVoiceRecognizer:
     """Simple fallback voice recognizer that doesn't require PocketSphinx"""
     
-    def __init__(self, microphone=None, simulation=True):
+    def __init__(self, microphone=None, simulation=True, clock=None):
         self.microphone = microphone
         self.simulation = True  # Always simulation mode
+        self.clock = clock or SystemClock()
         self.running = False
         self.command_queue = queue.Queue()
         self.wake_word = "dewwy"
@@ -112,7 +127,7 @@ class SimpleVoiceRecognizer:
                 command = random.choice(list(self.command_keywords.values()))
                 print(f"[SIMULATED] Command recognized: '{command}'")
                 self.command_queue.put(command)
-            time.sleep(3)  # Check every 3 seconds
+            self.clock.sleep(3)  # Check every 3 seconds
     
     def get_next_command(self, block=False, timeout=None):
         """Get the next recognized command"""
@@ -1,4 +1,5 @@
 import time
+import asyncio
 import threading
 import queue
 import random
@@ -6,6 +7,9 @@ import numpy as np
 import sounddevice as sd
 import webrtcvad  # Voice Activity Detection
 
+from raspberry_pi.runtime.async_runtime import BridgeQueue
+from raspberry_pi.runtime.clock import SystemClock
+
 class MicrophoneInterface:
     """Interface for SPH0645 I2S MEMS Microphone
     
@@ -21,15 +25,22 @@ class MicrophoneInterface:
     dtoverlay=rpi-i2s-mems
     """
     
-    def __init__(self, simulation=True, sample_rate=16000, channels=1):
+    def __init__(self, simulation=True, sample_rate=16000, channels=1, clock=None):
         self.simulation = simulation
+        self.clock = clock or SystemClock()
         self.sample_rate = sample_rate
         self.channels = channels
         self.running = False
-        self.audio_queue = queue.Queue()
+        # Filled from the capture thread or sound driver callback, read by
+        # threads or coroutines; keeps ~3 s of 30 ms frames if nobody reads
+        self.audio_queue = BridgeQueue(maxsize=100)
         self.recording = False
         self.vad = webrtcvad.Vad(3)  # Aggressiveness level (0-3)
         
+        # Frame size must be one of: 10, 20, or 30 ms for VAD
+        self.frame_duration = 30  # ms
+        self.frame_size = int(self.sample_rate * self.frame_duration / 1000)
+        
         # Initial configuration
         if not simulation:
             # Configure the I2S interface
@@ -84,58 +95,53 @@ class MicrophoneInterface:
         except queue.Empty:
             return None
     
-    def _audio_capture_loop(self):
-        """Main audio capture thread function"""
-        # Frame size must be one of: 10, 20, or 30 ms for VAD
-        frame_duration = 30  # ms
-        frame_size = int(self.sample_rate * frame_duration / 1000)
+    def _audio_callback(self, indata, frames, time_info, status):
+        """Callback for sounddevice (runs on the audio driver's thread)"""
+        if status:
+            print(f"Audio status: {status}")
         
-        def audio_callback(indata, frames, time_info, status):
-            """Callback for sounddevice"""
-            if status:
-                print(f"Audio status: {status}")
-            
-            # Convert to the right format for VAD
-            audio_data = indata.copy()
-            
-            # Put the audio data in the queue
-            self.audio_queue.put(audio_data)
+        # Convert to the right format for VAD
+        audio_data = indata.copy()
+        
+        # Put the audio data in the queue
+        self.audio_queue.put(audio_data)
+        
+        # If recording, save the frame
+        if self.recording:
+            self.recorded_frames.append(audio_data)
             
-            # If recording, save the frame
-            if self.recording:
-                self.recorded_frames.append(audio_data)
-                
-            # Check if speech is detected (for real hardware)
-            if not self.simulation and len(audio_data) >= frame_size:
-                audio_frame = audio_data[:frame_size].tobytes()
-                try:
-                    is_speech = self.vad.is_speech(audio_frame, self.sample_rate)
-                    if is_speech:
-                        # Speech detected, could trigger an event
-                        pass
-                except Exception as e:
-                    # VAD can be picky about frame sizes
+        # Check if speech is detected (for real hardware)
+        if not self.simulation and len(audio_data) >= self.frame_size:
+            audio_frame = audio_data[:self.frame_size].tobytes()
+            try:
+                is_speech = self.vad.is_speech(audio_frame, self.sample_rate)
+                if is_speech:
+                    # Speech detected, could trigger an event
                     pass
-        
+            except Exception as e:
+                # VAD can be picky about frame sizes
+                pass
+    
+    def _simulated_frame(self):
+        """Mostly silence with occasional noise"""
+        if random.random() < 0.05:  # Occasional noise
+            return np.random.normal(0, 0.1, (self.frame_size, self.channels))
+        return np.zeros((self.frame_size, self.channels))
+    
+    def _audio_capture_loop(self):
+        """Main audio capture thread function"""
         try:
             if self.simulation:
                 # In simulation mode, generate silent audio with occasional noise
                 while self.running:
-                    # Create simulated audio data (mostly silence with occasional noise)
-                    if random.random() < 0.05:  # Occasional noise
-                        audio_data = np.random.normal(0, 0.1, (frame_size, self.channels))
-                    else:
-                        audio_data = np.zeros((frame_size, self.channels))
-                    
-                    # Process the simulated audio
-                    audio_callback(audio_data, frame_size, None, None)
-                    time.sleep(frame_duration / 1000)  # Sleep for the frame duration
+                    self._audio_callback(self._simulated_frame(), self.frame_size, None, None)
+                    time.sleep(self.frame_duration / 1000)  # Sleep for the frame duration
             else:
                 # Real hardware mode - use sounddevice to capture audio
                 with sd.InputStream(samplerate=self.sample_rate,
                                     channels=self.channels,
-                                    callback=audio_callback,
-                                    blocksize=frame_size):
+                                    callback=self._audio_callback,
+                                    blocksize=self.frame_size):
                     print(f"Listening on audio device with {self.sample_rate}Hz, {self.channels} channels")
                     
                     # Keep the stream open until stopped
@@ -147,6 +153,33 @@ class MicrophoneInterface:
             import traceback
             traceback.print_exc()
             self.running = False
+    
+    async def run_async(self):
+        """Audio capture as a task on the AsyncRuntime instead of a thread"""
+        self.running = True
+        print("Microphone listening started")
+        try:
+            if self.simulation:
+                while self.running:
+                    self._audio_callback(self._simulated_frame(), self.frame_size, None, None)
+                    await self.clock.sleep_async(self.frame_duration / 1000)
+            else:
+                # The driver calls back on its own thread and the bridge queue
+                # wakes whoever awaits the audio; nothing to poll here
+                with sd.InputStream(samplerate=self.sample_rate,
+                                    channels=self.channels,
+                                    callback=self._audio_callback,
+                                    blocksize=self.frame_size):
+                    print(f"Listening on audio device with {self.sample_rate}Hz, {self.channels} channels")
+                    await asyncio.get_running_loop().create_future()  # Until cancelled
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in audio capture: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.running = False
 
     def shutdown(self):
         """Clean shutdown of the microphone interface"""
@@ -1,10 +1,14 @@
 import os
+import asyncio
 import threading
 import tempfile
 import time
 import queue
 import random
 
+from raspberry_pi.runtime.async_runtime import BridgeQueue
+from raspberry_pi.runtime.clock import SystemClock
+
 # Try to import the advanced modules, but fall back to simple ones if they're not available
 try:
     import numpy as np
@@ -18,13 +22,14 @@ class VoiceRecognizer:
     """Voice recognition system using PocketSphinx for offline processing,
     with fallback to simpler simulation when dependencies aren't available."""
     
-    def __init__(self, microphone=None, simulation=True, force_simple_mode=False):
+    def __init__(self, microphone=None, simulation=True, force_simple_mode=False, clock=None):
         self.microphone = microphone
         self.simulation = simulation
+        self.clock = clock or SystemClock()
         # Set advanced mode based on available modules and force_simple_mode flag
         self.advanced_mode = _ADVANCED_MODULES_AVAILABLE and not force_simple_mode
         self.listening_for_commands = False
-        self.command_queue = queue.Queue()
+        self.command_queue = BridgeQueue()  # Read by a thread or awaited on the runtime
         self.wake_word = "dewwy"  # Wake word to activate command listening
         self.wake_word_detected = False
         self.last_command_time = 0
@@ -112,6 +117,34 @@ class VoiceRecognizer:
                 print(f"Error in recognition loop: {e}")
                 time.sleep(1)
     
+    async def run_async(self):
+        """Recognition as a task on the AsyncRuntime
+
+        Real recognition wakes when the microphone delivers audio rather than
+        polling for it, and the blocking Sphinx decode runs in an executor so
+        the event loop stays free.
+        """
+        if not self.microphone:
+            print("Error: No microphone interface provided")
+            return
+        
+        self.listening_for_commands = True
+        print("Voice recognition started")
+        loop = asyncio.get_running_loop()
+        while self.listening_for_commands:
+            try:
+                if self.simulation or not self.advanced_mode:
+                    self._simulate_voice_commands()
+                    await self.clock.sleep_async(1)
+                else:
+                    audio_chunk = await self.microphone.audio_queue.get_async()
+                    await loop.run_in_executor(None, self._process_audio_chunk, audio_chunk)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in recognition loop: {e}")
+                await self.clock.sleep_async(1)
+    
     def _simulate_voice_commands(self):
         """Generate simulated voice commands (for testing)"""
         if random.random() < 0.1:  # 10% chance of generating a command
@@ -139,6 +172,10 @@ class VoiceRecognizer:
         if audio_chunk is None:
             return
         
+        self._process_audio_chunk(audio_chunk)
+    
+    def _process_audio_chunk(self, audio_chunk):
+        """Look for the wake word or a command in one chunk of audio"""
         # Check for wake word if not already listening for command
         if not self.wake_word_detected:
             if self._detect_wake_word(audio_chunk):
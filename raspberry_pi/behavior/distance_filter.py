@@ -0,0 +1,218 @@
+import math
+from bisect import insort, bisect_left
+
+from raspberry_pi.runtime.clock import SystemClock
+
+class RollingMedian:
+    """Median of the last window readings
+
+    Keeps a ring of the raw values and the same values in sorted order, both
+    preallocated; each reading replaces the oldest in place. A single glitch
+    never reaches the output as long as window >= 3.
+    """
+
+    def __init__(self, window=5):
+        self.window = window
+        self.ring = [0.0] * window
+        self.ordered = []
+        self.index = 0
+
+    def update(self, value, now):
+        if len(self.ordered) == self.window:
+            del self.ordered[bisect_left(self.ordered, self.ring[self.index])]
+        self.ring[self.index] = value
+        self.index = (self.index + 1) % self.window
+        insort(self.ordered, value)
+        return self.ordered[len(self.ordered) // 2], False
+
+    def reset(self):
+        self.ordered.clear()
+        self.index = 0
+
+class ExponentialAverage:
+    """Exponential moving average, the cheapest smoothing there is"""
+
+    def __init__(self, alpha=0.4):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value, now):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value, False
+
+    def reset(self):
+        self.value = None
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter over distance, in plain floats
+
+    State is distance and velocity with a 2x2 covariance kept as three
+    scalars. A reading further from the prediction than gate standard
+    deviations is rejected as an outlier. When confirm readings in a row are
+    rejected and agree with each other, something really did appear (or go
+    away), so the filter jumps to it and starts over at rest; jumped is True
+    for that reading only. A step is not a speed, and taking it as one makes
+    the filter overshoot on every reading after it.
+    """
+
+    def __init__(self, measurement_noise=4.0, process_noise=2000.0, gate=3.0, confirm=2,
+                 confirm_tolerance=10.0):
+        self.r = measurement_noise   # Reading variance, cm^2
+        self.q = process_noise       # Acceleration noise density, cm^2/s^3
+        self.gate = gate
+        self.confirm = confirm
+        self.confirm_tolerance = confirm_tolerance
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = 0.0
+        self.p00 = self.r
+        self.p01 = 0.0
+        self.p11 = 100.0 ** 2
+        self.time = None
+        self.rejected = 0
+        self.rejected_value = 0.0
+        self.jumped = False
+
+    def update(self, value, now):
+        self.jumped = False
+        if self.x is None:
+            self.x = value
+            self.time = now
+            return self.x, False
+
+        # Predict
+        dt = max(now - self.time, 1e-3)
+        q = self.q
+        self.x += self.v * dt
+        self.p00 += dt * (2 * self.p01 + dt * self.p11) + q * dt ** 3 / 3
+        self.p01 += dt * self.p11 + q * dt ** 2 / 2
+        self.p11 += q * dt
+        self.time = now
+
+        # Gate
+        innovation = value - self.x
+        s = self.p00 + self.r
+        if innovation * innovation > self.gate * self.gate * s:
+            if self.rejected and abs(value - self.rejected_value) > self.confirm_tolerance:
+                self.rejected = 0
+            self.rejected += 1
+            self.rejected_value = value
+            if self.rejected < self.confirm:
+                return self.x, True
+            # Confirmed: jump there
+            self.jumped = True
+            self.v = 0.0
+            self.x = value
+            self.p00 = self.r
+            self.p01 = 0.0
+            self.p11 = 100.0 ** 2
+            self.rejected = 0
+            return self.x, False
+        self.rejected = 0
+
+        # Update
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        self.x += k0 * innovation
+        self.v += k1 * innovation
+        p00, p01 = self.p00, self.p01
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 -= k1 * p01
+        return self.x, False
+
+FILTERS = {"median": RollingMedian, "ema": ExponentialAverage, "kalman": KalmanFilter}
+
+class DistanceFilter:
+    """Timestamped, filtered view of the ultrasonic distance stream
+
+    update() takes each raw reading as it arrives (on the sensor's thread for
+    push sensors) and runs one streaming filter over it: "kalman" (default,
+    with outlier rejection), "median" or "ema". Readings of 0 or beyond
+    max_range are HC-SR04 timeouts and are counted but ignored. The result
+    is available as distance (cm), velocity (cm/s, negative when closing in;
+    a confirmed step shows up as the rate of that step for one reading) and
+    age() of the last reading. Work per reading is constant and reuses
+    the filter's own storage.
+    """
+
+    def __init__(self, method="kalman", clock=None, max_range=400, velocity_alpha=0.5, **options):
+        if method not in FILTERS:
+            raise ValueError(f"Unknown distance filter: {method}")
+        self.method = method
+        self.clock = clock or SystemClock()
+        self.max_range = max_range
+        self.velocity_alpha = velocity_alpha  # Smoothing for median/ema velocity
+        self.filter = FILTERS[method](**options)
+
+        self.raw = None
+        self.distance = None
+        self.velocity = 0.0
+        self.timestamp = None
+
+        # Statistics
+        self.samples = 0
+        self.outliers = 0
+        self.invalid = 0
+
+    def update(self, distance, now=None):
+        """Add a reading; returns the filtered distance"""
+        if now is None:
+            now = self.clock.time()
+        self.raw = distance
+        if distance <= 0 or distance > self.max_range:
+            self.invalid += 1
+            return self.distance
+
+        estimate, rejected = self.filter.update(float(distance), now)
+        self.samples += 1
+        if rejected:
+            self.outliers += 1
+            return self.distance
+
+        if self.method == "kalman":
+            if self.filter.jumped and self.distance is not None and now > self.timestamp:
+                # Report the step once so a sudden obstacle still counts as closing in
+                self.velocity = (estimate - self.distance) / (now - self.timestamp)
+            else:
+                self.velocity = self.filter.v
+        elif self.distance is not None and now > self.timestamp:
+            # Differentiate the smoothed signal, then smooth that too
+            rate = (estimate - self.distance) / (now - self.timestamp)
+            self.velocity += self.velocity_alpha * (rate - self.velocity)
+        self.distance = estimate
+        self.timestamp = now
+        return estimate
+
+    def closing_rate(self):
+        """How fast the obstacle ahead is getting closer, cm/s (0 if not)"""
+        return max(0.0, -self.velocity)
+
+    def age(self, now=None):
+        """Seconds since the last accepted reading"""
+        if self.timestamp is None:
+            return math.inf
+        if now is None:
+            now = self.clock.time()
+        return now - self.timestamp
+
+    def reset(self):
+        self.filter.reset()
+        self.distance = None
+        self.velocity = 0.0
+        self.timestamp = None
+
+    def stats(self):
+        return {
+            "method": self.method,
+            "samples": self.samples,
+            "outliers": self.outliers,
+            "invalid": self.invalid,
+            "distance": None if self.distance is None else round(self.distance, 1),
+            "velocity": round(self.velocity, 1),
+        }
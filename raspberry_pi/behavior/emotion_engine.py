@@ -0,0 +1,97 @@
+import math
+import random
+
+from raspberry_pi.runtime.clock import SystemClock
+
+NEVER = math.inf
+
+class EmotionEngine:
+    """Event-driven emotion timing with lazily computed intensity
+
+    Nothing here runs per tick. set() draws how long the emotion lasts once
+    and stores the deadline; the time of the next random mood change is
+    drawn once too, as the first success of a chance-per-check process.
+    due() is a single comparison against the earliest of the two.
+
+    Intensity decays from 1.0 with a fixed half life and is computed in
+    closed form when read, as is the valence/arousal point it scales.
+    """
+
+    def __init__(self, neutral, durations, affect, clock=None, rng=None,
+                 random_chance=0.01, check_interval=5.0, half_life=20.0):
+        self.neutral = neutral
+        self.durations = durations  # emotion -> (min, max) seconds
+        self.affect = affect        # emotion -> (valence, arousal), each -1..1
+        self.clock = clock or SystemClock()
+        self.rng = rng or random
+        self.check_interval = check_interval
+        self.half_life = half_life
+
+        now = self.clock.time()
+        self.emotion = neutral
+        self.set_at = now
+        self.expires_at = NEVER
+        self._random_chance = random_chance
+        self.next_random_mood = NEVER
+        self.schedule_random_mood(now)
+
+    @property
+    def random_chance(self):
+        return self._random_chance
+
+    @random_chance.setter
+    def random_chance(self, chance):
+        self._random_chance = chance
+        self.schedule_random_mood(self.clock.time())
+
+    def set(self, emotion, now=None):
+        """Switch emotion and schedule when it wears off"""
+        now = self.clock.time() if now is None else now
+        self.emotion = emotion
+        self.set_at = now
+        if emotion != self.neutral and emotion in self.durations:
+            min_time, max_time = self.durations[emotion]
+            self.expires_at = now + self.rng.uniform(min_time, max_time)
+        else:
+            self.expires_at = NEVER
+
+    def schedule_random_mood(self, now):
+        """Draw when the next random mood change happens
+
+        Same distribution as rolling random_chance every check_interval:
+        the number of checks until the first success is geometric.
+        """
+        chance = self._random_chance
+        if chance <= 0:
+            self.next_random_mood = NEVER
+            return
+        checks = 1
+        if chance < 1:
+            checks += int(math.log(1.0 - self.rng.random()) / math.log(1.0 - chance))
+        self.next_random_mood = now + checks * self.check_interval
+
+    def due(self, now):
+        return now >= self.expires_at or now >= self.next_random_mood
+
+    def random_mood_due(self, now):
+        return now >= self.next_random_mood
+
+    def expired(self, now):
+        return now >= self.expires_at
+
+    def intensity(self, now=None):
+        """How strongly the current emotion is felt, 1.0 when set"""
+        now = self.clock.time() if now is None else now
+        if self.emotion == self.neutral:
+            return 0.0
+        return 0.5 ** (max(0.0, now - self.set_at) / self.half_life)
+
+    def valence_arousal(self, now=None):
+        valence, arousal = self.affect.get(self.emotion, (0.0, 0.0))
+        intensity = self.intensity(now)
+        return valence * intensity, arousal * intensity
+
+    def remaining(self, now=None):
+        """Seconds until the current emotion wears off (inf for neutral)"""
+        now = self.clock.time() if now is None else now
+        return max(0.0, self.expires_at - now)
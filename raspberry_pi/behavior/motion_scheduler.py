@@ -0,0 +1,107 @@
+from raspberry_pi.runtime.clock import SystemClock
+
+# Shorthand for the step that ends most sequences
+STOP = ("stop", None, 0.0)
+
+class MotionScheduler:
+    """Runs timed motion primitives without blocking the control loop
+
+    A sequence is a list of (action, speed, duration) steps, for example
+    [("turn_left", 0.7, 0.4), STOP] means "turn left at 0.7 for 400 ms, then
+    stop". The action is the name of a motor method. The scheduler issues each
+    command when its step starts and moves on once the duration has elapsed,
+    so update() only compares timestamps and never sleeps.
+
+    Motors with run_timed(action, speed, duration) get a step that is
+    followed by a stop as one timed command; they stop on their own when it
+    ends, so the motion doesn't depend on when the next update() comes.
+    """
+
+    def __init__(self, motors, clock=None):
+        self.motors = motors
+        self.clock = clock or SystemClock()
+        self.sequence = []
+        self.step_index = 0
+        self.step_end_time = 0.0
+        self.stops_itself = False  # The running step was sent as a timed move
+
+    def play(self, sequence, now=None):
+        """Replace whatever is running with a new sequence and start it"""
+        if now is None:
+            now = self.clock.time()
+        self.sequence = list(sequence)
+        self.step_index = -1
+        self.step_end_time = now
+        self._advance(now)
+
+    def update(self, now=None):
+        """Advance the running sequence; call once per control loop tick"""
+        if not self.sequence:
+            return
+        if now is None:
+            now = self.clock.time()
+        if now >= self.step_end_time:
+            self._advance(now)
+
+    def cancel(self):
+        """Drop the running sequence, e.g. when an obstacle preempts it"""
+        self.sequence = []
+        self.step_index = 0
+        self.stops_itself = False
+
+    def is_busy(self):
+        """True while a sequence still has steps left to run"""
+        return bool(self.sequence)
+
+    def current_action(self):
+        """Name of the action currently running, or None when idle"""
+        if not self.sequence:
+            return None
+        return self.sequence[self.step_index][0]
+
+    def _advance(self, now):
+        """Start the next step(s) whose predecessors have finished"""
+        # Zero-length steps (like a final stop) run in the same tick, so the
+        # loop is bounded by the sequence length
+        while True:
+            self.step_index += 1
+            if self.step_index >= len(self.sequence):
+                self.cancel()
+                return
+
+            action, speed, duration = self.sequence[self.step_index]
+            if action == "stop" and self.stops_itself:
+                # Already stopped at the end of the timed move
+                self.stops_itself = False
+            elif duration > 0 and self._stop_follows() and hasattr(self.motors, "run_timed"):
+                self.motors.run_timed(action, speed, duration)
+                self.stops_itself = True
+            else:
+                self.stops_itself = False
+                self._issue(action, speed)
+
+            if duration <= 0:
+                continue
+
+            # Chain from the planned end of the previous step so tick jitter
+            # doesn't accumulate, unless we're already past where this step
+            # would have ended
+            end_time = self.step_end_time + duration
+            if end_time <= now:
+                end_time = now + duration
+            self.step_end_time = end_time
+            return
+
+    def _stop_follows(self):
+        action = self.sequence[self.step_index][0]
+        following = self.step_index + 1
+        return (action != "stop" and following < len(self.sequence) and
+                self.sequence[following][0] == "stop")
+
+    def _issue(self, action, speed):
+        """Send a single command to the motors"""
+        command = getattr(self.motors, action)
+        if speed is None:
+            command()
+        else:
+            command(speed)
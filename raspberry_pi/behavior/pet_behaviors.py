@@ -0,0 +1,105 @@
+import random
+
+from raspberry_pi.behavior.robot_state import RobotState
+from raspberry_pi.behavior.motion_scheduler import STOP
+from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+from raspberry_pi.behavior.state_machine import RobotStateMachine
+from raspberry_pi.memory.profile_store import restore_profile
+from raspberry_pi.runtime.clock import SystemClock
+
+def component_rng(seed, component):
+    """Independent, reproducible random stream for one component of a session
+
+    Each component draws from its own stream, so how often one of them uses
+    randomness never shifts the numbers another one sees.
+    """
+    return random.Random(f"{seed}/{component}")
+
+def randomize_personality_traits(personality, rng=random):
+    """Create a unique pet personality with randomized traits"""
+    personality.traits["openness"] = rng.randint(3, 10)
+    personality.traits["friendliness"] = rng.randint(5, 10)
+    personality.traits["activeness"] = rng.randint(3, 10)
+    personality.traits["expressiveness"] = rng.randint(4, 10)
+    personality.traits["patience"] = rng.randint(2, 10)
+
+class PetBehaviors:
+    """Trait-driven random behaviors layered on top of the state machine"""
+
+    def __init__(self, state_machine, personality, clock=None, rng=None):
+        self.state_machine = state_machine
+        self.personality = personality
+        self.clock = clock or SystemClock()
+        self.rng = rng or random
+
+        self.last_random_behavior = self.clock.time()
+        self.random_behavior_interval = self.rng.uniform(20, 60)  # Seconds between random behaviors
+
+    def check_for_random_behaviors(self):
+        """Occasionally trigger random pet-like behaviors"""
+        current_time = self.clock.time()
+
+        # Check if it's time for a random behavior
+        if current_time - self.last_random_behavior > self.random_behavior_interval:
+            self.last_random_behavior = current_time
+            self.random_behavior_interval = self.rng.uniform(15, 60)  # Vary time between behaviors
+
+            # Choose a random behavior
+            behavior = self.rng.choice([
+                "play_behavior",
+                "curious_behavior",
+                "sleep_behavior",
+                "attention_seeking"
+            ])
+            traits = self.personality.traits
+
+            # Execute the behavior
+            if behavior == "play_behavior" and self.rng.random() < traits["activeness"] / 10:
+                print("Pet robot feels playful!")
+                self.state_machine.transition_to(RobotState.PLAYING)
+
+            elif behavior == "curious_behavior" and self.rng.random() < traits["openness"] / 10:
+                print("Pet robot is curious about something!")
+                self.state_machine.transition_to(RobotState.CURIOUS)
+
+            elif behavior == "sleep_behavior" and self.rng.random() < (10 - traits["activeness"]) / 10:
+                print("Pet robot is feeling sleepy!")
+                self.state_machine.transition_to(RobotState.SLEEPING)
+
+            elif behavior == "attention_seeking" and self.rng.random() < traits["expressiveness"] / 10:
+                print("Pet robot wants attention!")
+                # Make a small noise or movement to get attention
+                self.personality.set_emotion(self.rng.choice([Emotion.EXCITED, Emotion.HAPPY]))
+                # Move back and forth a bit (through the scheduler so the loop keeps ticking)
+                if self.state_machine.current_state == RobotState.IDLE:
+                    self.state_machine.motion.play([("move_forward", 0.3, 0.2), STOP])
+
+def create_pet(sensor, motors, clock, seed, display=None, db_path="robot_memory.db",
+               memory=None, profile=None, scanner=None):
+    """Personality, state machine and random behaviors set up as PetRobot runs them
+
+    Everything random is drawn from streams derived from seed, so the same
+    seed, clock, profile and inputs always produce the same pet. A saved
+    profile (see memory/profile_store.py) brings back a known pet; without
+    one a new pet gets random traits. A ScanAggregator as scanner lets
+    avoidance turn toward open space. Used by PetRobot and by the session
+    replayer.
+    """
+    personality = RobotPersonality(db_path=db_path, display=display, clock=clock,
+                                   rng=component_rng(seed, "personality"), memory=memory)
+
+    # Randomize personality traits to create a unique pet character
+    behaviors_rng = component_rng(seed, "behaviors")
+    if profile is None:
+        randomize_personality_traits(personality, behaviors_rng)
+
+    state_machine = RobotStateMachine(sensor, motors, personality, clock=clock,
+                                      rng=component_rng(seed, "state_machine"), scanner=scanner)
+    behaviors = PetBehaviors(state_machine, personality, clock=clock, rng=behaviors_rng)
+
+    if profile is None:
+        # Show startup emotions
+        personality.set_emotion(Emotion.EXCITED)
+    else:
+        restore_profile(profile, personality, state_machine)
+    return personality, state_machine, behaviors
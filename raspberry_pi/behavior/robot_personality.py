@@ -1,7 +1,11 @@
 import random
 import time
-import sqlite3
-from pathlib import Path
+
+from raspberry_pi.runtime.clock import SystemClock
+from raspberry_pi.behavior.emotion_engine import EmotionEngine
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.memory.learned_responses import LearnedResponses
+from raspberry_pi.memory.retention import InteractionRetention
 
 class Emotion:
     HAPPY = "happy"
@@ -15,10 +19,13 @@ class Emotion:
     GRUMPY = "grumpy"    # New grumpy emotion
 
 class RobotPersonality:
-    def __init__(self, db_path="robot_memory.db", display=None):
+    def __init__(self, db_path="robot_memory.db", display=None, clock=None, rng=None, memory=None,
+                 learned_cache_size=256, raw_log_days=7):
         self.current_emotion = Emotion.NEUTRAL
         self.display = display  # OLED display interface
-        self.last_emotion_change = time.time()
+        self.clock = clock or SystemClock()  # Real or simulated time source
+        self.rng = rng or random  # Pass a random.Random for seeded, reproducible runs
+        self.last_emotion_change = self.clock.time()
         
         # Personality traits (1-10 scale)
         self.traits = {
@@ -29,8 +36,11 @@ class RobotPersonality:
             "patience": 5        # How patient the robot is
         }
         
-        # Initialize memory database
-        self._init_memory_db(db_path)
+        # Memory database, written in the background
+        self.db_path = db_path
+        self.memory = memory or MemoryStore(db_path)
+        self.learned = LearnedResponses(self.memory, capacity=learned_cache_size)
+        self.retention = InteractionRetention(self.memory, clock=self.clock, raw_days=raw_log_days)
         
         # Add mood tracking
         self.mood_duration = {
@@ -45,50 +55,36 @@ class RobotPersonality:
             Emotion.GRUMPY: (30, 60)      # 30-60 seconds
         }
         
-        # Chance of random emotion changes
-        self.random_emotion_chance = 0.01  # 1% chance per update
+        # Where each emotion sits as (valence, arousal)
+        self.mood_affect = {
+            Emotion.HAPPY: (0.8, 0.4),
+            Emotion.SAD: (-0.7, -0.4),
+            Emotion.EXCITED: (0.7, 0.9),
+            Emotion.NEUTRAL: (0.0, 0.0),
+            Emotion.SLEEPY: (0.1, -0.8),
+            Emotion.CURIOUS: (0.4, 0.5),
+            Emotion.SCARED: (-0.8, 0.8),
+            Emotion.PLAYFUL: (0.7, 0.7),
+            Emotion.GRUMPY: (-0.5, 0.3)
+        }
         
         # New emotional reactive multipliers
-        self.emotional_reactivity = random.uniform(0.8, 1.2)  # Personality trait
+        self.emotional_reactivity = self.rng.uniform(0.8, 1.2)  # Personality trait
         
-        # Timestamps for mood changes
-        self.last_random_mood_check = time.time()
-        self.mood_check_interval = 5  # Check for random mood changes every 5 seconds
+        # Emotion deadlines; 1% chance of a random emotion change every 5 seconds
+        self.mood_check_interval = 5
+        self.emotions = EmotionEngine(Emotion.NEUTRAL, self.mood_duration, self.mood_affect,
+                                      clock=self.clock, rng=self.rng, random_chance=0.01,
+                                      check_interval=self.mood_check_interval)
     
-    def _init_memory_db(self, db_path):
-        """Initialize the SQLite database for robot memory"""
-        self.db_path = db_path
-        db = Path(db_path)
-        
-        # Create parent directory if it doesn't exist
-        db.parent.mkdir(parents=True, exist_ok=True)
-        
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        # Create tables if they don't exist
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS interactions (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                interaction_type TEXT,
-                details TEXT,
-                emotion TEXT
-            )
-        ''')
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS learning (
-                id INTEGER PRIMARY KEY,
-                keyword TEXT,
-                response TEXT,
-                confidence REAL,
-                times_used INTEGER
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+    @property
+    def random_emotion_chance(self):
+        """Chance of a random emotion change per mood check"""
+        return self.emotions.random_chance
+    
+    @random_emotion_chance.setter
+    def random_emotion_chance(self, chance):
+        self.emotions.random_chance = chance
     
     def on_state_change(self, new_state):
         """React emotionally to state changes"""
@@ -101,55 +97,55 @@ class RobotPersonality:
         react_chance = 0.7 * self.emotional_reactivity  # Base 70% chance to react
         
         if new_state == RobotState.IDLE:
-            if random.random() < react_chance:
+            if self.rng.random() < react_chance:
                 self.set_emotion(Emotion.NEUTRAL)
         
         elif new_state == RobotState.ROAMING:
             # More active personality types get more excited about roaming
             if self.traits["activeness"] > 7:
-                if random.random() < react_chance:
+                if self.rng.random() < react_chance:
                     self.set_emotion(Emotion.EXCITED)
             else:
-                if random.random() < react_chance:
+                if self.rng.random() < react_chance:
                     self.set_emotion(Emotion.NEUTRAL)
         
         elif new_state == RobotState.AVOIDING:
             # Less patient robots get scared easier
             if self.traits["patience"] < 4:
-                if random.random() < react_chance:
+                if self.rng.random() < react_chance:
                     self.set_emotion(Emotion.SCARED)
             else:
                 # More patient ones just get grumpy or neutral
-                if random.random() < react_chance:
-                    self.set_emotion(random.choice([Emotion.GRUMPY, Emotion.NEUTRAL]))
+                if self.rng.random() < react_chance:
+                    self.set_emotion(self.rng.choice([Emotion.GRUMPY, Emotion.NEUTRAL]))
         
         elif new_state == RobotState.INTERACTING:
             # Friendly robots get happier during interactions
             if self.traits["friendliness"] > 6:
-                if random.random() < react_chance:
+                if self.rng.random() < react_chance:
                     self.set_emotion(Emotion.HAPPY)
             else:
-                if random.random() < react_chance:
+                if self.rng.random() < react_chance:
                     self.set_emotion(Emotion.NEUTRAL)
         
         elif new_state == RobotState.SEARCHING:
-            if random.random() < react_chance:
+            if self.rng.random() < react_chance:
                 self.set_emotion(Emotion.CURIOUS)
         
         elif new_state == RobotState.SLEEPING:
-            if random.random() < react_chance:
+            if self.rng.random() < react_chance:
                 self.set_emotion(Emotion.SLEEPY)
         
         elif new_state == RobotState.PLAYING:
-            if random.random() < react_chance:
-                self.set_emotion(random.choice([Emotion.PLAYFUL, Emotion.EXCITED, Emotion.HAPPY]))
+            if self.rng.random() < react_chance:
+                self.set_emotion(self.rng.choice([Emotion.PLAYFUL, Emotion.EXCITED, Emotion.HAPPY]))
         
         elif new_state == RobotState.STARTLED:
-            if random.random() < react_chance:
+            if self.rng.random() < react_chance:
                 self.set_emotion(Emotion.SCARED)
         
         elif new_state == RobotState.CURIOUS:
-            if random.random() < react_chance:
+            if self.rng.random() < react_chance:
                 self.set_emotion(Emotion.CURIOUS)
     
     def set_emotion(self, emotion):
@@ -160,68 +156,54 @@ class RobotPersonality:
         if self.display:
             self.display.set_emotion(emotion)
             
-        self.last_emotion_change = time.time()
+        self.last_emotion_change = self.clock.time()
+        self.emotions.set(emotion, self.last_emotion_change)
         
         # Log the emotion change
         self._log_interaction("emotion_change", f"Changed to {emotion}")
     
+    def restore_emotion(self, emotion, remaining=None):
+        """Resume an emotion from a saved profile with the time it had left"""
+        self.current_emotion = emotion
+        if self.display:
+            self.display.set_emotion(emotion)
+        self.last_emotion_change = self.clock.time()
+        self.emotions.set(emotion, self.last_emotion_change)
+        if remaining is not None:
+            self.emotions.expires_at = self.last_emotion_change + remaining
+
     def get_emotion(self):
         """Get the current emotion"""
         return self.current_emotion
     
+    def get_mood(self):
+        """Current emotion with its decayed intensity and valence/arousal"""
+        now = self.clock.time()
+        valence, arousal = self.emotions.valence_arousal(now)
+        return {
+            "emotion": self.current_emotion,
+            "intensity": self.emotions.intensity(now),
+            "valence": valence,
+            "arousal": arousal,
+            "remaining": self.emotions.remaining(now),
+        }
+    
     def _log_interaction(self, interaction_type, details):
-        """Log an interaction to the memory database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-            c.execute(
-                "INSERT INTO interactions (timestamp, interaction_type, details, emotion) VALUES (?, ?, ?, ?)",
-                (timestamp, interaction_type, details, self.current_emotion)
-            )
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Failed to log interaction: {e}")
+        """Log an interaction to the memory database (queued, never blocks)"""
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.clock.time()))
+        self.memory.execute(
+            "INSERT INTO interactions (timestamp, interaction_type, details, emotion) VALUES (?, ?, ?, ?)",
+            (timestamp, interaction_type, details, self.current_emotion)
+        )
     
     def learn_response(self, keyword, response):
         """Learn a response to a keyword"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Check if we already know this keyword
-            c.execute("SELECT id, confidence, times_used FROM learning WHERE keyword=?", (keyword,))
-            result = c.fetchone()
-            
-            if result:
-                # Update existing response with increased confidence
-                entry_id, confidence, times_used = result
-                new_confidence = min(confidence + 0.1, 1.0)
-                c.execute("UPDATE learning SET response=?, confidence=?, times_used=? WHERE id=?", 
-                         (response, new_confidence, times_used+1, entry_id))
-            else:
-                # Add new response
-                c.execute("INSERT INTO learning (keyword, response, confidence, times_used) VALUES (?, ?, ?, ?)",
-                         (keyword, response, 0.5, 1))
-            
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            print(f"Failed to learn response: {e}")
+        self.learned.learn(keyword, response)
     
     def get_learned_response(self, keyword):
         """Get a learned response for a keyword"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            c.execute("SELECT response, confidence FROM learning WHERE keyword=?", (keyword,))
-            result = c.fetchone()
-            
-            conn.close()
+            result = self.learned.lookup(keyword)
             
             if result and result[1] > 0.4:  # Only return if confidence is high enough
                 return result[0]
@@ -230,23 +212,28 @@ class RobotPersonality:
             print(f"Failed to retrieve response: {e}")
             return None
     
+    def close(self):
+        """Write out queued memories and close the database"""
+        self.memory.close()
+    
     def update(self):
-        """Update emotions periodically based on personality"""
-        current_time = time.time()
+        """Update emotions when one of their deadlines has passed"""
+        current_time = self.clock.time()
         
-        # Check if it's time for a possible random emotion change
-        if current_time - self.last_random_mood_check > self.mood_check_interval:
-            self.last_random_mood_check = current_time
-            
-            # Small chance of random emotion change
-            if random.random() < self.random_emotion_chance:
-                self._trigger_random_emotion()
-            
-            # Check if current emotion has lasted its duration
-            if current_time - self.last_emotion_change > self._get_emotion_duration():
-                # Transition back to neutral after other emotions wear off
-                if self.current_emotion != Emotion.NEUTRAL:
-                    self.set_emotion(Emotion.NEUTRAL)
+        # Roll old interactions up into hourly/daily counts now and then
+        self.retention.maybe_run()
+        
+        # Nothing to do until the emotion wears off or a random mood is due
+        if not self.emotions.due(current_time):
+            return
+        
+        if self.emotions.random_mood_due(current_time):
+            self.emotions.schedule_random_mood(current_time)
+            self._trigger_random_emotion()
+        
+        # Transition back to neutral after other emotions wear off
+        elif self.emotions.expired(current_time):
+            self.set_emotion(Emotion.NEUTRAL)
     
     def _trigger_random_emotion(self):
         """Trigger a random emotion based on personality traits"""
@@ -290,12 +277,5 @@ class RobotPersonality:
         emotion_weights = list(weights.values())
         
         if emotions and emotion_weights:
-            new_emotion = random.choices(emotions, weights=emotion_weights, k=1)[0]
+            new_emotion = self.rng.choices(emotions, weights=emotion_weights, k=1)[0]
             self.set_emotion(new_emotion)
-    
-    def _get_emotion_duration(self):
-        """Get the duration for the current emotion"""
-        if self.current_emotion in self.mood_duration:
-            min_time, max_time = self.mood_duration[self.current_emotion]
-            return random.uniform(min_time, max_time)
-        return 60  # Default duration
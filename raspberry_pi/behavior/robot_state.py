@@ -0,0 +1,10 @@
+class RobotState:
+    IDLE = "idle"
+    ROAMING = "roaming"
+    AVOIDING = "avoiding"
+    INTERACTING = "interacting"
+    SEARCHING = "searching"
+    SLEEPING = "sleeping"
+    PLAYING = "playing"     # New playful state
+    STARTLED = "startled"   # New startled reaction state
+    CURIOUS = "curious"     # Curiosity-driven behavior
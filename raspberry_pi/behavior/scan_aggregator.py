@@ -0,0 +1,171 @@
+import math
+import threading
+
+import numpy as np
+
+from raspberry_pi.runtime.clock import SystemClock
+from raspberry_pi.communication.message_dispatcher import SCAN, SCAN_END
+
+# Servo angle that points straight ahead; smaller angles are to the left
+AHEAD = 90
+
+class ScanAggregator:
+    """Polar range arrays assembled from the Arduino's servo sweeps
+
+    request() asks for a sweep and returns at once; the firmware streams
+    SCAN:<angle>:<dist> for every step from min_angle to max_angle and then
+    SCAN:END, and each reading lands in a preallocated row of ranges (one
+    row per sweep, the last sweeps kept, NaN where nothing was measured).
+    angles holds the servo angle of every column. A reading of 0 is an
+    HC-SR04 timeout, i.e. nothing within range, and is stored as max_range.
+
+    Queries merge the sweeps no older than max_age (or measured since a
+    given time) by taking the nearest range per angle, so an obstacle seen
+    in any recent sweep counts:
+    widest_free_sector() for where to go, nearest_obstacle_bearing() for
+    what to keep away from.
+    """
+
+    def __init__(self, serial, clock=None, commands=None, sweeps=4, min_angle=0, max_angle=180,
+                 step=15, max_range=400, free_distance=50, max_age=3.0, timeout=2.0):
+        self.clock = clock or SystemClock()
+        # Through the command pipeline when there is one, so SCAN gets a sequence number
+        self.send = commands.send if commands is not None else serial.send_command
+        self.min_angle = min_angle
+        self.step = step
+        self.max_range = max_range
+        self.free_distance = free_distance
+        self.max_age = max_age
+        self.timeout = timeout
+        self.lock = threading.Lock()  # Sweeps arrive on the serial read thread
+
+        self.angles = np.arange(min_angle, max_angle + 1, step, dtype=np.float64)
+        self.ranges = np.full((sweeps, len(self.angles)), np.nan)
+        self.times = np.full(sweeps, -np.inf)  # Last reading in each row
+        self.row = 0
+        # Scratch for queries; free is padded with a non-free angle at each end
+        self.merged = np.empty(len(self.angles))
+        self.free = np.zeros(len(self.angles) + 2, dtype=np.int8)
+
+        self.scanning = False
+        self.requested_at = None
+        self.completed_at = None
+
+        # Statistics
+        self.requests = 0
+        self.sweeps = 0
+        self.readings = 0
+        self.timeouts = 0
+        self.ignored = 0  # Angles outside the grid or readings with no sweep running
+
+        serial.subscribe(SCAN, self._on_reading)
+        serial.subscribe(SCAN_END, self._on_end)
+
+    def request(self):
+        """Ask for a sweep unless one is running; True if one was requested"""
+        if self.busy():
+            return False
+        with self.lock:
+            self.requests += 1
+            self.scanning = True
+            self.requested_at = self.clock.time()
+            # Reuse the oldest row
+            self.ranges[self.row].fill(np.nan)
+            self.times[self.row] = -np.inf
+        self.send("SCAN")
+        return True
+
+    def busy(self):
+        """True while a requested sweep hasn't finished or timed out"""
+        with self.lock:
+            if self.scanning and self.clock.time() - self.requested_at > self.timeout:
+                print("[SERIAL] Scan timed out")
+                self.scanning = False
+                self.timeouts += 1
+                self._next_row()
+            return self.scanning
+
+    def age(self, now=None):
+        """Seconds since the last complete sweep"""
+        if self.completed_at is None:
+            return math.inf
+        if now is None:
+            now = self.clock.time()
+        return now - self.completed_at
+
+    def merged_ranges(self, since=None):
+        """Nearest range per angle over sweeps measured since then (NaN if none)
+
+        since defaults to max_age ago. The returned array is reused by the
+        next call.
+        """
+        if since is None:
+            since = self.clock.time() - self.max_age
+        merged = self.merged
+        merged.fill(np.nan)
+        with self.lock:
+            for row in np.flatnonzero(self.times >= since):
+                # fmin ignores NaN, so partial sweeps only add what they measured
+                np.fmin(merged, self.ranges[row], out=merged)
+        return merged
+
+    def widest_free_sector(self, free_distance=None, since=None):
+        """(start, end, center) angles of the widest run of free angles, or None
+
+        Of equally wide sectors the one that needs the smallest turn wins.
+        """
+        if free_distance is None:
+            free_distance = self.free_distance
+        merged = self.merged_ranges(since)
+        # NaN compares False: unmeasured angles aren't free
+        np.greater_equal(merged, free_distance, out=self.free[1:-1].view(np.bool_))
+        edges = np.flatnonzero(np.diff(self.free))
+        if not len(edges):
+            return None
+        starts, ends = edges[::2], edges[1::2] - 1
+        widths = ends - starts
+        centers = (self.angles[starts] + self.angles[ends]) / 2
+        best = np.lexsort((np.abs(centers - AHEAD), -widths))[0]
+        return float(self.angles[starts[best]]), float(self.angles[ends[best]]), float(centers[best])
+
+    def nearest_obstacle_bearing(self, since=None):
+        """(angle, distance) of the closest reading in the recent sweeps, or None"""
+        merged = self.merged_ranges(since)
+        if np.isnan(merged).all():
+            return None
+        index = np.nanargmin(merged)
+        return float(self.angles[index]), float(merged[index])
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "sweeps": self.sweeps,
+            "readings": self.readings,
+            "timeouts": self.timeouts,
+            "ignored": self.ignored,
+            "age": None if self.completed_at is None else round(self.age(), 2),
+        }
+
+    def _next_row(self):
+        self.row = (self.row + 1) % len(self.times)
+
+    # Called on the serial read thread
+    def _on_reading(self, message):
+        angle, distance = message.values
+        index, offset = divmod(angle - self.min_angle, self.step)
+        with self.lock:
+            if not self.scanning or offset or not 0 <= index < len(self.angles):
+                self.ignored += 1
+                return
+            self.ranges[self.row, index] = distance if distance > 0 else self.max_range
+            self.times[self.row] = self.clock.time()
+            self.readings += 1
+
+    def _on_end(self, message):
+        with self.lock:
+            if not self.scanning:
+                return
+            self.scanning = False
+            self.sweeps += 1
+            self.completed_at = self.clock.time()
+            self._next_row()
@@ -1,42 +1,51 @@
-import time
 import random
+import threading
 
-class RobotState:
-    IDLE = "idle"
-    ROAMING = "roaming"
-    AVOIDING = "avoiding"
-    INTERACTING = "interacting"
-    SEARCHING = "searching"
-    SLEEPING = "sleeping"
-    PLAYING = "playing"     # New playful state
-    STARTLED = "startled"   # New startled reaction state
-    CURIOUS = "curious"     # Curiosity-driven behavior
+from raspberry_pi.behavior.robot_state import RobotState
+from raspberry_pi.behavior.motion_scheduler import MotionScheduler, STOP
+from raspberry_pi.behavior.transition_table import TransitionTable, STATE_DURATION, draw_deadline
+from raspberry_pi.behavior.distance_filter import DistanceFilter
+from raspberry_pi.behavior.scan_aggregator import AHEAD
+from raspberry_pi.runtime.clock import SystemClock
+
+# Compiled once and shared by every state machine
+DEFAULT_TRANSITION_TABLE = TransitionTable()
 
 class RobotStateMachine:
-    def __init__(self, sensor, motors, personality=None):
+    def __init__(self, sensor, motors, personality=None, clock=None, rng=None,
+                 transition_table=None, scanner=None):
         self.current_state = RobotState.IDLE
         self.sensor = sensor  # Ultrasonic sensor interface
         self.motors = motors  # Motor control interface
         self.personality = personality  # Robot personality traits
+        self.clock = clock or SystemClock()  # Real or simulated time source
+        self.rng = rng or random  # Pass a random.Random for seeded, reproducible runs
+        self.transition_table = transition_table or DEFAULT_TRANSITION_TABLE
+        self.scanner = scanner  # Servo sweeps (ScanAggregator) to choose avoidance turns
+        self.scan_since = None  # When the sweep for the next avoidance turn was requested
+        
+        # Timed motion sequences run here so handlers never sleep
+        self.motion = MotionScheduler(motors, clock=self.clock)
+        self.motion_started_in_state = False
         
         # State configuration
         self.min_obstacle_distance = 20  # cm
-        self.last_state_change = time.time()
-        self.state_duration = {
-            RobotState.IDLE: (3, 15),       # 3-15 seconds of idling
-            RobotState.ROAMING: (10, 30),   # 10-30 seconds of roaming
-            RobotState.SLEEPING: (10, 40),  # 10-40 seconds of sleeping
-            RobotState.PLAYING: (5, 15),    # 5-15 seconds of playing
-            RobotState.STARTLED: (1, 3),    # Brief startled reactions
-            RobotState.CURIOUS: (5, 15),    # 5-15 seconds of curious investigation
-        }
+        self.last_distance = 100  # Default value (cm) until the first reading
+        self.startle_closing_rate = 100  # cm/s; faster than the robot drives itself
+        
+        # Smoothed distance and closing rate; raw readings still drive avoidance
+        self.distance_filter = DistanceFilter(clock=self.clock)
+        self.last_state_change = self.clock.time()
+        self.state_duration = dict(STATE_DURATION)
+        self.state_deadline = draw_deadline(self.current_state, self.last_state_change,
+                                            self.state_duration, self.rng)
         
         # Pet-like behavior variables
         self.boredom_level = 0          # Increases over time, triggers playful behavior
         self.curiosity_level = 0        # Increases during idle, triggers exploration
         self.tiredness_level = 0        # Increases during activity, triggers sleeping
         self.interest_points = []       # Things the robot finds interesting
-        self.attention_span = random.randint(5, 15)  # How long it focuses on one thing
+        self.attention_span = self.rng.randint(5, 15)  # How long it focuses on one thing
         
         # Movement patterns for different states
         self.idle_fidget_chance = 0.05  # Chance to fidget while idle
@@ -53,36 +62,47 @@ class RobotStateMachine:
             RobotState.STARTLED: self._handle_startled,
             RobotState.CURIOUS: self._handle_curious
         }
+
+        # Set while the sensor/motor link can't be trusted; see safe_stop()
+        self.safe_stop_reason = None
+        
+        # Sensors that push readings (serial read thread, streaming simulated
+        # sensor) get obstacle checks the moment a reading arrives; others are
+        # polled once per update(). The lock keeps both paths from interleaving.
+        self.lock = threading.RLock()
+        self.push_sensor = hasattr(sensor, "subscribe")
+        if self.push_sensor:
+            sensor.subscribe(self.on_distance)
     
     def update(self):
         """Main update method to be called in the robot's main loop"""
+        with self.lock:
+            if self.safe_stop_reason is None:
+                self._update()
+
+    def on_distance(self, distance):
+        """React to a new distance reading as soon as the sensor delivers it"""
+        with self.lock:
+            if self.safe_stop_reason is not None:
+                return
+            if self._check_obstacle(distance):
+                # Start the reaction now instead of on the next tick
+                self.state_handlers[self.current_state]()
+
+    def _update(self):
         # Update pet-like behavior metrics
         self._update_behavior_metrics()
-        
-        # Check for obstacles regardless of state
-        distance = self.sensor.measure_distance()
-        
-        # Potentially get startled by sudden obstacle appearance
-        if (distance < self.min_obstacle_distance * 2 and 
-            distance < self.last_distance * 0.7 and  # Sudden drop in distance
-            self.current_state != RobotState.AVOIDING and
-            self.current_state != RobotState.STARTLED and
-            random.random() < 0.3):  # 30% chance to startle
-            self.transition_to(RobotState.STARTLED)
-        
-        # Override current state if obstacle is too close and we're not already avoiding
-        elif distance < self.min_obstacle_distance and self.current_state != RobotState.AVOIDING:
-            self.transition_to(RobotState.AVOIDING)
-        
-        # Save last distance reading
-        self.last_distance = distance
-        
-        # Check if we should transition based on time
-        current_time = time.time()
-        if self.current_state in self.state_duration:
-            min_time, max_time = self.state_duration[self.current_state]
-            if (current_time - self.last_state_change) > random.uniform(min_time, max_time):
-                self._choose_next_state()
+
+        # Advance any running motion sequence before deciding what to do next
+        self.motion.update()
+
+        # Check for obstacles regardless of state (push sensors already have)
+        if not self.push_sensor:
+            self._check_obstacle(self.sensor.measure_distance())
+
+        # Check if we should transition based on time (deadline drawn on entry)
+        if self.state_deadline is not None and self.clock.time() > self.state_deadline:
+            self._choose_next_state()
         
         # Pet-like behavior triggers
         if self.boredom_level > 70 and self.current_state not in [RobotState.PLAYING, RobotState.STARTLED, RobotState.AVOIDING]:
@@ -104,262 +124,278 @@ class RobotStateMachine:
         if self.current_state in self.state_handlers:
             self.state_handlers[self.current_state]()
     
+    def _check_obstacle(self, distance):
+        """Startle or avoid on a new distance reading, True if the state changed"""
+        changed = False
+        
+        # A lone glitch is rejected by the filter, so it can't startle
+        self.distance_filter.update(distance)
+        filtered = self.distance_filter.distance
+
+        # Potentially get startled by sudden obstacle appearance
+        if (filtered is not None and filtered < self.min_obstacle_distance * 2 and
+            self.distance_filter.closing_rate() > self.startle_closing_rate and
+            self.current_state != RobotState.AVOIDING and
+            self.current_state != RobotState.STARTLED and
+            self.rng.random() < 0.3):  # 30% chance to startle
+            self.transition_to(RobotState.STARTLED)
+            changed = True
+
+        # Override current state if obstacle is too close and we're not already avoiding
+        elif distance < self.min_obstacle_distance and self.current_state != RobotState.AVOIDING:
+            self.transition_to(RobotState.AVOIDING)
+            changed = True
+
+        # Save last distance reading
+        self.last_distance = distance
+        return changed
+
     def _update_behavior_metrics(self):
         """Update pet-like behavior metrics based on time and state"""
         # Boredom increases faster during idle states
         if self.current_state == RobotState.IDLE:
-            self.boredom_level = min(100, self.boredom_level + random.uniform(0.2, 0.5))
-            self.curiosity_level = min(100, self.curiosity_level + random.uniform(0.3, 0.8))
-            self.tiredness_level = max(0, self.tiredness_level - random.uniform(0.1, 0.3))
+            self.boredom_level = min(100, self.boredom_level + self.rng.uniform(0.2, 0.5))
+            self.curiosity_level = min(100, self.curiosity_level + self.rng.uniform(0.3, 0.8))
+            self.tiredness_level = max(0, self.tiredness_level - self.rng.uniform(0.1, 0.3))
         
         # Tiredness increases during active states
         elif self.current_state in [RobotState.ROAMING, RobotState.PLAYING, RobotState.AVOIDING]:
-            self.tiredness_level = min(100, self.tiredness_level + random.uniform(0.1, 0.4))
-            self.boredom_level = max(0, self.boredom_level - random.uniform(0.2, 0.6))
+            self.tiredness_level = min(100, self.tiredness_level + self.rng.uniform(0.1, 0.4))
+            self.boredom_level = max(0, self.boredom_level - self.rng.uniform(0.2, 0.6))
         
         # Sleeping decreases tiredness
         elif self.current_state == RobotState.SLEEPING:
-            self.tiredness_level = max(0, self.tiredness_level - random.uniform(0.5, 1.0))
-            self.boredom_level = min(100, self.boredom_level + random.uniform(0.1, 0.2))
+            self.tiredness_level = max(0, self.tiredness_level - self.rng.uniform(0.5, 1.0))
+            self.boredom_level = min(100, self.boredom_level + self.rng.uniform(0.1, 0.2))
+    
+    def safe_stop(self, reason):
+        """Stop the motors and make no decisions until resume()"""
+        with self.lock:
+            if self.safe_stop_reason is None:
+                print(f"Safe stop: {reason}")
+            self.safe_stop_reason = reason
+            self.motion.cancel()
+            self.motors.stop()
+    
+    def resume(self):
+        """Leave safe stop and start over from idle"""
+        with self.lock:
+            if self.safe_stop_reason is None:
+                return
+            print(f"Resuming after safe stop ({self.safe_stop_reason})")
+            self.safe_stop_reason = None
+            self.transition_to(RobotState.IDLE)
     
     def transition_to(self, new_state):
         """Transition to a new state"""
-        print(f"State transition: {self.current_state} -> {new_state}")
-        self.current_state = new_state
-        self.last_state_change = time.time()
-        
-        # Update personality/emotion if available
-        if self.personality:
-            self.personality.on_state_change(new_state)
+        # Voice commands call this from their own thread
+        with self.lock:
+            print(f"State transition: {self.current_state} -> {new_state}")
+            self.current_state = new_state
+            self.last_state_change = self.clock.time()
+            self.state_deadline = draw_deadline(new_state, self.last_state_change,
+                                                self.state_duration, self.rng)
+            
+            # Whatever the previous state was doing no longer applies
+            self.motion.cancel()
+            self.motion_started_in_state = False
+            self.scan_since = None
+            
+            # Update personality/emotion if available
+            if self.personality:
+                self.personality.on_state_change(new_state)
     
     def _choose_next_state(self):
-        """Choose next state based on current state and personality"""
-        weights = {}
-        
-        if self.current_state == RobotState.IDLE:
-            # After being idle, consider multiple states based on current metrics
-            weights = {
-                RobotState.ROAMING: 30 + self.boredom_level * 0.3,
-                RobotState.SLEEPING: max(5, self.tiredness_level * 0.7),
-                RobotState.CURIOUS: self.curiosity_level * 0.5,
-                RobotState.PLAYING: self.boredom_level * 0.2
-            }
-        
-        elif self.current_state == RobotState.ROAMING:
-            # After roaming, likely to become idle, sometimes curious
-            weights = {
-                RobotState.IDLE: 60,
-                RobotState.CURIOUS: 20,
-                RobotState.PLAYING: 10 + self.boredom_level * 0.1,
-                RobotState.SLEEPING: max(5, self.tiredness_level * 0.3)
-            }
-        
-        elif self.current_state == RobotState.SLEEPING:
-            # After sleeping, become idle
-            weights = {
-                RobotState.IDLE: 80,
-                RobotState.ROAMING: 20
-            }
-        
-        elif self.current_state == RobotState.PLAYING:
-            # After playing, either idle or roam
-            weights = {
-                RobotState.IDLE: 60,
-                RobotState.ROAMING: 30,
-                RobotState.SLEEPING: max(5, self.tiredness_level * 0.2)
-            }
-        
-        elif self.current_state == RobotState.STARTLED:
-            # After being startled, calm down to idle or run away (roam)
-            weights = {
-                RobotState.IDLE: 40,
-                RobotState.ROAMING: 60
-            }
-        
-        elif self.current_state == RobotState.AVOIDING:
-            # After avoiding, resume previous activity or idle
-            weights = {
-                RobotState.IDLE: 70,
-                RobotState.ROAMING: 30
-            }
-        
-        elif self.current_state == RobotState.CURIOUS:
-            # After being curious, either idle or continue roaming
-            weights = {
-                RobotState.IDLE: 60,
-                RobotState.ROAMING: 40
-            }
-        
-        else:
-            # Default behavior for any other states
-            weights = {
-                RobotState.IDLE: 100
-            }
-            
-        # Choose next state based on weights
-        choices, weights_list = zip(*weights.items())
-        next_state = random.choices(choices, weights=weights_list, k=1)[0]
+        """Choose next state based on current state and behavior metrics"""
+        next_state = self.transition_table.sample(
+            self.current_state,
+            self.boredom_level,
+            self.tiredness_level,
+            self.curiosity_level,
+            self.rng
+        )
         self.transition_to(next_state)
     
     # State handlers
+    # Handlers that need timed movements hand a sequence to self.motion and
+    # return straight away; they wait for it to finish before starting another
     def _handle_idle(self):
         """Idle state behavior"""
+        if self.motion.is_busy():
+            return
+        
         self.motors.stop()
         
         # Occasionally fidget while idle
-        if random.random() < self.idle_fidget_chance:
+        if self.rng.random() < self.idle_fidget_chance:
             # Small random movements to look alive
-            if random.random() < 0.5:
-                self.motors.turn_left(0.1)
-                time.sleep(0.1)
-            else:
-                self.motors.turn_right(0.1)
-                time.sleep(0.1)
-            self.motors.stop()
+            turn = "turn_left" if self.rng.random() < 0.5 else "turn_right"
+            self._play([(turn, 0.1, 0.1), STOP])
     
     def _handle_roaming(self):
         """Roaming state behavior"""
         # Random movement patterns that seem pet-like
-        decision = random.random()
+        decision = self.rng.random()
         
         if decision < 0.7:  # 70% chance to just move forward
-            self.motors.move_forward(random.uniform(0.3, 0.7))
+            self.motors.move_forward(self.rng.uniform(0.3, 0.7))
         elif decision < 0.85:  # 15% chance to turn left while moving
-            self.motors.turn_left(random.uniform(0.2, 0.6))
+            self.motors.turn_left(self.rng.uniform(0.2, 0.6))
             self.motors.move_forward(0.4)
         else:  # 15% chance to turn right while moving
-            self.motors.turn_right(random.uniform(0.2, 0.6))
+            self.motors.turn_right(self.rng.uniform(0.2, 0.6))
             self.motors.move_forward(0.4)
     
     def _handle_avoiding(self):
         """Obstacle avoidance behavior"""
-        # Existing avoidance logic...
-        self.motors.stop()
-        time.sleep(0.2)
-        
-        # Decide whether to turn left or right
-        if random.choice([True, False]):
-            self.motors.turn_left(0.8)
-        else:
-            self.motors.turn_right(0.8)
-        
-        time.sleep(random.uniform(0.5, 1.0))  # Variable turning time
-        
-        # Check if obstacle is still there
-        distance = self.sensor.measure_distance()
-        if distance > self.min_obstacle_distance * 1.5:  # Make sure we have enough clearance
-            self.transition_to(RobotState.ROAMING)
+        if self.motion.is_busy():
+            return
+        
+        # Previous stop-and-turn has finished, check if obstacle is still there
+        if self.motion_started_in_state:
+            distance = self.last_distance
+            if distance > self.min_obstacle_distance * 1.5:  # Make sure we have enough clearance
+                self.transition_to(RobotState.ROAMING)
+                return
+        
+        if self.scanner is not None:
+            if self.scan_since is None:
+                # Hold still and look around before picking a way out
+                self.scan_since = self.clock.time()
+                self.scanner.request()
+                self._play([STOP])
+            if self.scanner.busy():
+                return
+        
+        # Stop briefly, then turn toward open space
+        turn, duration = self._choose_avoid_turn()
+        self.scan_since = None
+        self._play([
+            ("stop", None, 0.2),
+            (turn, 0.8, duration),
+        ])
+    
+    def _choose_avoid_turn(self):
+        """Turn toward the widest free sector of the last sweeps, else at random"""
+        sector = None
+        if self.scanner is not None:
+            # Only sweeps taken since the last turn point the right way
+            sector = self.scanner.widest_free_sector(since=self.scan_since)
+        if sector is not None:
+            offset = sector[2] - AHEAD
+            if abs(offset) >= self.scanner.step:
+                # Servo angles below straight ahead are on the left; turn further
+                # for sectors further round
+                turn = "turn_left" if offset < 0 else "turn_right"
+                return turn, 0.3 + 0.7 * min(abs(offset), 90) / 90
+        turn = "turn_left" if self.rng.choice([True, False]) else "turn_right"
+        return turn, self.rng.uniform(0.5, 1.0)
     
     def _handle_playing(self):
         """Playful behavior with quick, random movements"""
+        if self.motion.is_busy():
+            return
+        
         # Choose a random playful behavior
-        play_behavior = random.randint(0, 3)
+        play_behavior = self.rng.randint(0, 3)
         
         if play_behavior == 0:
             # Quick spin
-            turn_direction = random.choice([self.motors.turn_left, self.motors.turn_right])
-            turn_direction(0.7)
-            time.sleep(random.uniform(0.3, 0.7))
-            self.motors.stop()
+            turn = self.rng.choice(["turn_left", "turn_right"])
+            self._play([(turn, 0.7, self.rng.uniform(0.3, 0.7)), STOP])
             
         elif play_behavior == 1:
             # Short dash forward
-            self.motors.move_forward(0.8)
-            time.sleep(random.uniform(0.2, 0.5))
-            self.motors.stop()
+            self._play([("move_forward", 0.8, self.rng.uniform(0.2, 0.5)), STOP])
             
         elif play_behavior == 2:
             # Wiggle (alternate left-right quickly)
-            for _ in range(random.randint(2, 5)):
-                self.motors.turn_left(0.5)
-                time.sleep(0.1)
-                self.motors.turn_right(0.5)
-                time.sleep(0.1)
-            self.motors.stop()
+            wiggle = []
+            for _ in range(self.rng.randint(2, 5)):
+                wiggle.append(("turn_left", 0.5, 0.1))
+                wiggle.append(("turn_right", 0.5, 0.1))
+            wiggle.append(STOP)
+            self._play(wiggle)
             
         elif play_behavior == 3:
             # Reverse and turn
-            self.motors.move_backward(0.6)
-            time.sleep(0.2)
-            turn_direction = random.choice([self.motors.turn_left, self.motors.turn_right])
-            turn_direction(0.6)
-            time.sleep(0.3)
-            self.motors.stop()
+            turn = self.rng.choice(["turn_left", "turn_right"])
+            self._play([
+                ("move_backward", 0.6, 0.2),
+                (turn, 0.6, 0.3),
+                STOP,
+            ])
     
     def _handle_startled(self):
         """Reaction when startled"""
-        # Quick reverse motion
-        self.motors.move_backward(1.0)
-        time.sleep(random.uniform(0.3, 0.6))
-        
-        # Quick turn in random direction
-        if random.choice([True, False]):
-            self.motors.turn_left(1.0)
-        else:
-            self.motors.turn_right(1.0)
-        
-        time.sleep(random.uniform(0.3, 0.7))
-        self.motors.stop()
+        if self.motion.is_busy():
+            return
+        
+        # Quick reverse motion, then a quick turn in random direction
+        turn = "turn_left" if self.rng.choice([True, False]) else "turn_right"
+        self._play([
+            ("move_backward", 1.0, self.rng.uniform(0.3, 0.6)),
+            (turn, 1.0, self.rng.uniform(0.3, 0.7)),
+            STOP,
+        ])
     
     def _handle_curious(self):
         """Curious investigation behavior"""
-        # Slower, more deliberate movements with pauses
-        
-        # Move a bit
-        self.motors.move_forward(0.3)
-        time.sleep(random.uniform(0.3, 0.7))
-        
-        # Stop and look around (turn slightly left or right)
-        self.motors.stop()
-        time.sleep(0.5)  # Pause to "observe"
-        
-        if random.random() < 0.5:
-            self.motors.turn_left(0.2)
-        else:
-            self.motors.turn_right(0.2)
-            
-        time.sleep(random.uniform(0.2, 0.5))
-        self.motors.stop()
+        if self.motion.is_busy():
+            return
+        
+        # Slower, more deliberate movements with pauses: move a bit, stop and
+        # "observe", then look around (turn slightly left or right)
+        turn = "turn_left" if self.rng.random() < 0.5 else "turn_right"
+        self._play([
+            ("move_forward", 0.3, self.rng.uniform(0.3, 0.7)),
+            ("stop", None, 0.5),
+            (turn, 0.2, self.rng.uniform(0.2, 0.5)),
+            STOP,
+        ])
     
     def _handle_interacting(self):
         """Interacting with human behavior"""
+        if self.motion.is_busy():
+            return
+        
         # Stop movement
         self.motors.stop()
         
         # Show attentiveness by tracking (simulated here with small turns)
-        if random.random() < 0.3:
-            if random.random() < 0.5:
-                self.motors.turn_left(0.1)
-            else:
-                self.motors.turn_right(0.1)
-            time.sleep(0.1)
-            self.motors.stop()
+        if self.rng.random() < 0.3:
+            turn = "turn_left" if self.rng.random() < 0.5 else "turn_right"
+            self._play([(turn, 0.1, 0.1), STOP])
     
     def _handle_searching(self):
         """Searching behavior - looking for something or someone"""
-        # Move forward slowly while turning head
-        self.motors.move_forward(0.3)
-        time.sleep(0.3)
+        if self.motion.is_busy():
+            return
         
-        # Stop and look around
-        self.motors.stop()
+        # Move forward slowly while turning head, then stop and look around
+        sequence = [("move_forward", 0.3, 0.3), STOP]
         
-        if random.random() < 0.6:  # 60% chance to turn and look
-            turn_func = self.motors.turn_left if random.random() < 0.5 else self.motors.turn_right
-            turn_func(0.2)
-            time.sleep(random.uniform(0.2, 0.5))
-            self.motors.stop()
+        if self.rng.random() < 0.6:  # 60% chance to turn and look
+            turn = "turn_left" if self.rng.random() < 0.5 else "turn_right"
+            sequence.append((turn, 0.2, self.rng.uniform(0.2, 0.5)))
+            sequence.append(STOP)
+        
+        self._play(sequence)
     
     def _handle_sleeping(self):
         """Sleeping behavior"""
+        if self.motion.is_busy():
+            return
+        
         # Just stop and occasionally "breathe" (small movements)
         self.motors.stop()
         
         # Occasionally make small movement like breathing
-        if random.random() < 0.05:  # 5% chance per update
-            if random.random() < 0.5:
-                self.motors.turn_left(0.05)  # Very slight turn
-            else:
-                self.motors.turn_right(0.05)  # Very slight turn
-            time.sleep(0.1)
-            self.motors.stop()
+        if self.rng.random() < 0.05:  # 5% chance per update
+            turn = "turn_left" if self.rng.random() < 0.5 else "turn_right"
+            self._play([(turn, 0.05, 0.1), STOP])  # Very slight turn
+    
+    def _play(self, sequence):
+        """Start a motion sequence on behalf of the current state"""
+        self.motion_started_in_state = True
+        self.motion.play(sequence)
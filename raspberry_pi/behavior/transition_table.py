@@ -0,0 +1,152 @@
+import random
+
+from raspberry_pi.behavior.robot_state import RobotState
+
+# Fixed order of state codes for array-backed tables
+STATES = [
+    RobotState.IDLE,
+    RobotState.ROAMING,
+    RobotState.AVOIDING,
+    RobotState.INTERACTING,
+    RobotState.SEARCHING,
+    RobotState.SLEEPING,
+    RobotState.PLAYING,
+    RobotState.STARTLED,
+    RobotState.CURIOUS,
+]
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+# Default (min, max) seconds spent in each timed state
+STATE_DURATION = {
+    RobotState.IDLE: (3, 15),       # 3-15 seconds of idling
+    RobotState.ROAMING: (10, 30),   # 10-30 seconds of roaming
+    RobotState.SLEEPING: (10, 40),  # 10-40 seconds of sleeping
+    RobotState.PLAYING: (5, 15),    # 5-15 seconds of playing
+    RobotState.STARTLED: (1, 3),    # Brief startled reactions
+    RobotState.CURIOUS: (5, 15),    # 5-15 seconds of curious investigation
+}
+
+# Next-state weights as (target, base, boredom coeff, tiredness coeff,
+# curiosity coeff, floor) so that weight = max(floor, base + coeffs . metrics)
+NEXT_STATE_WEIGHTS = {
+    # After being idle, consider multiple states based on current metrics
+    RobotState.IDLE: [
+        (RobotState.ROAMING, 30, 0.3, 0, 0, 0),
+        (RobotState.SLEEPING, 0, 0, 0.7, 0, 5),
+        (RobotState.CURIOUS, 0, 0, 0, 0.5, 0),
+        (RobotState.PLAYING, 0, 0.2, 0, 0, 0),
+    ],
+    # After roaming, likely to become idle, sometimes curious
+    RobotState.ROAMING: [
+        (RobotState.IDLE, 60, 0, 0, 0, 0),
+        (RobotState.CURIOUS, 20, 0, 0, 0, 0),
+        (RobotState.PLAYING, 10, 0.1, 0, 0, 0),
+        (RobotState.SLEEPING, 0, 0, 0.3, 0, 5),
+    ],
+    # After sleeping, become idle
+    RobotState.SLEEPING: [
+        (RobotState.IDLE, 80, 0, 0, 0, 0),
+        (RobotState.ROAMING, 20, 0, 0, 0, 0),
+    ],
+    # After playing, either idle or roam
+    RobotState.PLAYING: [
+        (RobotState.IDLE, 60, 0, 0, 0, 0),
+        (RobotState.ROAMING, 30, 0, 0, 0, 0),
+        (RobotState.SLEEPING, 0, 0, 0.2, 0, 5),
+    ],
+    # After being startled, calm down to idle or run away (roam)
+    RobotState.STARTLED: [
+        (RobotState.IDLE, 40, 0, 0, 0, 0),
+        (RobotState.ROAMING, 60, 0, 0, 0, 0),
+    ],
+    # After avoiding, resume previous activity or idle
+    RobotState.AVOIDING: [
+        (RobotState.IDLE, 70, 0, 0, 0, 0),
+        (RobotState.ROAMING, 30, 0, 0, 0, 0),
+    ],
+    # After being curious, either idle or continue roaming
+    RobotState.CURIOUS: [
+        (RobotState.IDLE, 60, 0, 0, 0, 0),
+        (RobotState.ROAMING, 40, 0, 0, 0, 0),
+    ],
+}
+
+# States without an entry go back to idle
+DEFAULT_NEXT_STATE = RobotState.IDLE
+
+class TransitionTable:
+    """Next-state model compiled once into flat per-state rows
+
+    Each row holds parallel lists of target codes and their base weight,
+    boredom/tiredness/curiosity coefficients and floor. Sampling evaluates the
+    handful of weights in a row, accumulates them and stops at the first
+    cumulative weight above a single uniform draw - no dicts, zips or
+    random.choices on the hot path.
+    """
+
+    def __init__(self, weights=None):
+        weights = NEXT_STATE_WEIGHTS if weights is None else weights
+        default_row = [(DEFAULT_NEXT_STATE, 100, 0, 0, 0, 0)]
+
+        self.rows = []
+        for state in STATES:
+            entries = weights.get(state, default_row)
+            self.rows.append((
+                [STATE_CODES[target] for target, *_ in entries],
+                [float(entry[1]) for entry in entries],
+                [float(entry[2]) for entry in entries],
+                [float(entry[3]) for entry in entries],
+                [float(entry[4]) for entry in entries],
+                [float(entry[5]) for entry in entries],
+            ))
+
+    def sample(self, state, boredom, tiredness, curiosity, rng=random):
+        """Draw the next state (by name) for a robot in the given state"""
+        targets, base, boredom_k, tiredness_k, curiosity_k, floor = self.rows[STATE_CODES[state]]
+
+        # Weights are tiny rows (at most four entries), so one pass computes
+        # the total and a second walks the cumulative sum. The weights list is
+        # local: the table is shared, and state machines may sample at once.
+        total = 0.0
+        count = len(targets)
+        weights = [0.0] * count
+        for i in range(count):
+            weight = base[i] + boredom_k[i] * boredom + tiredness_k[i] * tiredness + curiosity_k[i] * curiosity
+            if weight < floor[i]:
+                weight = floor[i]
+            weights[i] = weight
+            total += weight
+
+        draw = rng.random() * total
+        cumulative = 0.0
+        for i in range(count):
+            cumulative += weights[i]
+            if draw < cumulative:
+                return STATES[targets[i]]
+        return STATES[targets[count - 1]]
+
+    def as_arrays(self):
+        """(state x target) NumPy matrices for vectorized sampling
+
+        Returns a dict with 'base', 'boredom', 'tiredness', 'curiosity' and
+        'floor' matrices; a target's weight is zero where it isn't listed.
+        """
+        import numpy as np
+
+        num_states = len(STATES)
+        arrays = {name: np.zeros((num_states, num_states))
+                  for name in ("base", "boredom", "tiredness", "curiosity", "floor")}
+        for row, (targets, base, boredom_k, tiredness_k, curiosity_k, floor) in enumerate(self.rows):
+            arrays["base"][row, targets] = base
+            arrays["boredom"][row, targets] = boredom_k
+            arrays["tiredness"][row, targets] = tiredness_k
+            arrays["curiosity"][row, targets] = curiosity_k
+            arrays["floor"][row, targets] = floor
+        return arrays
+
+def draw_deadline(state, now, state_duration=STATE_DURATION, rng=random):
+    """Time at which a state entered at `now` should end, or None if untimed"""
+    if state not in state_duration:
+        return None
+    min_time, max_time = state_duration[state]
+    return now + rng.uniform(min_time, max_time)
@@ -0,0 +1,234 @@
+import struct
+
+# Negotiated over the text protocol: the Pi sends PROTO_REQUEST, firmware
+# that speaks binary answers PROTO_ACCEPT and both sides switch. Older
+# firmware answers ERR:UNKNOWN_CMD and the link stays on text.
+PROTO_VERSION = 1
+PROTO_REQUEST = f"PROTO:BIN{PROTO_VERSION}"
+PROTO_ACCEPT = f"{PROTO_REQUEST}:OK"
+
+# Frame: COBS(type u8, fields..., crc8) followed by a 0x00 delimiter.
+# Fields are little-endian. Keep in sync with arduino/main_arduino.
+
+# Arduino -> Pi
+MSG_READY = 0x01
+MSG_DIST = 0x02       # distance cm u16
+MSG_SCAN = 0x03       # angle u8, distance cm u16
+MSG_SCAN_END = 0x04
+MSG_BATTERY = 0x05    # percent u8
+MSG_ACK = 0x06        # command code u8
+MSG_PONG = 0x07       # token u16
+MSG_ERROR = 0x08      # command code u8 (0 if unknown)
+MSG_DONE = 0x09       # command code u8, a timed move finished
+
+# Pi -> Arduino
+MSG_MOTOR = 0x10      # command code u8, speed u8 (0-255)
+MSG_SERVO = 0x11      # angle u8
+MSG_SCAN_REQUEST = 0x12
+MSG_BATTERY_REQUEST = 0x13
+MSG_PING = 0x14       # token u16
+MSG_MOTOR_TIMED = 0x15  # command code u8, speed u8, duration ms u16
+
+MESSAGE_FORMATS = {
+    MSG_READY: struct.Struct("<"),
+    MSG_DIST: struct.Struct("<H"),
+    MSG_SCAN: struct.Struct("<BH"),
+    MSG_SCAN_END: struct.Struct("<"),
+    MSG_BATTERY: struct.Struct("<B"),
+    MSG_ACK: struct.Struct("<B"),
+    MSG_PONG: struct.Struct("<H"),
+    MSG_ERROR: struct.Struct("<B"),
+    MSG_DONE: struct.Struct("<B"),
+    MSG_MOTOR: struct.Struct("<BB"),
+    MSG_SERVO: struct.Struct("<B"),
+    MSG_SCAN_REQUEST: struct.Struct("<"),
+    MSG_BATTERY_REQUEST: struct.Struct("<"),
+    MSG_PING: struct.Struct("<H"),
+    MSG_MOTOR_TIMED: struct.Struct("<BBH"),
+}
+
+# Codes for the text commands, used by MSG_MOTOR, MSG_ACK and MSG_ERROR
+COMMAND_CODES = {"FWD": 1, "BCK": 2, "LFT": 3, "RGT": 4, "STP": 5,
+                 "SRV": 6, "SCAN": 7, "BAT": 8, "PING": 9}
+COMMAND_NAMES = {code: name for name, code in COMMAND_CODES.items()}
+MOTOR_COMMANDS = ("FWD", "BCK", "LFT", "RGT", "STP")
+
+MAX_FRAME = 32  # Largest encoded frame either side accepts
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _crc8_table()
+
+def crc8(data, start=0, end=None):
+    """CRC-8 (polynomial 0x07, init 0) over data[start:end]"""
+    crc = 0
+    table = CRC8_TABLE
+    for index in range(start, len(data) if end is None else end):
+        crc = table[crc ^ data[index]]
+    return crc
+
+def cobs_encode(data):
+    """COBS-encode data and append the 0x00 frame delimiter"""
+    out = bytearray(b"\x00")
+    code_index = 0
+    code = 1
+    for byte in data:
+        if byte:
+            out.append(byte)
+            code += 1
+        if not byte or code == 0xFF:
+            out[code_index] = code
+            code_index = len(out)
+            out.append(0)
+            code = 1
+    out[code_index] = code
+    out.append(0)
+    return bytes(out)
+
+def cobs_decode_in_place(buffer, start, end):
+    """Decode the COBS block buffer[start:end] in place
+
+    The decoded bytes are written over the encoded ones from start, which is
+    safe because decoding never grows. Returns the decoded length, or -1 if
+    the block is malformed.
+    """
+    read = write = start
+    while read < end:
+        code = buffer[read]
+        if code == 0 or read + code > end:
+            return -1
+        read += 1
+        for _ in range(code - 1):
+            buffer[write] = buffer[read]
+            write += 1
+            read += 1
+        if code < 0xFF and read < end:
+            buffer[write] = 0
+            write += 1
+    return write - start
+
+def encode_message(msg_type, *values):
+    """A complete frame ready for the wire"""
+    payload = bytes((msg_type,)) + MESSAGE_FORMATS[msg_type].pack(*values)
+    return cobs_encode(payload + bytes((crc8(payload),)))
+
+def encode_command(command):
+    """Frame for a text command such as "FWD:180", "FWD:180:300" or "SRV:90", or None"""
+    # Frames have no room for a sequence number; ACKs match by command
+    command = command.partition("#")[0]
+    name, _, argument = command.partition(":")
+    try:
+        if name in MOTOR_COMMANDS:
+            argument, _, duration = argument.partition(":")
+            speed = 0 if name == "STP" else int(argument) if argument else 255
+            speed = max(0, min(255, speed))
+            if duration and name != "STP":
+                return encode_message(MSG_MOTOR_TIMED, COMMAND_CODES[name], speed,
+                                      max(1, min(0xFFFF, int(duration))))
+            return encode_message(MSG_MOTOR, COMMAND_CODES[name], speed)
+        if name == "SRV":
+            return encode_message(MSG_SERVO, max(0, min(180, int(argument))))
+        if name == "PING":
+            return encode_message(MSG_PING, int(argument) & 0xFFFF if argument else 0)
+    except ValueError:
+        return None
+    if command == "SCAN":
+        return encode_message(MSG_SCAN_REQUEST)
+    if command == "BAT":
+        return encode_message(MSG_BATTERY_REQUEST)
+    return None
+
+def describe(msg_type, values):
+    """The text protocol line a message stands for"""
+    if msg_type == MSG_DIST:
+        return f"DIST:{values[0]}"
+    if msg_type == MSG_SCAN:
+        return f"SCAN:{values[0]}:{values[1]}"
+    if msg_type == MSG_SCAN_END:
+        return "SCAN:END"
+    if msg_type == MSG_BATTERY:
+        return f"BAT:{values[0]}"
+    if msg_type == MSG_ACK:
+        return f"ACK:{COMMAND_NAMES.get(values[0], values[0])}"
+    if msg_type == MSG_PONG:
+        return "PONG"
+    if msg_type == MSG_READY:
+        return "ARDUINO:READY"
+    if msg_type == MSG_ERROR:
+        return f"ERR:{COMMAND_NAMES.get(values[0], 'UNKNOWN_CMD')}"
+    if msg_type == MSG_DONE:
+        return f"DONE:{COMMAND_NAMES.get(values[0], values[0])}"
+    return f"MSG:{msg_type}:" + ":".join(str(value) for value in values)
+
+class FrameDecoder:
+    """Incremental frame parser over a single reusable bytearray
+
+    feed() appends raw bytes from the port and returns the complete messages
+    as (msg_type, values) tuples. Frames are decoded in place and fields
+    read with struct.unpack_from, so no per-frame bytes objects are made.
+    Frames with a bad CRC, unknown type or wrong length are counted and
+    dropped; the next 0x00 delimiter resynchronizes.
+    """
+
+    def __init__(self, max_frame=MAX_FRAME):
+        self.max_frame = max_frame
+        self.buffer = bytearray()
+
+        # Statistics
+        self.frames = 0
+        self.crc_errors = 0
+        self.framing_errors = 0
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer.extend(data)
+        messages = []
+        start = 0
+        while True:
+            end = buffer.find(0, start)
+            if end < 0:
+                break
+            if end > start:  # Empty frames are just padding
+                message = self._parse(buffer, start, end)
+                if message is not None:
+                    messages.append(message)
+            start = end + 1
+
+        if start:
+            del buffer[:start]
+        if len(buffer) > self.max_frame:
+            # No delimiter in sight: line noise, wait for the next frame
+            self.framing_errors += 1
+            buffer.clear()
+        return messages
+
+    def stats(self):
+        return {"frames": self.frames, "crc_errors": self.crc_errors,
+                "framing_errors": self.framing_errors}
+
+    def _parse(self, buffer, start, end):
+        if end - start > self.max_frame:
+            self.framing_errors += 1
+            return None
+        length = cobs_decode_in_place(buffer, start, end)
+        if length < 2:
+            self.framing_errors += 1
+            return None
+        if crc8(buffer, start, start + length - 1) != buffer[start + length - 1]:
+            self.crc_errors += 1
+            return None
+
+        msg_type = buffer[start]
+        fmt = MESSAGE_FORMATS.get(msg_type)
+        if fmt is None or fmt.size != length - 2:
+            self.framing_errors += 1
+            return None
+        self.frames += 1
+        return msg_type, fmt.unpack_from(buffer, start + 1)
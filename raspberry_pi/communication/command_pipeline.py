@@ -0,0 +1,180 @@
+import threading
+from collections import deque, OrderedDict
+
+from raspberry_pi.runtime.clock import SystemClock
+from raspberry_pi.communication.message_dispatcher import ACK, ERR
+
+# Commands the firmware acknowledges with ACK:<name>#<seq>
+ACKED_COMMANDS = ("FWD", "BCK", "LFT", "RGT", "STP", "SRV", "SCAN")
+
+# Safe to send twice: they set an absolute state rather than start something.
+# Timed moves (FWD:<speed>:<ms>) are not, a second copy would restart the timer.
+IDEMPOTENT_COMMANDS = ("FWD", "BCK", "LFT", "RGT", "STP", "SRV")
+
+# A newer command on the same channel makes older ones obsolete
+CHANNELS = {"FWD": "motors", "BCK": "motors", "LFT": "motors", "RGT": "motors",
+            "STP": "motors", "SRV": "servo"}
+
+class CommandPipeline:
+    """Outbound commands with sequence numbers, ACK tracking and retransmits
+
+    send() tags acknowledged commands as "FWD:180#12" and keeps at most
+    window of them in flight; the rest wait in a bounded queue (oldest
+    dropped when full). The firmware echoes the number back as "ACK:FWD#12".
+    Binary frames carry no sequence number, so their ACKs match the oldest
+    command in flight with the same name.
+
+    poll() retransmits idempotent commands that weren't acknowledged within
+    timeout, up to max_retries times, and gives up on the rest. A command
+    that a newer one on the same channel has replaced is never resent, so a
+    late retransmit can't undo a stop. STP skips the queue and the window.
+    """
+
+    def __init__(self, serial, clock=None, window=4, timeout=0.3, max_retries=2,
+                 max_queue=16, rtt_samples=256):
+        self.serial = serial
+        self.clock = clock or SystemClock()
+        self.window = window
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_queue = max_queue
+        self.lock = threading.RLock()  # ACKs can arrive while send() is on the stack
+
+        self.next_seq = 1
+        self.queue = deque()             # Commands waiting for a window slot
+        self.in_flight = OrderedDict()   # seq -> entry, oldest first
+        self.latest = {}                 # channel -> seq of the newest command
+        self.rtts = deque(maxlen=rtt_samples)
+
+        # Statistics
+        self.sent = 0
+        self.acked = 0
+        self.retransmits = 0
+        self.failed = 0      # Gave up: retries exhausted or ERR from the firmware
+        self.superseded = 0  # Replaced by a newer command before being acknowledged
+        self.dropped = 0     # Queue overflow
+
+        serial.subscribe([ACK, ERR], self._on_reply)
+
+    def send(self, command):
+        """Queue a command for the Arduino; returns its sequence number"""
+        name = command.split(":", 1)[0]
+        if name not in ACKED_COMMANDS:
+            # No reply to wait for (PING, BAT, ...), send as is
+            self.serial.send_command(command)
+            return None
+
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq = self.next_seq % 0xFFFF + 1
+            entry = {"seq": seq, "command": command, "name": name,
+                     "channel": CHANNELS.get(name, name), "sent_at": None, "retries": 0}
+
+            if name == "STP":
+                # Jump the queue: nothing queued before a stop should still run
+                self._drop_queued(entry["channel"])
+                self._transmit(entry)
+            else:
+                if len(self.queue) >= self.max_queue:
+                    self.queue.popleft()
+                    self.dropped += 1
+                self.queue.append(entry)
+                self._pump()
+            return seq
+
+    def poll(self):
+        """Retransmit or give up on overdue commands and fill the window"""
+        with self.lock:
+            now = self.clock.time()
+            for entry in list(self.in_flight.values()):
+                if now - entry["sent_at"] < self.timeout:
+                    continue
+                if self.latest.get(entry["channel"]) != entry["seq"]:
+                    del self.in_flight[entry["seq"]]
+                    self.superseded += 1
+                elif self._idempotent(entry) and entry["retries"] < self.max_retries:
+                    entry["retries"] += 1
+                    self.retransmits += 1
+                    self._transmit(entry)
+                else:
+                    del self.in_flight[entry["seq"]]
+                    self.failed += 1
+                    print(f"[SERIAL] No ACK for {entry['command']} (#{entry['seq']})")
+            self._pump()
+
+    def rtt_percentiles(self, percentiles=(50, 90, 99)):
+        """Round-trip times in milliseconds from first-try ACKs"""
+        samples = sorted(self.rtts)
+        if not samples:
+            return {}
+        result = {}
+        for percentile in percentiles:
+            index = min(len(samples) - 1, max(0, -(-percentile * len(samples) // 100) - 1))
+            result[f"p{percentile}"] = round(samples[index] * 1000, 1)
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                "sent": self.sent,
+                "acked": self.acked,
+                "retransmits": self.retransmits,
+                "failed": self.failed,
+                "superseded": self.superseded,
+                "dropped": self.dropped,
+                "in_flight": len(self.in_flight),
+                "queued": len(self.queue),
+                "rtt_ms": self.rtt_percentiles(),
+            }
+
+    @staticmethod
+    def _idempotent(entry):
+        return entry["name"] in IDEMPOTENT_COMMANDS and entry["command"].count(":") < 2
+
+    def _pump(self):
+        while self.queue and len(self.in_flight) < self.window:
+            self._transmit(self.queue.popleft())
+
+    def _transmit(self, entry):
+        seq = entry["seq"]
+        # Registered before sending: a simulated link ACKs inside send_command
+        entry["sent_at"] = self.clock.time()
+        self.in_flight[seq] = entry
+        self.in_flight.move_to_end(seq)
+        self.latest[entry["channel"]] = seq
+        self.sent += 1
+        self.serial.send_command(f"{entry['command']}#{seq}")
+
+    def _drop_queued(self, channel):
+        kept = [entry for entry in self.queue if entry["channel"] != channel]
+        self.superseded += len(self.queue) - len(kept)
+        self.queue = deque(kept)
+
+    def _on_reply(self, message):
+        with self.lock:
+            if message.type == ACK:
+                entry = self._match(*message.values)
+                if entry is None:
+                    return
+                self.acked += 1
+                if not entry["retries"]:
+                    # A retransmitted command's ACK could be for either copy
+                    self.rtts.append(self.clock.time() - entry["sent_at"])
+            else:
+                # ERR:UNKNOWN_CMD:<command>#<seq>
+                detail = message.values[-1] if message.values else ""
+                seq = detail.rpartition("#")[2]
+                entry = self.in_flight.pop(int(seq), None) if seq.isdigit() else None
+                if entry is None:
+                    return
+                self.failed += 1
+                print(f"[SERIAL] Arduino rejected {entry['command']}")
+            self._pump()
+
+    def _match(self, name, seq=None):
+        if seq is not None:
+            return self.in_flight.pop(seq, None)
+        for entry in self.in_flight.values():
+            if entry["name"] == name:
+                return self.in_flight.pop(entry["seq"])
+        return None
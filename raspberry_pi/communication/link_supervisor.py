@@ -0,0 +1,225 @@
+import asyncio
+from collections import deque
+
+from raspberry_pi.runtime.clock import SystemClock
+from raspberry_pi.communication.message_dispatcher import Message, DIST, PONG, READY, LINK
+
+# Link states
+OK = "ok"
+DEGRADED = "degraded"          # Port open, but PONGs or sensor readings stopped
+DISCONNECTED = "disconnected"  # Port closed, reopening with backoff
+
+class LinkSupervisor:
+    """Watches the serial link and brings it back when it fails
+
+    check() runs every interval (run_async() on the AsyncRuntime, which
+    reopens the port in an executor so the event loop isn't blocked):
+
+    - a PING goes out every ping_interval and the PONG round trip is timed;
+      max_missed unanswered pings in a row degrade the link
+    - no DIST reading for stale_after seconds degrades the link, and a link
+      degraded for reopen_after seconds is reopened, which also resets the
+      Arduino
+    - a closed port is reopened, waiting backoff_initial seconds after the
+      first failure and doubling up to backoff_max. The handler asks for the
+      binary protocol again and the firmware's ARDUINO:READY is answered as
+      on first start. The link counts as OK only once the Arduino talks again.
+
+    on_degraded(reason) and on_restored() are called on changes so the robot
+    can stop safely, and on_reset() when the Arduino restarts, since it has
+    forgotten what the motors were told. Metrics go out as a LINK message on
+    the dispatcher every metrics_interval seconds and whenever the state
+    changes.
+    """
+
+    def __init__(self, serial, clock=None, interval=0.1, ping_interval=1.0, pong_timeout=0.5,
+                 max_missed=3, stale_after=2.0, reopen_after=5.0, backoff_initial=0.5,
+                 backoff_max=10.0, metrics_interval=5.0, on_degraded=None, on_restored=None,
+                 on_reset=None):
+        self.serial = serial
+        self.clock = clock or SystemClock()
+        self.interval = interval
+        self.ping_interval = ping_interval
+        self.pong_timeout = pong_timeout
+        self.max_missed = max_missed
+        self.stale_after = stale_after
+        self.reopen_after = reopen_after
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.metrics_interval = metrics_interval
+        self.on_degraded = on_degraded
+        self.on_restored = on_restored
+        self.on_reset = on_reset
+        self.running = True
+
+        now = self.clock.time()
+        self.state = OK
+        self.reason = None
+        self.state_since = now
+        self.last_reading = now  # Grace period for the first reading
+        self.last_ping = None
+        self.ping_sent_at = None  # Set while a PING is unanswered
+        self.missed = 0
+        self.awaiting_contact = False  # Reopened, Arduino not heard from yet
+        self.backoff = backoff_initial
+        self.next_attempt = now
+        self.reopen_at = None  # When a degraded but open link gets reopened
+        self.last_metrics = now
+        self.rtts = deque(maxlen=64)
+
+        # Statistics
+        self.pings = 0
+        self.pongs = 0
+        self.resets = 0   # ARDUINO:READY received, i.e. the board restarted
+        self.reconnects = 0
+        self.reconnect_failures = 0
+        self.degraded_time = 0.0
+
+        serial.subscribe(DIST, self._on_reading)
+        serial.subscribe(PONG, self._on_pong)
+        serial.subscribe(READY, self._on_ready)
+
+    async def run_async(self):
+        """Supervise the link as a task on the AsyncRuntime"""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            now = self.clock.time()
+            if self._update(now):
+                # Reopening joins the old read thread; keep that off the loop
+                connected = await loop.run_in_executor(None, self._reconnect)
+                # Opening the port can take seconds; time the backoff from after it
+                self._reopened(self.clock.time(), connected)
+            await self.clock.sleep_async(self.interval)
+
+    def stop(self):
+        self.running = False
+
+    def check(self):
+        """One supervision pass; a due reopen runs on the calling thread"""
+        now = self.clock.time()
+        if self._update(now):
+            connected = self._reconnect()
+            self._reopened(self.clock.time(), connected)
+
+    def stats(self):
+        now = self.clock.time()
+        degraded_time = self.degraded_time + (now - self.state_since if self.state != OK else 0.0)
+        samples = sorted(self.rtts)
+        return {
+            "state": self.state,
+            "reason": self.reason,
+            "pings": self.pings,
+            "pongs": self.pongs,
+            "missed": self.missed,
+            "rtt_ms": round(samples[len(samples) // 2] * 1000, 1) if samples else None,
+            "rtt_max_ms": round(samples[-1] * 1000, 1) if samples else None,
+            "reading_age": round(now - self.last_reading, 2),
+            "resets": self.resets,
+            "reconnects": self.reconnects,
+            "reconnect_failures": self.reconnect_failures,
+            "degraded_time": round(degraded_time, 2),
+        }
+
+    def _update(self, now):
+        """Update the link state; True if the port should be reopened"""
+        reopen = False
+        if not self.serial.connected:
+            self._set_state(DISCONNECTED, "port closed", now)
+            reopen = now >= self.next_attempt
+        else:
+            self._ping(now)
+            if self.missed >= self.max_missed:
+                self._set_state(DEGRADED, f"{self.missed} PINGs unanswered", now)
+            elif now - self.last_reading > self.stale_after:
+                self._set_state(DEGRADED, f"no reading for {now - self.last_reading:.1f}s", now)
+            elif self.awaiting_contact:
+                self._set_state(DEGRADED, "waiting for Arduino", now)
+            else:
+                self._set_state(OK, None, now)
+            
+            reopen = self.state == DEGRADED and now >= self.reopen_at
+
+        if now - self.last_metrics >= self.metrics_interval:
+            self._publish_metrics(now)
+        return reopen
+
+    def _ping(self, now):
+        if self.ping_sent_at is not None:
+            if now - self.ping_sent_at < self.pong_timeout:
+                return
+            self.missed += 1
+            self.ping_sent_at = None
+        if self.last_ping is None or now - self.last_ping >= self.ping_interval:
+            self.last_ping = now
+            self.ping_sent_at = now
+            self.pings += 1
+            self.serial.send_command("PING")
+
+    def _reconnect(self):
+        print(f"[SERIAL] Reconnecting to {self.serial.port}...")
+        return self.serial.reconnect()
+
+    def _reopened(self, now, connected):
+        if connected:
+            self.reconnects += 1
+            # Wait for the Arduino to speak before trusting the link again
+            self.awaiting_contact = True
+            self.last_reading = now
+            self.ping_sent_at = None
+            self.last_ping = None
+            self.missed = 0
+            self._set_state(DEGRADED, "waiting for Arduino", now)
+        else:
+            self.reconnect_failures += 1
+        # Reset once the link is back to OK; a silent board backs off too
+        self.next_attempt = now + self.backoff
+        self.reopen_at = max(now + self.reopen_after, self.next_attempt)
+        self.backoff = min(self.backoff * 2, self.backoff_max)
+
+    def _set_state(self, state, reason, now):
+        if state == self.state:
+            self.reason = reason
+            return
+        previous = self.state
+        if previous != OK:
+            self.degraded_time += now - self.state_since
+        self.state = state
+        self.reason = reason
+        self.state_since = now
+        if state == DEGRADED:
+            self.reopen_at = now + self.reopen_after
+
+        if state == OK:
+            print("[SERIAL] Link restored")
+            self.backoff = self.backoff_initial
+            if self.on_restored:
+                self.on_restored()
+        elif previous == OK:
+            print(f"[SERIAL] Link {state}: {reason}")
+            if self.on_degraded:
+                self.on_degraded(reason)
+        self._publish_metrics(now)
+
+    def _publish_metrics(self, now):
+        self.last_metrics = now
+        stats = self.stats()
+        self.serial.dispatcher.publish(Message(LINK, (stats,), f"LINK:{stats['state']}", now))
+
+    # Called on the serial read thread
+    def _on_reading(self, message):
+        self.last_reading = self.clock.time()
+        self.awaiting_contact = False
+
+    def _on_pong(self, message):
+        self.awaiting_contact = False
+        if self.ping_sent_at is not None:
+            self.rtts.append(self.clock.time() - self.ping_sent_at)
+            self.ping_sent_at = None
+        self.pongs += 1
+        self.missed = 0
+
+    def _on_ready(self, message):
+        self.resets += 1
+        self.awaiting_contact = False
+        if self.on_reset:
+            self.on_reset()
@@ -0,0 +1,191 @@
+import threading
+from collections import deque, namedtuple
+
+from raspberry_pi.runtime.clock import SystemClock
+from raspberry_pi.communication.binary_protocol import (
+    describe, MSG_DIST, MSG_SCAN, MSG_SCAN_END, MSG_BATTERY, MSG_ACK,
+    MSG_PONG, MSG_ERROR, MSG_READY, MSG_DONE
+)
+
+# Message types, named after the text protocol prefix
+DIST = "DIST"          # (distance_cm,)
+SCAN = "SCAN"          # (angle, distance_cm)
+SCAN_END = "SCAN_END"  # ()
+BAT = "BAT"            # (percent,)
+ACK = "ACK"            # (command,) or (command, seq)
+PONG = "PONG"          # () or (token,)
+ERR = "ERR"            # (reason, ...) as strings
+DONE = "DONE"          # (command,) a timed move finished
+READY = "ARDUINO:READY"
+PROTO = "PROTO"        # Protocol negotiation replies
+LINK = "LINK"          # (stats,) link quality from the LinkSupervisor
+ALL = "*"              # Subscribe to every message type
+
+MESSAGE_TYPES = (DIST, SCAN, SCAN_END, BAT, ACK, PONG, ERR, DONE, READY, PROTO)
+
+# Fields that are numbers, parsed once here so subscribers don't have to
+INT_FIELDS = {DIST: 1, SCAN: 2, BAT: 1, PONG: 1}
+
+# Ring buffer drop policies
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+# Binary frame type -> message type; their fields are already numbers
+FRAME_TYPES = {MSG_DIST: DIST, MSG_SCAN: SCAN, MSG_SCAN_END: SCAN_END, MSG_BATTERY: BAT,
+               MSG_ACK: ACK, MSG_PONG: PONG, MSG_ERROR: ERR, MSG_READY: READY,
+               MSG_DONE: DONE}
+
+Message = namedtuple("Message", ["type", "values", "line", "time"])
+
+class MessageBuffer:
+    """Bounded per-subscriber ring buffer
+
+    When full, DROP_OLDEST discards the oldest message to make room (readers
+    get the freshest data) and DROP_NEWEST discards the incoming one (readers
+    get an unbroken prefix). Either way dropped counts what was lost.
+    """
+
+    def __init__(self, maxlen=64, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.maxlen = maxlen
+        self.policy = policy
+        self.messages = deque()
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, message):
+        with self.lock:
+            if len(self.messages) >= self.maxlen:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self.messages.popleft()
+            self.messages.append(message)
+
+    def get(self):
+        """Oldest buffered message, or None"""
+        with self.lock:
+            return self.messages.popleft() if self.messages else None
+
+    def drain(self):
+        """Every buffered message, oldest first"""
+        with self.lock:
+            messages = list(self.messages)
+            self.messages.clear()
+        return messages
+
+    def __len__(self):
+        return len(self.messages)
+
+class MessageDispatcher:
+    """Parses incoming lines once and fans them out by message type
+
+    Components either subscribe(types, callback), which runs on the serial
+    read thread as each message arrives, or take a buffer(types), a bounded
+    MessageBuffer they drain in their own time. The latest message of every
+    type is kept for anyone who only needs the current value.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+        self.callbacks = {}  # type -> [callback]
+        self.buffers = {}    # type -> [MessageBuffer]
+        self.latest_messages = {}
+
+        # Statistics
+        self.counts = {}
+        self.parse_errors = 0
+        self.callback_errors = 0
+
+    def subscribe(self, types, callback):
+        """Call callback(message) for every message of the given type(s), or ALL"""
+        for msg_type in self._types(types):
+            self.callbacks.setdefault(msg_type, []).append(callback)
+
+    def unsubscribe(self, callback):
+        for callbacks in self.callbacks.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def buffer(self, types, maxlen=64, policy=DROP_OLDEST):
+        """A new ring buffer that receives every message of the given type(s)"""
+        ring = MessageBuffer(maxlen, policy)
+        for msg_type in self._types(types):
+            self.buffers.setdefault(msg_type, []).append(ring)
+        return ring
+
+    def latest(self, msg_type):
+        """Most recent message of a type, or None if none arrived yet"""
+        return self.latest_messages.get(msg_type)
+
+    def parse(self, line):
+        """Turn a text protocol line into a Message, or None if malformed"""
+        if line == READY:
+            return Message(READY, (), line, self.clock.time())
+        if line == "SCAN:END":
+            return Message(SCAN_END, (), line, self.clock.time())
+
+        msg_type, _, rest = line.partition(":")
+        # ERR keeps its detail (which may contain colons) as one field
+        values = tuple(rest.split(":", 1 if msg_type == ERR else -1)) if rest else ()
+        count = INT_FIELDS.get(msg_type)
+        if count is not None:
+            try:
+                values = tuple(int(value) for value in values[:count])
+            except ValueError:
+                self.parse_errors += 1
+                return None
+            if len(values) < count and msg_type != PONG:
+                self.parse_errors += 1
+                return None
+        elif msg_type == ACK:
+            # Sequenced commands are acknowledged as ACK:<command>#<seq>
+            name, _, seq = rest.partition("#")
+            if seq and not seq.isdigit():
+                self.parse_errors += 1
+                return None
+            values = (name, int(seq)) if seq else (name,)
+        return Message(msg_type, values, line, self.clock.time())
+
+    def from_frame(self, msg_type, values):
+        """Message for a decoded binary frame, without going through text"""
+        line = describe(msg_type, values)
+        kind = FRAME_TYPES.get(msg_type)
+        if kind is None:
+            return Message(line.split(":", 1)[0], tuple(values), line, self.clock.time())
+        if kind in (ACK, ERR, DONE):
+            # Same shape as the text form: the command name
+            values = (line.split(":", 1)[1],)
+        return Message(kind, tuple(values), line, self.clock.time())
+
+    def publish(self, message):
+        """Deliver a message to its subscribers and buffers"""
+        msg_type = message.type
+        self.latest_messages[msg_type] = message
+        self.counts[msg_type] = self.counts.get(msg_type, 0) + 1
+
+        for ring in self.buffers.get(msg_type, []) + self.buffers.get(ALL, []):
+            ring.put(message)
+        for callback in self.callbacks.get(msg_type, []) + self.callbacks.get(ALL, []):
+            try:
+                callback(message)
+            except Exception as e:
+                self.callback_errors += 1
+                print(f"[SERIAL] {msg_type} subscriber error: {e}")
+
+    def stats(self):
+        dropped = sum(ring.dropped for ring in self._all_buffers())
+        return {"messages": dict(self.counts), "parse_errors": self.parse_errors,
+                "callback_errors": self.callback_errors, "dropped": dropped}
+
+    def _all_buffers(self):
+        seen = {}
+        for rings in self.buffers.values():
+            for ring in rings:
+                seen[id(ring)] = ring
+        return seen.values()
+
+    @staticmethod
+    def _types(types):
+        return (types,) if isinstance(types, str) else tuple(types)
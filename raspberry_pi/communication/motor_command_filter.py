@@ -0,0 +1,144 @@
+import threading
+
+from raspberry_pi.runtime.clock import SystemClock
+
+class MotorCommandFilter:
+    """Drops redundant motor commands before they reach the serial link
+
+    Wraps any motor interface (move_forward, move_backward, turn_left,
+    turn_right, stop) and forwards a command only when it would change what
+    the motors are doing:
+
+    - duplicates of the last command sent are suppressed, compared on the
+      wire command when the motors provide command_for(action, speed)
+    - between hold() and flush() only the last command wins, so a tick that
+      turns and then moves forward sends one command, not two
+    - at most max_rate commands per second go out; a command arriving too
+      soon is kept and sent by the next flush(). stop() is never delayed.
+
+    Timed moves (run_timed, offered when the motors have it) are never
+    duplicates. The motors stop by themselves when one ends, so a stop after
+    its deadline is a duplicate while any other command is sent.
+    """
+
+    def __init__(self, motors, max_rate=20.0, clock=None):
+        self.motors = motors
+        self.clock = clock or SystemClock()
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.lock = threading.Lock()
+
+        self.last_sent = None       # Wire key of the last command sent
+        self.last_send_time = None
+        self.timed_until = None     # When the timed move last sent ends
+        self.pending = None         # [action, speed, key, delayed, duration] not sent yet
+        self.holding = False        # True while a tick is being coalesced
+
+        # Statistics
+        self.sent = 0
+        self.suppressed = 0  # Same as what the motors are already doing
+        self.coalesced = 0   # Replaced by a later command before being sent
+        self.delayed = 0     # Held back by the rate limit
+        
+        # Only offer timed moves if the motors can run them
+        if hasattr(motors, "run_timed"):
+            self.run_timed = self._run_timed
+
+    def move_forward(self, speed=1.0):
+        self._command("move_forward", speed)
+
+    def move_backward(self, speed=1.0):
+        self._command("move_backward", speed)
+
+    def turn_left(self, speed=1.0):
+        self._command("turn_left", speed)
+
+    def turn_right(self, speed=1.0):
+        self._command("turn_right", speed)
+
+    def stop(self):
+        self._command("stop", None)
+
+    def _run_timed(self, action, speed, duration):
+        self._command(action, speed, duration)
+
+    def hold(self):
+        """Start a tick: until flush() only the last command counts"""
+        with self.lock:
+            self.holding = True
+
+    def flush(self):
+        """End the tick and send the command it settled on, if still needed"""
+        with self.lock:
+            self.holding = False
+            self._drain()
+
+    def reset(self):
+        """Forget what was last sent, e.g. after the link reconnects"""
+        with self.lock:
+            self.last_sent = None
+            self.last_send_time = None
+            self.timed_until = None
+
+    def stats(self):
+        """Counts of sent versus filtered commands"""
+        requested = self.sent + self.suppressed + self.coalesced
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "coalesced": self.coalesced,
+            "delayed": self.delayed,
+            "filtered_ratio": round(1 - self.sent / requested, 3) if requested else 0.0,
+        }
+
+    def _command(self, action, speed, duration=None):
+        key = self._key(action, speed)
+        with self.lock:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = [action, speed, key, False, duration]
+            if not self.holding:
+                self._drain()
+
+    def _drain(self):
+        if self.pending is None:
+            return
+        action, speed, key, delayed, duration = self.pending
+
+        now = self.clock.time()
+        if self.timed_until is not None and now >= self.timed_until:
+            # The timed move is over and the motors have stopped
+            self.timed_until = None
+            self.last_sent = self._key("stop", None)
+
+        if duration is None and key == self.last_sent:
+            self.pending = None
+            self.suppressed += 1
+            return
+
+        if (action != "stop" and self.last_send_time is not None and
+                now - self.last_send_time < self.min_interval):
+            if not delayed:
+                self.pending[3] = True
+                self.delayed += 1
+            return
+
+        self.pending = None
+        self.last_sent = key if duration is None else None
+        self.timed_until = now + duration if duration is not None else None
+        self.last_send_time = now
+        self.sent += 1
+
+        if duration is not None:
+            self.motors.run_timed(action, speed, duration)
+            return
+        method = getattr(self.motors, action)
+        if speed is None:
+            method()
+        else:
+            method(speed)
+
+    def _key(self, action, speed):
+        command_for = getattr(self.motors, "command_for", None)
+        if command_for:
+            return command_for(action, speed)
+        return (action, speed)
@@ -1,27 +1,103 @@
 import serial
 import threading
 import time
-import queue
+
+from raspberry_pi.communication.binary_protocol import (
+    FrameDecoder, encode_command, PROTO_REQUEST, PROTO_ACCEPT
+)
+from raspberry_pi.communication.message_dispatcher import MessageDispatcher, DIST
+
+class LineFramer:
+    """Splits a byte stream into text lines using one reusable buffer
+
+    feed() appends whatever the port returned; pop_line() hands out complete
+    lines one at a time, so the caller can stop part way (for example when
+    the protocol switches) and take_remaining() the bytes after it. Lines
+    that aren't valid UTF-8, or runs of max_line bytes without a newline,
+    are counted and skipped instead of raising.
+    """
+    
+    def __init__(self, max_line=256):
+        self.max_line = max_line
+        self.buffer = bytearray()
+        self.start = 0
+        
+        # Statistics
+        self.lines = 0
+        self.decode_errors = 0
+        self.overflows = 0
+    
+    def feed(self, data):
+        self.buffer.extend(data)
+    
+    def pop_line(self):
+        """Next complete line without its line ending, or None"""
+        buffer = self.buffer
+        while True:
+            end = buffer.find(b"\n", self.start)
+            if end < 0:
+                # Keep the partial line, drop what was already handed out
+                if self.start:
+                    del buffer[:self.start]
+                    self.start = 0
+                if len(buffer) > self.max_line:
+                    self.overflows += 1
+                    buffer.clear()
+                return None
+            
+            raw = buffer[self.start:end]
+            self.start = end + 1
+            try:
+                line = raw.decode('utf-8').strip()
+            except UnicodeDecodeError:
+                self.decode_errors += 1
+                continue
+            if line:
+                self.lines += 1
+                return line
+    
+    def take_remaining(self):
+        """Bytes after the last line handed out; empties the framer"""
+        rest = bytes(self.buffer[self.start:])
+        self.buffer.clear()
+        self.start = 0
+        return rest
 
 class SerialHandler:
-    def __init__(self, port='/dev/ttyUSB0', baud_rate=9600, simulation=True):
+    def __init__(self, port='/dev/ttyUSB0', baud_rate=9600, simulation=True, protocol="auto"):
         self.port = port
         self.baud_rate = baud_rate
         self.simulation = simulation
+        
+        # "auto" asks the firmware for binary frames and stays on text lines
+        # if it doesn't answer; "text" never asks
+        self.protocol = protocol
+        self.binary = False
+        self.decoder = FrameDecoder()
+        self.framer = LineFramer()
         self.running = True
         self.connected = False
         self.ser = None
         
-        # Queue to store received data
-        self.receive_queue = queue.Queue()
+        # Parsed messages are fanned out by type; see subscribe()
+        self.dispatcher = MessageDispatcher()
         
         # Last sensor readings
         self.last_distance = 100  # Default value (cm)
+        self.last_distance_time = None  # When it arrived
+        
+        # Callbacks run on the read thread for every raw line
+        self.line_listeners = []
+        
+        # Link statistics
+        self.bytes_received = 0
+        self.read_errors = 0
         
         # Connect to serial
         self.connect()
         
     def connect(self):
+        """Open the port and start reading; True if connected"""
         if self.simulation:
             print(f"[SERIAL] Simulating connection to {self.port}")
             self.connected = True
@@ -32,7 +108,8 @@ class SerialHandler:
             self.read_thread.start()
         else:
             try:
-                self.ser = serial.Serial(self.port, self.baud_rate, timeout=1)
+                # Short timeout: the reader blocks in read() instead of sleeping
+                self.ser = serial.Serial(self.port, self.baud_rate, timeout=0.1)
                 self.connected = True
                 print(f"[SERIAL] Connected to {self.port}")
                 
@@ -40,21 +117,78 @@ class SerialHandler:
                 self.read_thread = threading.Thread(target=self._read_loop)
                 self.read_thread.daemon = True
                 self.read_thread.start()
+                
+                # Boards that don't reset on open won't say READY, so ask now too
+                self._request_binary()
             except Exception as e:
                 print(f"[SERIAL] Failed to connect: {e}")
+        return self.connected
+    
+    def reconnect(self):
+        """Close the port and open it again with fresh framing state"""
+        if self.simulation:
+            return self.connected
+        
+        self.connected = False
+        if self.ser:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+            self.ser = None
+        # The old reader notices within one read timeout
+        old_thread = getattr(self, 'read_thread', None)
+        if old_thread and old_thread.is_alive() and old_thread is not threading.current_thread():
+            old_thread.join(timeout=0.5)
+        
+        self.framer = LineFramer()
+        self.decoder = FrameDecoder()
+        self.binary = False
+        self.running = True
+        return self.connect()
     
     def _read_loop(self):
         """Read incoming data from Arduino"""
-        while self.running and self.connected and not self.simulation:
+        port = self.ser
+        while self.running and self.connected and not self.simulation and self.ser is port:
             try:
-                if self.ser and self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8').strip()
-                    self._process_data(line)
+                # Blocks until at least one byte arrives or the port times
+                # out, then takes everything already buffered in one call
+                data = port.read(port.in_waiting or 1)
             except Exception as e:
-                print(f"[SERIAL] Read error: {e}")
-                self.connected = False
+                if self.ser is port and self.running:  # Not just disconnect() closing it
+                    print(f"[SERIAL] Read error: {e}")
+                    self.read_errors += 1
+                    self.connected = False
                 break
-            time.sleep(0.01)
+            if data:
+                self._receive(data)
+    
+    def _receive(self, data):
+        """Frame and dispatch a chunk of bytes from the port"""
+        self.bytes_received += len(data)
+        while data:
+            if self.binary:
+                for msg_type, values in self.decoder.feed(data):
+                    self._process_message(msg_type, values)
+                data = b""
+                if b"ARDUINO:READY" in self.decoder.buffer:
+                    # The board reset and is talking text again
+                    print("[SERIAL] Firmware restarted, renegotiating protocol")
+                    data = bytes(self.decoder.buffer)
+                    self.decoder.buffer.clear()
+                    self.binary = False
+            else:
+                self.framer.feed(data)
+                data = b""
+                while not self.binary:
+                    line = self.framer.pop_line()
+                    if line is None:
+                        break
+                    self._process_data(line)
+                if self.binary:
+                    # Whatever followed the switch is already framed
+                    data = self.framer.take_remaining()
     
     def _simulated_read_loop(self):
         """Simulate incoming data from Arduino"""
@@ -67,14 +201,82 @@ class SerialHandler:
     
     def _process_data(self, data):
         """Process incoming data"""
-        if data.startswith("DIST:"):
-            try:
-                self.last_distance = int(data.split(':')[1])
-            except ValueError:
-                pass
+        self._notify_line(data)
         
-        # Queue the data for any listeners
-        self.receive_queue.put(data)
+        if data == PROTO_ACCEPT:
+            self._enable_binary()
+        elif data == "ARDUINO:READY":
+            # The board just reset, so it's back on text
+            self._request_binary()
+        
+        message = self.dispatcher.parse(data)
+        if message is not None:
+            self._dispatch(message)
+    
+    def _process_message(self, msg_type, values):
+        """Process a binary frame; listeners see the equivalent text line"""
+        message = self.dispatcher.from_frame(msg_type, values)
+        self._notify_line(message.line)
+        self._dispatch(message)
+    
+    def _notify_line(self, line):
+        for callback in list(self.line_listeners):
+            try:
+                callback(line)
+            except Exception as e:
+                print(f"[SERIAL] Line listener error: {e}")
+    
+    def _dispatch(self, message):
+        if message.type == DIST:
+            self.last_distance = message.values[0]
+            self.last_distance_time = message.time
+        self.dispatcher.publish(message)
+    
+    def _request_binary(self):
+        """Ask the firmware to switch to binary frames"""
+        if self.protocol == "auto" and not self.simulation:
+            self.binary = False
+            self._write(f"{PROTO_REQUEST}\n".encode('utf-8'))
+    
+    def _enable_binary(self):
+        print("[SERIAL] Firmware accepted binary protocol")
+        self.decoder = FrameDecoder()
+        self.binary = True
+        # A lone delimiter ends any half-received text as an invalid frame
+        self._write(b"\x00")
+    
+    def protocol_stats(self):
+        """Which protocol the link uses and how clean it has been"""
+        decoder = self.decoder.stats()
+        return {
+            "protocol": "binary" if self.binary else "text",
+            "bytes": self.bytes_received,
+            "frames": self.framer.lines + decoder["frames"],
+            "parse_errors": (self.dispatcher.parse_errors + self.framer.decode_errors + self.framer.overflows +
+                             decoder["crc_errors"] + decoder["framing_errors"]),
+            "read_errors": self.read_errors,
+            "dropped": self.dispatcher.stats()["dropped"],
+        }
+    
+    def subscribe(self, types, callback):
+        """Call callback(message) on the read thread for each message of the given type(s)"""
+        self.dispatcher.subscribe(types, callback)
+    
+    def buffer(self, types, maxlen=64, policy="drop_oldest"):
+        """A bounded ring buffer of messages of the given type(s) to drain later"""
+        return self.dispatcher.buffer(types, maxlen, policy)
+    
+    def latest(self, msg_type):
+        """Most recent message of a type, or None"""
+        return self.dispatcher.latest(msg_type)
+    
+    def subscribe_distance(self, callback):
+        """Call callback(distance) as soon as each DIST reading is received"""
+        self.dispatcher.subscribe(DIST, lambda message: callback(message.values[0]))
+    
+    def subscribe_lines(self, callback):
+        """Call callback(line) for every line received, before it is parsed"""
+        self.line_listeners.append(callback)
     
     def send_command(self, command):
         """Send command to Arduino"""
@@ -84,28 +286,47 @@ class SerialHandler:
         
         if self.simulation:
             print(f"[SERIAL] Simulating sending: {command}")
-            # Simulate acknowledgment
-            self.receive_queue.put(f"ACK:{command}")
+            # Answer like the firmware: PONG, or the command name plus any #seq
+            text, _, seq = command.partition("#")
+            name = text.split(':', 1)[0]
+            reply = "PONG" if name == "PING" else f"ACK:{name}" + (f"#{seq}" if seq else "")
+            self._dispatch(self.dispatcher.parse(reply))
+            fields = text.split(':')
+            if len(fields) == 3 and name != "STP":
+                # A timed move reports DONE when it ends
+                done = self.dispatcher.parse(f"DONE:{name}")
+                timer = threading.Timer(int(fields[2]) / 1000.0, self._dispatch, (done,))
+                timer.daemon = True
+                timer.start()
             return True
         else:
-            try:
-                self.ser.write(f"{command}\n".encode('utf-8'))
-                return True
-            except Exception as e:
-                print(f"[SERIAL] Send error: {e}")
-                self.connected = False
-                return False
+            if self.binary:
+                data = encode_command(command)
+                if data is None:
+                    print(f"[SERIAL] No binary encoding for: {command}")
+                    return False
+            else:
+                data = f"{command}\n".encode('utf-8')
+            return self._write(data)
+    
+    def _write(self, data):
+        try:
+            self.ser.write(data)
+            return True
+        except Exception as e:
+            print(f"[SERIAL] Send error: {e}")
+            self.connected = False
+            return False
     
     def get_distance(self):
         """Get last measured distance"""
         return self.last_distance
     
-    def get_next_message(self, block=False, timeout=None):
-        """Get next message from the queue"""
-        try:
-            return self.receive_queue.get(block=block, timeout=timeout)
-        except queue.Empty:
-            return None
+    def reading_age(self):
+        """Seconds since the last distance reading arrived (inf if none yet)"""
+        if self.last_distance_time is None:
+            return float("inf")
+        return self.dispatcher.clock.time() - self.last_distance_time
     
     def disconnect(self):
         """Close the serial connection"""
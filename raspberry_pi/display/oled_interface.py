@@ -1,6 +1,7 @@
-import time
 import threading
 
+from raspberry_pi.runtime.clock import SystemClock
+
 # Simulated imports (would be real on hardware)
 # from luma.core.interface.serial import i2c
 # from luma.core.render import canvas
@@ -8,10 +9,11 @@ import threading
 # from PIL import Image, ImageDraw, ImageFont
 
 class OLEDDisplay:
-    def __init__(self, width=128, height=64, simulation=True):
+    def __init__(self, width=128, height=64, simulation=True, clock=None, threaded=True):
         self.width = width
         self.height = height
         self.simulation = simulation
+        self.clock = clock or SystemClock()  # Real or simulated time source
         self.current_emotion = "neutral"
         self.status_message = "Online"
         self.running = True
@@ -19,7 +21,7 @@ class OLEDDisplay:
         # Animation properties
         self.animation_frame = 0  # Current frame in animation sequence
         self.animation_speed = 5  # Frames per second
-        self.last_frame_time = time.time()
+        self.last_frame_time = self.clock.time()
         self.animation_frames = {}  # Will store frames for each emotion
         
         # Initialize animation frames for different emotions
@@ -35,10 +37,12 @@ class OLEDDisplay:
             # For simulation, we'll just print to console
             print("OLED Display Initialized (Simulation Mode)")
         
-        # Start the display update thread
-        self.update_thread = threading.Thread(target=self._update_loop)
-        self.update_thread.daemon = True
-        self.update_thread.start()
+        # Start the display update thread, unless run_async() will be
+        # scheduled on an AsyncRuntime instead
+        if threaded:
+            self.update_thread = threading.Thread(target=self._update_loop)
+            self.update_thread.daemon = True
+            self.update_thread.start()
     
     def _init_animation_frames(self):
         """Initialize animation sequences for each emotion"""
@@ -142,11 +146,18 @@ class OLEDDisplay:
         while self.running:
             self.update_display()
             self._update_animation_frame()
-            time.sleep(1.0 / self.animation_speed)  # Update at animation speed rate
+            self.clock.sleep(1.0 / self.animation_speed)  # Update at animation speed rate
+    
+    async def run_async(self):
+        """Display updates as a task on the AsyncRuntime"""
+        while self.running:
+            self.update_display()
+            self._update_animation_frame()
+            await self.clock.sleep_async(1.0 / self.animation_speed)
     
     def _update_animation_frame(self):
         """Update the current animation frame based on timer"""
-        current_time = time.time()
+        current_time = self.clock.time()
         if current_time - self.last_frame_time >= (1.0 / self.animation_speed):
             # Get frames for current emotion
             frames = self.animation_frames.get(
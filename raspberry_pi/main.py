@@ -2,10 +2,10 @@ import time
 import signal
 import sys
 import os
-import threading
 import argparse
 import atexit
 import random
+import contextlib
 
 # Add project root to Python path for proper importing
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,8 +13,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import components
 from raspberry_pi.display.oled_interface import OLEDDisplay
 from raspberry_pi.communication.serial_handler import SerialHandler
-from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
-from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+from raspberry_pi.communication.command_pipeline import CommandPipeline
+from raspberry_pi.communication.link_supervisor import LinkSupervisor
+from raspberry_pi.communication.motor_command_filter import MotorCommandFilter
+from raspberry_pi.runtime.clock import SystemClock, VirtualClock, parse_speed
+from raspberry_pi.runtime.async_runtime import AsyncRuntime
+from raspberry_pi.runtime.tick_profiler import TickProfiler
+from raspberry_pi.behavior.robot_personality import Emotion
+from raspberry_pi.behavior.pet_behaviors import create_pet, component_rng
+from raspberry_pi.behavior.scan_aggregator import ScanAggregator
+from raspberry_pi.runtime.flight_recorder import FlightRecorder, SESSION, TICK, SERIAL, LINK
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.memory.profile_store import ProfileStore
 from simulation.virtual_sensors import UltrasonicSensor
 from simulation.virtual_motors import MotorController
 
@@ -42,15 +52,38 @@ from simulation.arcade_simulator import ArcadeSimulator
 import arcade
 
 class PetRobot:
-    def __init__(self, simulation_mode=True, gui_mode=True, simple_audio=False):
+    def __init__(self, simulation_mode=True, gui_mode=True, simple_audio=False, clock=None,
+                 profile_interval=None, seed=None, record_path=None, new_pet=False):
         print("Initializing Pet Robot...")
         self.simulation_mode = simulation_mode
         self.gui_mode = gui_mode
         self.running = True
         self.simulator_instance = None
+        self.motor_filter = None
+        self.commands = None
+        self.link = None
+        self.scanner = None
+        
+        # Shared time source - a VirtualClock lets headless runs go faster than real time
+        self.clock = clock or SystemClock()
+        
+        # Every random decision derives from this seed so sessions can be replayed
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 32)
+        
+        # Flight recorder: logs every input and decision when --record is given
+        self.recorder = FlightRecorder(record_path, self.clock) if record_path else None
+        decision_clock = self.recorder.clock if self.recorder else self.clock
+        
+        # Per-stage timing of the control loop; summaries only when requested
+        self.update_interval = 0.1  # seconds
+        self.profiler = TickProfiler(target_interval=self.update_interval,
+                                     summary_interval=profile_interval)
+        
+        # Every long-running component is a task on this one event loop
+        self.runtime = AsyncRuntime(clock=self.clock)
         
         # Initialize components
-        self.display = OLEDDisplay(simulation=simulation_mode)
+        self.display = OLEDDisplay(simulation=simulation_mode, clock=self.clock, threaded=False)
         self.display.set_status("Starting up...")
         
         # Initialize GUI if requested
@@ -62,7 +95,7 @@ class PetRobot:
             self.motors = self.simulator_instance.motors
         else:
             # No GUI - use simple simulated components
-            self.sensor = UltrasonicSensor()
+            self.sensor = UltrasonicSensor(clock=self.clock)
             self.motors = MotorController()
         
         # Initialize communication if not in pure simulation mode
@@ -70,29 +103,67 @@ class PetRobot:
             self.serial = SerialHandler(simulation=False)
             # Wire up the hardware interfaces through serial
             self.sensor = self._create_sensor_interface(self.serial)
-            self.motors = self._create_motor_interface(self.serial)
+            # Commands are sequenced and retransmitted until the Arduino ACKs them
+            self.commands = CommandPipeline(self.serial, clock=self.clock)
+            # Only changes in motor commands go over the link, at a bounded rate
+            self.motor_filter = MotorCommandFilter(self._create_motor_interface(self.commands),
+                                                   clock=self.clock)
+            self.motors = self.motor_filter
+            # Safe stop while the link is down, reconnect, then carry on
+            self.link = LinkSupervisor(self.serial, clock=self.clock,
+                                       on_degraded=self._on_link_degraded,
+                                       on_restored=self._on_link_restored,
+                                       on_reset=self.motor_filter.reset)
+            # Servo sweeps tell avoidance which way is open; they are decision inputs
+            link = self.recorder.wrap_link(self.serial) if self.recorder else self.serial
+            self.scanner = ScanAggregator(link, clock=decision_clock, commands=self.commands)
         
-        # Initialize personality with unique traits
-        self.personality = RobotPersonality(display=self.display)
+        if self.recorder:
+            self.sensor = self.recorder.wrap_sensor(self.sensor)
+            self.motors = self.recorder.wrap_motors(self.motors)
+            if hasattr(self, 'serial'):
+                self.serial.subscribe_lines(lambda line: self.recorder.record(SERIAL, line))
         
-        # Randomize personality traits to create a unique pet character
-        self._randomize_personality_traits()
+        # Long-term memory, including the pet's profile from its last run
+        self.memory = MemoryStore("robot_memory.db")
+        self.profile_store = ProfileStore(self.memory, clock=self.clock)
+        profile = None if new_pet else self.profile_store.load()
+        if new_pet:
+            self.profile_store.clear()
         
-        # Initialize state machine with references to personality and components
-        self.state_machine = RobotStateMachine(self.sensor, self.motors, self.personality)
+        # Personality with unique traits, state machine and random pet behaviors
+        session = {
+            "seed": self.seed,
+            "push_sensor": hasattr(self.sensor, "subscribe"),
+            "timed_motors": hasattr(self.motors, "run_timed"),
+            "scanner": self.scanner is not None,
+            "simulation": simulation_mode,
+            "profile": profile,
+        }
+        with self._decision(SESSION, session):
+            self.personality, self.state_machine, self.behaviors = create_pet(
+                self.sensor, self.motors, decision_clock, self.seed, display=self.display,
+                memory=self.memory, profile=profile, scanner=self.scanner)
+            if self.recorder:
+                self.recorder.watch(self.state_machine, self.personality)
+        print(f"Session seed: {self.seed}")
+        print("Welcome back!" if profile else "A new pet is born!")
         
         # Initialize audio and voice recognition components
         if audio_modules_available:
-            self.microphone = MicrophoneInterface(simulation=simulation_mode)
+            self.microphone = MicrophoneInterface(simulation=simulation_mode, clock=self.clock)
             self.voice_recognizer = VoiceRecognizer(
                 microphone=self.microphone, 
                 simulation=simulation_mode,
-                force_simple_mode=simple_audio
+                force_simple_mode=simple_audio,
+                clock=self.clock
             )
             self.command_processor = CommandProcessor(
                 voice_recognizer=self.voice_recognizer,
                 state_machine=self.state_machine,
-                personality=self.personality
+                personality=self.personality,
+                rng=component_rng(self.seed, "commands"),
+                recorder=self.recorder
             )
         else:
             print("Voice recognition disabled - required modules not available")
@@ -108,12 +179,6 @@ class PetRobot:
         # Main thread control
         self.main_thread = None
         
-        # Pet-specific variables
-        self.last_random_behavior = time.time()
-        self.random_behavior_interval = random.uniform(20, 60)  # Seconds between random behaviors
-        
-        # Show startup emotions
-        self.personality.set_emotion(Emotion.EXCITED)
         print(f"Pet robot initialized with personality: {self._get_personality_description()}")
     
     def _create_sensor_interface(self, serial):
@@ -125,43 +190,70 @@ class PetRobot:
             def measure_distance(self):
                 return self.serial.get_distance()
                 
+            def subscribe(self, callback):
+                # Readings are pushed from the serial read thread
+                self.serial.subscribe_distance(callback)
+                
         return SerialUltrasonicSensor(serial)
     
-    def _create_motor_interface(self, serial):
-        """Create a motor interface that works through serial connection"""
+    def _create_motor_interface(self, commands):
+        """Create a motor interface that works through the command pipeline"""
         class SerialMotorController:
-            def __init__(self, serial_handler):
-                self.serial = serial_handler
+            # Wire command for each motor action
+            codes = {
+                "move_forward": "FWD",
+                "move_backward": "BCK",
+                "turn_left": "LFT",
+                "turn_right": "RGT",
+                "stop": "STP",
+            }
+            
+            def __init__(self, commands):
+                self.commands = commands
+                
+            def command_for(self, action, speed=None, duration=None):
+                # FWD:<speed 0-255>, plus :<ms> for a move the Arduino times itself
+                command = self.codes[action]
+                if action == "stop" or speed is None:
+                    return command
+                command += f":{int(min(255, max(0, speed * 255)))}"
+                if duration:
+                    command += f":{max(1, min(0xFFFF, int(round(duration * 1000))))}"
+                return command
                 
             def move_forward(self, speed=1.0):
-                speed_val = int(min(255, max(0, speed * 255)))
-                self.serial.send_command(f"FWD")
+                self.commands.send(self.command_for("move_forward", speed))
                 
             def move_backward(self, speed=1.0):
-                speed_val = int(min(255, max(0, speed * 255)))
-                self.serial.send_command(f"BCK")
+                self.commands.send(self.command_for("move_backward", speed))
                 
             def turn_left(self, speed=1.0):
-                speed_val = int(min(255, max(0, speed * 255)))
-                self.serial.send_command(f"LFT")
+                self.commands.send(self.command_for("turn_left", speed))
                 
             def turn_right(self, speed=1.0):
-                speed_val = int(min(255, max(0, speed * 255)))
-                self.serial.send_command(f"RGT")
+                self.commands.send(self.command_for("turn_right", speed))
                 
             def stop(self):
-                self.serial.send_command("STP")
+                self.commands.send(self.command_for("stop"))
+                
+            def run_timed(self, action, speed, duration):
+                # One message; the Arduino stops the motors itself
+                self.commands.send(self.command_for(action, speed, duration))
                 
-        return SerialMotorController(serial)
+        return SerialMotorController(commands)
+    
+    def _on_link_degraded(self, reason):
+        """Don't drive on stale readings"""
+        if hasattr(self, 'state_machine'):
+            with self._decision(LINK, f"degraded:{reason}"):
+                self.state_machine.safe_stop(f"serial link {reason}")
     
-    def _randomize_personality_traits(self):
-        """Create a unique pet personality with randomized traits"""
-        # Create a unique personality for each run
-        self.personality.traits["openness"] = random.randint(3, 10)
-        self.personality.traits["friendliness"] = random.randint(5, 10)
-        self.personality.traits["activeness"] = random.randint(3, 10)
-        self.personality.traits["expressiveness"] = random.randint(4, 10)
-        self.personality.traits["patience"] = random.randint(2, 10)
+    def _on_link_restored(self):
+        # Whatever the Arduino was last told may be gone, so resend from scratch
+        self.motor_filter.reset()
+        if hasattr(self, 'state_machine'):
+            with self._decision(LINK, "restored"):
+                self.state_machine.resume()
     
     def _get_personality_description(self):
         """Get a text description of the robot's personality"""
@@ -192,45 +284,15 @@ class PetRobot:
         
         return ", ".join(description)
     
+    def _decision(self, kind, payload=b""):
+        """Context for handling an input: logged and serialized when recording"""
+        if self.recorder:
+            return self.recorder.input(kind, payload)
+        return contextlib.nullcontext()
+    
     def _check_for_random_behaviors(self):
         """Occasionally trigger random pet-like behaviors"""
-        current_time = time.time()
-        
-        # Check if it's time for a random behavior
-        if current_time - self.last_random_behavior > self.random_behavior_interval:
-            self.last_random_behavior = current_time
-            self.random_behavior_interval = random.uniform(15, 60)  # Vary time between behaviors
-            
-            # Choose a random behavior
-            behavior = random.choice([
-                "play_behavior",
-                "curious_behavior",
-                "sleep_behavior",
-                "attention_seeking"
-            ])
-            
-            # Execute the behavior
-            if behavior == "play_behavior" and random.random() < self.personality.traits["activeness"] / 10:
-                print("Pet robot feels playful!")
-                self.state_machine.transition_to(RobotState.PLAYING)
-            
-            elif behavior == "curious_behavior" and random.random() < self.personality.traits["openness"] / 10:
-                print("Pet robot is curious about something!")
-                self.state_machine.transition_to(RobotState.CURIOUS)
-            
-            elif behavior == "sleep_behavior" and random.random() < (10 - self.personality.traits["activeness"]) / 10:
-                print("Pet robot is feeling sleepy!")
-                self.state_machine.transition_to(RobotState.SLEEPING)
-            
-            elif behavior == "attention_seeking" and random.random() < self.personality.traits["expressiveness"] / 10:
-                print("Pet robot wants attention!")
-                # Make a small noise or movement to get attention
-                self.personality.set_emotion(random.choice([Emotion.EXCITED, Emotion.HAPPY]))
-                # Move back and forth a bit
-                if hasattr(self.state_machine, "current_state") and self.state_machine.current_state == RobotState.IDLE:
-                    self.motors.move_forward(0.3)
-                    time.sleep(0.2)
-                    self.motors.stop()
+        self.behaviors.check_for_random_behaviors()
     
     def start(self):
         """Start the robot's main loop"""
@@ -238,18 +300,21 @@ class PetRobot:
         self.display.set_status("Running")
         self.display.set_emotion(Emotion.HAPPY)
         
-        # Start audio and voice recognition
+        # Schedule display, audio and the control loop on the runtime
+        self.runtime.spawn("display", self.display.run_async())
         if audio_modules_available and self.microphone and self.voice_recognizer and self.command_processor:
-            self.microphone.start_listening()
-            self.voice_recognizer.start()
-            self.command_processor.start()
+            self.runtime.spawn("microphone", self.microphone.run_async())
+            self.runtime.spawn("voice_recognizer", self.voice_recognizer.run_async())
+            self.runtime.spawn("command_processor", self.command_processor.run_async())
+        if self.link:
+            self.runtime.spawn("link", self.link.run_async())
+        self.runtime.spawn("main_loop", self._main_loop(), driver=True)
         
-        # Start in a separate thread if using GUI
+        # Run the event loop in a separate thread if using GUI
         if self.gui_mode and self.simulation_mode:
             print("Starting in GUI mode with Arcade simulation...")
-            self.main_thread = threading.Thread(target=self._main_loop)
-            self.main_thread.daemon = True
-            self.main_thread.start()
+            self.runtime.start_in_thread()
+            self.main_thread = self.runtime.thread
             
             # Start the Arcade simulator main loop (this blocks until window is closed)
             print("Starting Arcade simulator...")
@@ -260,33 +325,54 @@ class PetRobot:
             print("Arcade window closed, shutting down...")
             self.shutdown()
         else:
-            # Run directly in this thread
-            self._main_loop()
+            # Run the event loop directly in this thread
+            self.runtime.run()
     
-    def _main_loop(self):
+    async def _main_loop(self):
         """Main control loop for the robot"""
-        update_interval = 0.1  # seconds
+        update_interval = self.update_interval
+        profiler = self.profiler
         
         try:
             while self.running:
-                start_time = time.time()
+                start_time = self.clock.time()
+                profiler.begin_tick()
                 
-                # Update the personality (random emotion changes, etc.)
-                if hasattr(self, 'personality'):
-                    self.personality.update()
+                # Coalesce this tick's motor commands into at most one
+                if self.motor_filter:
+                    self.motor_filter.hold()
                 
-                # Update the state machine
-                if hasattr(self, 'state_machine'):
-                    self.state_machine.update()
+                # One tick of decisions (same order as tools/replay_session.py)
+                with self._decision(TICK):
+                    # Update the personality (random emotion changes, etc.)
+                    with profiler.stage("personality"):
+                        self.personality.update()
+                    
+                    # Update the state machine
+                    with profiler.stage("state_machine"):
+                        self.state_machine.update()
+                    
+                    # Check for random pet-like behaviors
+                    with profiler.stage("random_behaviors"):
+                        self._check_for_random_behaviors()
+                
+                if self.motor_filter:
+                    with profiler.stage("motor_flush"):
+                        self.motor_filter.flush()
                 
-                # Check for random pet-like behaviors
-                self._check_for_random_behaviors()
+                # Resend commands the Arduino hasn't acknowledged
+                if self.commands:
+                    with profiler.stage("commands"):
+                        self.commands.poll()
+                
+                # Snapshot the pet now and then in case of a power cut
+                self.profile_store.maybe_save(self.personality, self.state_machine)
                 
                 # Get current state
                 if hasattr(self, 'state_machine') and hasattr(self, 'personality'):
                     state = self.state_machine.current_state
                     emotion = self.personality.get_emotion()
-                    distance = self.sensor.measure_distance()
+                    distance = self.state_machine.last_distance
                     
                     # Log status every few updates
                     if random.random() < 0.05:  # ~5% chance each update
@@ -294,12 +380,15 @@ class PetRobot:
                     
                     # Update the simulator if it exists
                     if self.simulator_instance:
-                        self.simulator_instance.set_state_and_emotion(state, emotion)
+                        with profiler.stage("simulator_sync"):
+                            self.simulator_instance.set_state_and_emotion(state, emotion)
+                
+                profiler.end_tick()
                 
-                # Sleep to maintain update rate
-                elapsed = time.time() - start_time
+                # Sleep to maintain update rate (other tasks run meanwhile)
+                elapsed = self.clock.time() - start_time
                 sleep_time = max(0, update_interval - elapsed)
-                time.sleep(sleep_time)
+                await self.clock.sleep_async(sleep_time)
                 
         except Exception as e:
             print(f"Error in main loop: {e}")
@@ -322,6 +411,10 @@ class PetRobot:
         print("Shutting down pet robot...")
         self.running = False
         
+        # Remember the pet as it is now, before it says goodbye
+        if hasattr(self, 'personality'):
+            self.profile_store.save(self.personality, self.state_machine)
+        
         # Set final emotion
         if hasattr(self, 'personality'):
             self.personality.set_emotion(Emotion.SAD)
@@ -352,8 +445,42 @@ class PetRobot:
             except Exception as e:
                 print(f"Error shutting down microphone: {e}")
                 
+        # Leave the final loop timings behind when profiling
+        if hasattr(self, 'profiler') and self.profiler.summary_interval:
+            self.profiler.report()
+        
+        if self.motor_filter:
+            print(f"[MOTORS] Command filter: {self.motor_filter.stats()}")
+        
+        if self.commands:
+            print(f"[SERIAL] Commands: {self.commands.stats()}")
+        
+        if self.link:
+            self.link.stop()
+            print(f"[SERIAL] Link health: {self.link.stats()}")
+        
+        if self.scanner:
+            print(f"[SERIAL] Scans: {self.scanner.stats()}")
+        
+        # Write out memories still queued for the database
+        if hasattr(self, 'personality'):
+            self.personality.close()
+            print(f"[MEMORY] {self.personality.memory.stats()}")
+        
+        if self.recorder:
+            self.recorder.close()
+            print(f"Session recorded to {self.recorder.path} (seed {self.seed})")
+        
+        # Cancel the display, audio and control loop tasks
+        if hasattr(self, 'runtime') and self.runtime:
+            self.runtime.stop()
+                
+        if hasattr(self, 'sensor') and hasattr(self.sensor, 'stop'):
+            self.sensor.stop()
+                
         if hasattr(self, 'serial') and self.serial:
             try:
+                print(f"[SERIAL] Link: {self.serial.protocol_stats()}")
                 self.serial.disconnect()
             except Exception as e:
                 print(f"Error disconnecting serial: {e}")
@@ -371,12 +498,38 @@ if __name__ == "__main__":
                         help="Run without GUI (console mode)")
     parser.add_argument("--simple-audio", action="store_true",
                         help="Use simplified audio processing (no advanced features)")
+    parser.add_argument("--speed", type=str, default=None,
+                        help="Run on simulated time, e.g. 1000x or max (requires --no-gui)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for every random decision (default: a fresh random seed)")
+    parser.add_argument("--record", type=str, default=None, metavar="PATH",
+                        help="Record the session to PATH for tools/replay_session.py")
+    parser.add_argument("--new-pet", action="store_true",
+                        help="Forget the saved pet and start with new random traits")
+    parser.add_argument("--profile", type=float, nargs="?", const=10.0, default=None,
+                        metavar="SECONDS",
+                        help="Print main loop timing every SECONDS (default 10) and write tick_profile.json in the project root")
     args = parser.parse_args()
     
+    # Simulated time only makes sense without the GUI and real hardware
+    clock = None
+    if args.speed:
+        if not args.no_gui or args.no_simulation:
+            parser.error("--speed requires --no-gui in simulation mode")
+        try:
+            clock = VirtualClock(speed=parse_speed(args.speed))
+        except ValueError as e:
+            parser.error(str(e))
+    
     # Create and start pet robot (globals so atexit can access)
     robot = PetRobot(
         simulation_mode=not args.no_simulation, 
         gui_mode=not args.no_gui,
-        simple_audio=args.simple_audio
+        simple_audio=args.simple_audio,
+        clock=clock,
+        profile_interval=args.profile,
+        seed=args.seed,
+        record_path=args.record,
+        new_pet=args.new_pet
     )
     robot.start()
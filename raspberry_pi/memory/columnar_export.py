@@ -0,0 +1,191 @@
+import ast
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+# Fixed-size .npy header (format 1.0) so the row count can be rewritten in
+# place as rows are appended
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_SIZE = 128
+MANIFEST = "manifest.json"
+
+INTERACTION_COLUMNS = {
+    "id": np.int64,
+    "timestamp": np.int64,         # Epoch seconds
+    "interaction_type": np.int16,  # Code in the interaction_type dictionary
+    "emotion": np.int16,           # Code in the emotion dictionary, -1 if none
+}
+LEARNING_COLUMNS = {
+    "id": np.int64,
+    "keyword": np.int32,
+    "response": np.int32,
+    "confidence": np.float32,
+    "times_used": np.int32,
+}
+DICTIONARIES = ("interaction_type", "emotion", "keyword", "response")
+
+class ColumnarExporter:
+    """Exports robot_memory.db to one memory-mappable .npy file per column
+
+    Layout of out_dir:
+        manifest.json            row counts, last exported id, dictionaries
+        interactions/<col>.npy   append-only, only rows newer than last run
+        learning/<col>.npy       rewritten each run (rows get updated)
+
+    Text columns become integer codes; manifest["dictionaries"][name][code]
+    is the text. Codes never change once assigned, so files from earlier
+    runs stay valid. Free-text details are not exported.
+    """
+
+    def __init__(self, db_path, out_dir, batch_size=10000):
+        self.db_path = db_path
+        self.out_dir = out_dir
+        self.batch_size = batch_size
+        self.manifest = load_manifest(out_dir) or {
+            "version": 1,
+            "interactions": {"rows": 0, "last_id": 0},
+            "learning": {"rows": 0},
+            "dictionaries": {name: [] for name in DICTIONARIES},
+        }
+        self._codes = {name: {value: code for code, value in enumerate(values)}
+                       for name, values in self.manifest["dictionaries"].items()}
+        self._hour_epochs = {}
+
+    def export(self):
+        """Append new interactions and rewrite learning; returns rows written"""
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            appended = self._export_interactions(conn)
+            learned = self._export_learning(conn)
+        finally:
+            conn.close()
+        self._write_manifest()
+        return {"interactions": appended, "learning": learned}
+
+    def _export_interactions(self, conn):
+        table = self.manifest["interactions"]
+        cursor = conn.execute(
+            "SELECT id, timestamp, interaction_type, emotion FROM interactions "
+            "WHERE id > ? ORDER BY id", (table["last_id"],))
+        appended = 0
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            ids, timestamps, types, emotions = zip(*rows)
+            columns = {
+                "id": ids,
+                "timestamp": [self._epoch(ts) for ts in timestamps],
+                "interaction_type": [self._code("interaction_type", t) for t in types],
+                "emotion": [self._code("emotion", e) for e in emotions],
+            }
+            for name, dtype in INTERACTION_COLUMNS.items():
+                append_npy(self._path("interactions", name), np.asarray(columns[name], dtype=dtype),
+                           table["rows"])
+            # Commit the batch only once every column holds it
+            table["rows"] += len(rows)
+            table["last_id"] = ids[-1]
+            appended += len(rows)
+        return appended
+
+    def _export_learning(self, conn):
+        rows = conn.execute(
+            "SELECT id, keyword, response, confidence, times_used FROM learning ORDER BY id").fetchall()
+        columns = list(zip(*rows)) if rows else [()] * len(LEARNING_COLUMNS)
+        values = {
+            "id": columns[0],
+            "keyword": [self._code("keyword", k) for k in columns[1]],
+            "response": [self._code("response", r) for r in columns[2]],
+            "confidence": columns[3],
+            "times_used": columns[4],
+        }
+        for name, dtype in LEARNING_COLUMNS.items():
+            append_npy(self._path("learning", name), np.asarray(values[name], dtype=dtype), 0)
+        self.manifest["learning"]["rows"] = len(rows)
+        return len(rows)
+
+    def _code(self, dictionary, value):
+        if value is None:
+            return -1
+        codes = self._codes[dictionary]
+        if value not in codes:
+            codes[value] = len(codes)
+            self.manifest["dictionaries"][dictionary].append(value)
+        return codes[value]
+
+    def _epoch(self, timestamp):
+        """Local-time text timestamp to epoch seconds, one mktime per hour"""
+        if not timestamp:
+            return 0
+        hour = timestamp[:13]
+        if hour not in self._hour_epochs:
+            self._hour_epochs[hour] = int(time.mktime(time.strptime(hour, "%Y-%m-%d %H")))
+        return self._hour_epochs[hour] + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+
+    def _path(self, table, column):
+        directory = os.path.join(self.out_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{column}.npy")
+
+    def _write_manifest(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, MANIFEST)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, path)
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_table(out_dir, table):
+    """{column: memory-mapped array} for an exported table
+
+    Only the rows the manifest counts are returned, so a run interrupted
+    half way never shows partial rows.
+    """
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No export in {out_dir}")
+    rows = manifest[table]["rows"]
+    columns = INTERACTION_COLUMNS if table == "interactions" else LEARNING_COLUMNS
+    return {name: np.load(os.path.join(out_dir, table, f"{name}.npy"), mmap_mode="r")[:rows]
+            for name in columns}
+
+def append_npy(path, values, start_row):
+    """Write values as rows start_row.. of a 1-D .npy file, creating it if needed
+
+    Anything past start_row (left by an interrupted run) is overwritten.
+    """
+    dtype = np.dtype(values.dtype)
+    mode = "r+b" if os.path.exists(path) else "w+b"
+    with open(path, mode) as f:
+        if mode == "r+b":
+            stored = _read_header(f)
+            if stored != dtype.str:
+                raise ValueError(f"{path} holds {stored}, not {dtype.str}")
+        f.seek(NPY_HEADER_SIZE + start_row * dtype.itemsize)
+        f.write(values.tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(_npy_header(dtype, start_row + len(values)))
+
+def _npy_header(dtype, rows):
+    header = repr({"descr": dtype.str, "fortran_order": False, "shape": (rows,)})
+    length = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2
+    return (NPY_MAGIC + length.to_bytes(2, "little") +
+            header.ljust(length - 1).encode("latin1") + b"\n")
+
+def _read_header(f):
+    f.seek(0)
+    header = f.read(NPY_HEADER_SIZE)
+    if not header.startswith(NPY_MAGIC):
+        raise ValueError("Not an exported .npy column")
+    return ast.literal_eval(header[len(NPY_MAGIC) + 2:].decode("latin1").strip())["descr"]
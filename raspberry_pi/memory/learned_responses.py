@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+# Single-statement learning: a new keyword starts at 0.5 confidence and each
+# repeat raises it by 0.1, up to 1.0
+UPSERT = '''
+    INSERT INTO learning (keyword, response, confidence, times_used) VALUES (?, ?, 0.5, 1)
+    ON CONFLICT(keyword) DO UPDATE SET
+        response = excluded.response,
+        confidence = MIN(confidence + 0.1, 1.0),
+        times_used = times_used + 1
+'''
+
+class LearnedResponses:
+    """LRU cache in front of the learning table
+
+    Lookups are answered from memory after the first one for a keyword
+    (unknown keywords are cached too). learn() updates the cached entry and
+    queues the upsert on the MemoryStore writer, so the cache is always at
+    least as new as the database. Learned entries are also kept in unwritten
+    until the writer has run their upsert, so a keyword evicted before then
+    is not read back stale, and a miss never has to wait for the writer.
+    """
+
+    def __init__(self, memory, capacity=256):
+        self.memory = memory
+        self.capacity = capacity
+        self.entries = OrderedDict()  # keyword -> (response, confidence) or None
+        self.unwritten = {}           # keyword -> (write number, entry) still queued
+        self.writes = 0
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, keyword):
+        """(response, confidence) for keyword, or None if it was never learned"""
+        with self.lock:
+            if keyword in self.entries:
+                self.entries.move_to_end(keyword)
+                self.hits += 1
+                return self.entries[keyword]
+            self.misses += 1
+            if keyword in self.unwritten:
+                # Evicted before the writer got to it
+                entry = self.unwritten[keyword][1]
+                self._store(keyword, entry)
+                return entry
+
+        row = self.memory.fetchone("SELECT response, confidence FROM learning WHERE keyword=?",
+                                   (keyword,))
+        entry = (row[0], row[1]) if row else None
+
+        with self.lock:
+            # A learn() while we were reading wins
+            if keyword not in self.entries:
+                self._store(keyword, entry)
+            return self.entries[keyword]
+
+    def learn(self, keyword, response):
+        """Write-through update of a keyword's response and confidence"""
+        entry = self.lookup(keyword)
+        with self.lock:
+            entry = self.entries.get(keyword, entry)
+            confidence = min(entry[1] + 0.1, 1.0) if entry else 0.5
+            self._store(keyword, (response, confidence))
+            self.writes += 1
+            self.unwritten[keyword] = (self.writes, (response, confidence))
+            write = self.writes
+        self.memory.call(lambda conn: self._write(conn, keyword, response, write))
+
+    def stats(self):
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+    def _write(self, conn, keyword, response, write):
+        # Runs on the memory writer
+        conn.execute(UPSERT, (keyword, response))
+        with self.lock:
+            if self.unwritten.get(keyword, (None,))[0] == write:
+                del self.unwritten[keyword]
+
+    def _store(self, keyword, entry):
+        self.entries[keyword] = entry
+        self.entries.move_to_end(keyword)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
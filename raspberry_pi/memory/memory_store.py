@@ -0,0 +1,207 @@
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+
+from raspberry_pi.runtime.async_runtime import BridgeQueue
+
+# AUTOINCREMENT so ids of pruned rows are never handed out again; the
+# columnar export picks up new rows by id
+INTERACTIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        interaction_type TEXT,
+        details TEXT,
+        emotion TEXT,
+        rolled_up INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+SCHEMA = [
+    INTERACTIONS_TABLE.format(name="interactions"),
+    '''
+    CREATE TABLE IF NOT EXISTS learning (
+        id INTEGER PRIMARY KEY,
+        keyword TEXT,
+        response TEXT,
+        confidence REAL,
+        times_used INTEGER
+    )
+    ''',
+    # One row per keyword so learning can upsert; older databases may hold
+    # duplicates, keep the newest
+    "DELETE FROM learning WHERE id NOT IN (SELECT MAX(id) FROM learning GROUP BY keyword)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_learning_keyword ON learning (keyword)",
+    "CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_interactions_type ON interactions (interaction_type)",
+    # Hourly and daily counts of rolled-up interactions (see retention.py)
+    '''
+    CREATE TABLE IF NOT EXISTS interaction_rollups (
+        period TEXT,
+        bucket TEXT,
+        kind TEXT,
+        name TEXT,
+        count INTEGER,
+        PRIMARY KEY (period, bucket, kind, name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS memory_meta (
+        key TEXT PRIMARY KEY,
+        value
+    )
+    ''',
+]
+
+# Columns added to tables that older databases already have
+ADDED_COLUMNS = [
+    # Set once the row is counted in interaction_rollups (see retention.py)
+    ("interactions", "rolled_up", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+class MemoryStore:
+    """The robot's SQLite memory behind one long-lived connection
+
+    Writes are queued and committed by a background writer in one transaction
+    per flush_interval, so callers (the control loop, display and command
+    threads) never wait on the SD card. The database runs in WAL mode with
+    synchronous=NORMAL: a commit appends to the log without an fsync and the
+    log is synced at checkpoints only.
+
+    The write queue holds at most max_pending operations; when the writer
+    falls that far behind the oldest are dropped and counted. Reads run
+    directly on the shared connection and see writes once they are
+    committed. Call close() on shutdown to write out what is still queued.
+    """
+
+    def __init__(self, db_path="robot_memory.db", flush_interval=2.0, max_pending=1000,
+                 threaded=True):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()  # Guards the connection
+        self.pending = BridgeQueue(maxsize=max_pending)
+
+        # Create parent directory if it doesn't exist
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Transactions are managed explicitly by the writer
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        for table, column, definition in ADDED_COLUMNS:
+            columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        self._upgrade_interactions()
+
+        # Statistics
+        self.transactions = 0
+        self.written = 0
+        self.failed = 0
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.writer_thread = None
+        if threaded:
+            self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self.writer_thread.start()
+
+    def execute(self, sql, params=()):
+        """Queue a write statement; returns immediately"""
+        self.pending.put((sql, params))
+
+    def call(self, operation):
+        """Queue operation(conn), run by the writer inside its transaction
+
+        For writes that depend on a read, like updating a counter.
+        """
+        self.pending.put(operation)
+
+    def fetchone(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def flush(self):
+        """Commit everything queued so far before returning"""
+        with self.lock:
+            if self.conn is None:
+                return
+            batch = []
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+
+            try:
+                self.conn.execute("BEGIN")
+                for operation in batch:
+                    if callable(operation):
+                        operation(self.conn)
+                    else:
+                        self.conn.execute(*operation)
+                self.conn.execute("COMMIT")
+                self.transactions += 1
+                self.written += len(batch)
+            except Exception as e:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                self.failed += len(batch)
+                print(f"[MEMORY] Failed to write {len(batch)} records: {e}")
+
+    def close(self):
+        """Stop the writer, write out what is queued and close the database"""
+        self._stop.set()
+        self._wake.set()
+        if self.writer_thread and self.writer_thread is not threading.current_thread():
+            self.writer_thread.join(timeout=5.0)
+        self.flush()
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "transactions": self.transactions,
+            "pending": self.pending.qsize(),
+            "dropped": self.pending.dropped,
+            "failed": self.failed,
+        }
+
+    def _upgrade_interactions(self):
+        """Rebuild an interactions table from before ids were AUTOINCREMENT"""
+        sql = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'interactions'").fetchone()[0]
+        if "AUTOINCREMENT" in sql.upper():
+            return
+        columns = "id, timestamp, interaction_type, details, emotion, rolled_up"
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.execute(INTERACTIONS_TABLE.format(name="interactions_upgrade"))
+            self.conn.execute(f"INSERT INTO interactions_upgrade ({columns}) "
+                              f"SELECT {columns} FROM interactions")
+            self.conn.execute("DROP TABLE interactions")
+            self.conn.execute("ALTER TABLE interactions_upgrade RENAME TO interactions")
+            for statement in SCHEMA:
+                self.conn.execute(statement)  # Indexes went with the old table
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        print("[MEMORY] Upgraded interactions to never reuse ids")
+
+    def _writer_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self.flush()
@@ -0,0 +1,81 @@
+import json
+import math
+import time
+
+from raspberry_pi.runtime.clock import SystemClock
+
+PROFILE_KEY = "profile"
+PROFILE_VERSION = 1
+
+class ProfileStore:
+    """Who the pet is, kept across reboots as one row of memory_meta
+
+    load() is a single primary-key read, so startup doesn't depend on how
+    much interaction history the database holds. Saves are queued on the
+    MemoryStore writer like any other write.
+    """
+
+    def __init__(self, memory, clock=None, interval=60.0):
+        self.memory = memory
+        self.clock = clock or SystemClock()
+        self.interval = interval
+        self.last_save = self.clock.time()
+
+    def load(self):
+        """The saved profile, or None for a new pet"""
+        try:
+            row = self.memory.fetchone("SELECT value FROM memory_meta WHERE key = ?", (PROFILE_KEY,))
+            if not row:
+                return None
+            profile = json.loads(row[0])
+            if profile.get("version") != PROFILE_VERSION:
+                print(f"[MEMORY] Ignoring profile version {profile.get('version')}")
+                return None
+            return profile
+        except (ValueError, TypeError) as e:
+            print(f"[MEMORY] Could not read profile: {e}")
+            return None
+
+    def save(self, personality, state_machine):
+        self.last_save = self.clock.time()
+        value = json.dumps(snapshot_profile(personality, state_machine))
+        self.memory.execute("INSERT INTO memory_meta (key, value) VALUES (?, ?) "
+                            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                            (PROFILE_KEY, value))
+
+    def maybe_save(self, personality, state_machine):
+        """Save if interval seconds have passed since the last save"""
+        if self.clock.time() - self.last_save >= self.interval:
+            self.save(personality, state_machine)
+
+    def clear(self):
+        """Forget the pet; the next start creates a new one"""
+        self.memory.execute("DELETE FROM memory_meta WHERE key = ?", (PROFILE_KEY,))
+
+def snapshot_profile(personality, state_machine):
+    remaining = personality.emotions.remaining()
+    return {
+        "version": PROFILE_VERSION,
+        "saved_at": time.time(),
+        "traits": dict(personality.traits),
+        "emotional_reactivity": personality.emotional_reactivity,
+        "emotion": personality.get_emotion(),
+        "emotion_remaining": None if math.isinf(remaining) else remaining,
+        "metrics": {
+            "boredom": state_machine.boredom_level,
+            "tiredness": state_machine.tiredness_level,
+            "curiosity": state_machine.curiosity_level,
+            "attention_span": state_machine.attention_span,
+        },
+    }
+
+def restore_profile(profile, personality, state_machine):
+    personality.traits.update(profile["traits"])
+    personality.emotional_reactivity = profile["emotional_reactivity"]
+    personality.restore_emotion(profile["emotion"], profile["emotion_remaining"])
+
+    metrics = profile["metrics"]
+    state_machine.boredom_level = metrics["boredom"]
+    state_machine.tiredness_level = metrics["tiredness"]
+    state_machine.curiosity_level = metrics["curiosity"]
+    state_machine.attention_span = metrics["attention_span"]
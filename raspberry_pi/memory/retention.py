@@ -0,0 +1,119 @@
+import time
+
+from raspberry_pi.runtime.clock import SystemClock
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # As written by RobotPersonality._log_interaction
+
+# Rolled rows are counted by the emotion at the time and by interaction type
+ROLLUP_KINDS = {"emotion": "emotion", "type": "interaction_type"}
+
+ROLLUP_ADD = '''
+    INSERT INTO interaction_rollups (period, bucket, kind, name, count) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(period, bucket, kind, name) DO UPDATE SET count = count + excluded.count
+'''
+
+class InteractionRetention:
+    """Keeps the interactions table small by rolling it up into counts
+
+    Every maintenance pass folds the raw interactions from completed hours
+    into hourly and daily counts per emotion and per interaction type, then
+    deletes raw rows older than raw_days and hourly counts older than
+    hourly_days. Daily counts are kept forever. Passes run on the memory
+    writer thread, queued by maybe_run() at most every interval seconds.
+
+    Each raw row is marked rolled_up once it is counted, so an interaction
+    whose write was still queued when its hour was rolled up, or whose
+    timestamp is later than those of rows written after it, is counted by a
+    later pass instead of being lost.
+    """
+
+    def __init__(self, memory, clock=None, raw_days=7, hourly_days=90, interval=600):
+        self.memory = memory
+        self.clock = clock or SystemClock()
+        self.raw_days = raw_days
+        self.hourly_days = hourly_days
+        self.interval = interval
+        self.last_run = None
+
+    def maybe_run(self):
+        """Queue a maintenance pass if one is due; never blocks"""
+        now = self.clock.time()
+        if self.last_run is None or now - self.last_run >= self.interval:
+            self.last_run = now
+            self.memory.call(lambda conn: self.maintain(conn, now))
+
+    def maintain(self, conn, now):
+        """Roll up completed hours and prune old rows (inside a transaction)"""
+        hour_start = _timestamp(now)[:13] + ":00:00"
+
+        # Databases rolled up by row id before rows were marked
+        last_id = _get_meta(conn, "rolled_up_id")
+        if last_id is not None:
+            conn.execute("UPDATE interactions SET rolled_up = 1 WHERE id <= ?", (last_id,))
+            conn.execute("DELETE FROM memory_meta WHERE key = 'rolled_up_id'")
+
+        # Roll up raw rows from completed hours in one pass
+        for kind, column in ROLLUP_KINDS.items():
+            counts = conn.execute(f'''
+                SELECT substr(timestamp, 1, 13) || ':00:00', {column}, COUNT(*)
+                FROM interactions WHERE rolled_up = 0 AND timestamp < ?
+                GROUP BY 1, 2
+            ''', (hour_start,)).fetchall()
+            for bucket, name, count in counts:
+                conn.execute(ROLLUP_ADD, ("hour", bucket, kind, name, count))
+                conn.execute(ROLLUP_ADD, ("day", bucket[:10], kind, name, count))
+        conn.execute("UPDATE interactions SET rolled_up = 1 WHERE rolled_up = 0 AND timestamp < ?",
+                     (hour_start,))
+
+        # Prune what the rollups now cover
+        raw_cutoff = _timestamp(now - self.raw_days * 86400)
+        conn.execute("DELETE FROM interactions WHERE rolled_up = 1 AND timestamp < ?",
+                     (raw_cutoff,))
+        hourly_cutoff = _timestamp(now - self.hourly_days * 86400)
+        conn.execute("DELETE FROM interaction_rollups WHERE period = 'hour' AND bucket < ?",
+                     (hourly_cutoff,))
+
+    def emotion_histogram(self, hours):
+        """Interactions per emotion over the last hours"""
+        return self.histogram("emotion", hours)
+
+    def histogram(self, kind, hours):
+        """Counts per emotion ("emotion") or interaction type ("type") over the last hours
+
+        Hours already rolled up are counted whole, so the window starts at
+        the beginning of the hour it falls in.
+        """
+        column = ROLLUP_KINDS[kind]
+        since = _timestamp(self.clock.time() - hours * 3600)
+        since_hour = since[:13] + ":00:00"
+
+        histogram = {}
+        for name, count in self.memory.fetchall(
+                "SELECT name, SUM(count) FROM interaction_rollups "
+                "WHERE period = 'hour' AND kind = ? AND bucket >= ? GROUP BY name",
+                (kind, since_hour)):
+            histogram[name] = histogram.get(name, 0) + count
+        for name, count in self.memory.fetchall(
+                f"SELECT {column}, COUNT(*) FROM interactions "
+                f"WHERE rolled_up = 0 AND timestamp >= ? GROUP BY {column}",
+                (since_hour,)):
+            histogram[name] = histogram.get(name, 0) + count
+        return histogram
+
+    def daily_history(self, days, kind="emotion"):
+        """{day: {name: count}} for the rolled-up part of the last days"""
+        since = _timestamp(self.clock.time() - days * 86400)[:10]
+        history = {}
+        for bucket, name, count in self.memory.fetchall(
+                "SELECT bucket, name, count FROM interaction_rollups "
+                "WHERE period = 'day' AND kind = ? AND bucket >= ? ORDER BY bucket",
+                (kind, since)):
+            history.setdefault(bucket, {})[name] = count
+        return history
+
+def _timestamp(seconds):
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(seconds))
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM memory_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
@@ -0,0 +1,156 @@
+import asyncio
+import queue
+import threading
+
+from raspberry_pi.runtime.clock import SystemClock
+
+class AsyncRuntime:
+    """Single asyncio event loop hosting the robot's long-running components
+
+    Components hand their coroutines to spawn() and wait on queues, events or
+    clock.sleep_async() instead of sleep-polling on threads of their own. Work
+    arriving from other threads (serial reads, audio callbacks, the Arcade
+    window) enters through call_soon_threadsafe() or a BridgeQueue.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or SystemClock()
+        self.loop = asyncio.new_event_loop()
+        self.tasks = {}  # name -> asyncio.Task
+        self.thread = None
+        self._loop_thread = None  # ident of the thread running the loop
+
+    def spawn(self, name, coro, driver=False):
+        """Run a coroutine as a named task; safe to call from any thread
+
+        driver=True makes the task drive a VirtualClock, so its sleeps move
+        simulated time forward for everything else on the loop.
+        """
+        if self.loop.is_running() and not self._in_loop_thread():
+            self.loop.call_soon_threadsafe(self._create_task, name, coro, driver)
+        else:
+            self._create_task(name, coro, driver)
+
+    def cancel(self, name):
+        """Cancel a named task; safe to call from any thread"""
+        task = self.tasks.get(name)
+        if task and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(task.cancel)
+
+    def call_soon_threadsafe(self, callback, *args):
+        """Schedule a plain callback on the event loop from another thread"""
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def run(self):
+        """Run the event loop in the calling thread until stop() is called"""
+        asyncio.set_event_loop(self.loop)
+        self._loop_thread = threading.get_ident()
+        if hasattr(self.clock, "set_driver"):
+            self.clock.set_driver()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self._cancel_all()
+            self.loop.close()
+            print("[RUNTIME] Event loop stopped")
+
+    def start_in_thread(self):
+        """Run the event loop on a background thread (GUI mode owns the main one)"""
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Cancel every task and stop the loop; safe to call from any thread"""
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _create_task(self, name, coro, driver):
+        task = self.loop.create_task(coro, name=name)
+        self.tasks[name] = task
+        task.add_done_callback(lambda done: self._task_done(name, done))
+        if driver and hasattr(self.clock, "set_driver_task"):
+            self.clock.set_driver_task(task)
+        return task
+
+    def _task_done(self, name, task):
+        if self.tasks.get(name) is task:
+            del self.tasks[name]
+        if not task.cancelled() and task.exception():
+            print(f"[RUNTIME] Task '{name}' failed: {task.exception()!r}")
+
+    def _cancel_all(self):
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+    def _in_loop_thread(self):
+        return self._loop_thread == threading.get_ident()
+
+class BridgeQueue:
+    """Thread-safe FIFO that both threads and coroutines can consume
+
+    put() may be called from any thread, including audio driver callbacks.
+    Threads read with get() like a queue.Queue, and coroutines await
+    get_async(), which wakes as soon as an item arrives instead of polling
+    with a timeout. With a maxsize the oldest item is dropped when full, so a
+    producer nobody is reading from can't grow memory without bound.
+    """
+
+    def __init__(self, maxsize=0):
+        self._queue = queue.Queue(maxsize)
+        self._loop = None
+        self._event = None
+        self.dropped = 0
+
+    def put(self, item):
+        """Add an item without blocking; wakes a waiting coroutine"""
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    def get(self, block=True, timeout=None):
+        """Blocking get for threads, raises queue.Empty like queue.Queue"""
+        return self._queue.get(block=block, timeout=timeout)
+
+    def get_nowait(self):
+        return self._queue.get_nowait()
+
+    async def get_async(self):
+        """Wait on the running event loop for the next item"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+
+        while True:
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._event.clear()
+            # Re-check so an item put before clear() isn't missed
+            try:
+                return self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            await self._event.wait()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def empty(self):
+        return self._queue.empty()
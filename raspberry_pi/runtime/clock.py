@@ -0,0 +1,180 @@
+import time
+import heapq
+import asyncio
+import threading
+from contextlib import contextmanager
+
+class SystemClock:
+    """Real wall-clock time - the default for every component"""
+
+    def time(self):
+        """Current time in seconds since the epoch"""
+        return time.time()
+
+    def sleep(self, seconds):
+        """Block the calling thread for the given number of seconds"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        """Suspend the calling coroutine for the given number of seconds"""
+        await asyncio.sleep(max(0, seconds))
+
+class VirtualClock:
+    """Simulated time that can run faster than real time
+
+    One thread drives the simulation (by default the thread that created the
+    clock). When the driver sleeps, time jumps forward instead of waiting, only
+    pausing for seconds / speed of real time. Any other thread that sleeps is
+    parked until the driver has moved time past its wake-up point, so display
+    and audio threads keep in step with the simulated main loop.
+
+    Coroutines work the same way through sleep_async(): on an event loop the
+    driver is a single task (see set_driver_task), and every other coroutine
+    is resumed once simulated time reaches its wake-up point.
+
+    speed=None runs as fast as the CPU allows.
+    """
+
+    def __init__(self, speed=None, start_time=None):
+        self.speed = speed
+        self._now = time.time() if start_time is None else start_time
+        self._condition = threading.Condition()
+        self._driver = threading.get_ident()
+        self._driver_task = None
+        self._async_sleepers = []  # heap of (wake_time, seq, loop, future)
+        self._async_seq = 0
+
+    def time(self):
+        """Current simulated time in seconds since the epoch"""
+        return self._now
+
+    def sleep(self, seconds):
+        """Advance time from the driver thread, or wait for it from any other"""
+        if threading.get_ident() == self._driver:
+            self.advance(seconds)
+            return
+
+        with self._condition:
+            wake_time = self._now + max(0, seconds)
+            while self._now < wake_time:
+                self._condition.wait()
+
+    async def sleep_async(self, seconds):
+        """Advance time from the driver task, or wait for it from any other"""
+        if self._driver_task is not None and asyncio.current_task() is self._driver_task:
+            if seconds > 0 and self.speed:
+                await asyncio.sleep(seconds / self.speed)
+            self._step(seconds)
+            # Let the coroutines that just woke up run before the next tick
+            await asyncio.sleep(0)
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._condition:
+            wake_time = self._now + max(0, seconds)
+            if self._now >= wake_time:
+                return
+            self._async_seq += 1
+            heapq.heappush(self._async_sleepers, (wake_time, self._async_seq, loop, future))
+        await future
+
+    def advance(self, seconds):
+        """Move simulated time forward and wake any threads that are due"""
+        if seconds <= 0:
+            return
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        self._step(seconds)
+
+    def advance_to(self, when):
+        """Jump simulated time to an absolute moment (never backwards)"""
+        self._step(when - self._now, when)
+
+    def _step(self, seconds, when=None):
+        if seconds <= 0:
+            return
+        with self._condition:
+            self._now = self._now + seconds if when is None else when
+            self._condition.notify_all()
+
+            # Resume coroutines whose wake-up time has passed. On the driver's
+            # own loop they are resolved directly so they run before its next tick
+            try:
+                running_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                running_loop = None
+            while self._async_sleepers and self._async_sleepers[0][0] <= self._now:
+                _, _, loop, future = heapq.heappop(self._async_sleepers)
+                if loop is running_loop:
+                    _resolve(future)
+                elif not loop.is_closed():
+                    loop.call_soon_threadsafe(_resolve, future)
+
+    def set_driver(self, thread=None):
+        """Make the given thread (default: the calling one) drive the clock"""
+        self._driver = thread.ident if thread else threading.get_ident()
+
+    def set_driver_task(self, task):
+        """Make the given asyncio task drive the clock through sleep_async()"""
+        self._driver_task = task
+
+class LatchedClock:
+    """View of another clock that can hold time still while an event is handled
+
+    Inside latch() every time() call returns the moment the latch was taken,
+    so one tick or sensor event sees a single timestamp however long its code
+    takes to run. The flight recorder relies on this to log one time per event
+    and replay it exactly. Sleeping goes straight to the underlying clock.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self._latched = None
+
+    def time(self):
+        latched = self._latched
+        return self.base.time() if latched is None else latched
+
+    def sleep(self, seconds):
+        self.base.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        await self.base.sleep_async(seconds)
+
+    @contextmanager
+    def latch(self):
+        """Freeze time() for the duration of the block (nested latches share it)"""
+        if self._latched is not None:
+            yield self._latched
+            return
+        self._latched = self.base.time()
+        try:
+            yield self._latched
+        finally:
+            self._latched = None
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+def parse_speed(text):
+    """Parse a --speed value such as '1000x', '20' or 'max'
+
+    Returns the speed multiplier, or None for "as fast as possible".
+    """
+    text = text.strip().lower()
+    if text == "max":
+        return None
+
+    if text.endswith("x"):
+        text = text[:-1]
+    try:
+        speed = float(text)
+    except ValueError:
+        raise ValueError(f"Invalid speed '{text}', expected e.g. 1000x or max")
+
+    if speed <= 0:
+        raise ValueError("Speed must be positive")
+    return speed
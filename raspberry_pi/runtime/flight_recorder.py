@@ -0,0 +1,265 @@
+import json
+import math
+import struct
+import threading
+from contextlib import contextmanager
+
+from raspberry_pi.runtime.clock import LatchedClock
+from raspberry_pi.communication.message_dispatcher import (
+    SCAN as SCAN_MESSAGE, SCAN_END as SCAN_END_MESSAGE
+)
+
+# Log layout: MAGIC, then records of (kind u8, time f64, payload length u16)
+# followed by the payload. Times are the recording clock's time.
+MAGIC = b"DWFR1\n"
+RECORD_HEADER = struct.Struct("<BdH")
+FLOAT = struct.Struct("<d")
+MOTOR = struct.Struct("<dB")
+SCAN_READING = struct.Struct("<ii")
+
+# Inputs - replayed in order
+SESSION = 0   # JSON session metadata (seed, ...)
+TICK = 1      # One pass of the main control loop
+DIST = 2      # Distance pushed by the sensor (f64)
+POLL = 3      # Distance returned by measure_distance() during a tick (f64)
+VOICE = 4     # Recognized voice command (utf-8)
+SERIAL = 5    # Line received from the Arduino (utf-8), informational
+SCAN = 9      # Servo sweep reading: angle, distance (i32 each)
+SCAN_END = 10 # Servo sweep finished
+LINK = 11     # Serial link "degraded:<reason>" or "restored" (utf-8)
+
+# Outputs - what the robot decided, compared on replay
+STATE = 6     # New state machine state (utf-8)
+EMOTION = 7   # New emotion (utf-8)
+MOTOR_CMD = 8 # Motor command: speed f64 (NaN for none), name length u8, name
+
+KIND_NAMES = {SESSION: "session", TICK: "tick", DIST: "dist", POLL: "poll",
+              VOICE: "voice", SERIAL: "serial", STATE: "state", EMOTION: "emotion",
+              MOTOR_CMD: "motor", SCAN: "scan", SCAN_END: "scan_end",
+              LINK: "link"}
+OUTPUT_KINDS = (STATE, EMOTION, MOTOR_CMD)
+
+# Serial messages that are inputs, by message type
+LINK_KINDS = {SCAN_MESSAGE: SCAN, SCAN_END_MESSAGE: SCAN_END}
+
+class FlightRecorder:
+    """Compact binary log of everything that drives the robot's decisions
+
+    Inputs (ticks, sensor readings, servo sweeps, voice commands, link drops) are logged through
+    input(), which serializes them across threads, freezes the decision clock
+    for the event and afterwards logs any state or emotion change it caused.
+    Motor commands are logged by the motors wrapper. Replaying the inputs with
+    the same seed reproduces the outputs exactly (see tools/replay_session.py).
+
+    With path=None records are only kept in memory (self.records).
+    """
+
+    def __init__(self, path, clock, flush_interval=1.0):
+        self.path = path
+        self.clock = LatchedClock(clock)  # Hand this to decision-making components
+        self.lock = threading.RLock()
+        self.flush_interval = flush_interval
+        self.records = [] if path is None else None
+        self.file = None
+        if path is not None:
+            self.file = open(path, "wb")
+            self.file.write(MAGIC)
+        self._last_flush = clock.time()
+
+        self.state_machine = None
+        self.personality = None
+        self._last_state = None
+        self._last_emotion = None
+        self.record_count = 0
+
+    def watch(self, state_machine, personality):
+        """Log state and emotion changes of these components after each input"""
+        self.state_machine = state_machine
+        self.personality = personality
+        self._last_state = state_machine.current_state if state_machine else None
+        self._last_emotion = personality.get_emotion() if personality else None
+
+    @contextmanager
+    def input(self, kind, payload=b""):
+        """Log an input and handle it with the decision clock frozen"""
+        with self.lock, self.clock.latch() as now:
+            self.record(kind, payload, now)
+            yield now
+            self._record_outputs(now)
+
+    def record(self, kind, payload=b"", when=None):
+        """Append one record; payload may be bytes, str, float or a dict"""
+        data = encode_payload(kind, payload)
+        if when is None:
+            when = self.clock.time()
+        with self.lock:
+            self.record_count += 1
+            if self.records is not None:
+                self.records.append((kind, when, data))
+                return
+            if self.file is None:
+                return
+            self.file.write(RECORD_HEADER.pack(kind, when, len(data)))
+            self.file.write(data)
+            if kind == TICK and when - self._last_flush >= self.flush_interval:
+                self.file.flush()
+                self._last_flush = when
+
+    def wrap_sensor(self, sensor):
+        return RecordingSensor(sensor, self)
+
+    def wrap_motors(self, motors):
+        return RecordingMotors(motors, self)
+
+    def wrap_link(self, serial):
+        return RecordingLink(serial, self)
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def _record_outputs(self, now):
+        if self.state_machine is not None:
+            state = self.state_machine.current_state
+            if state != self._last_state:
+                self._last_state = state
+                self.record(STATE, state, now)
+        if self.personality is not None:
+            emotion = self.personality.get_emotion()
+            if emotion != self._last_emotion:
+                self._last_emotion = emotion
+                self.record(EMOTION, emotion, now)
+
+class RecordingSensor:
+    """Sensor wrapper that logs polled and pushed distance readings"""
+
+    def __init__(self, sensor, recorder):
+        self.sensor = sensor
+        self.recorder = recorder
+        # Only advertise push support if the wrapped sensor has it
+        if hasattr(sensor, "subscribe"):
+            self.subscribe = self._subscribe
+
+    def measure_distance(self):
+        distance = self.sensor.measure_distance()
+        self.recorder.record(POLL, distance)
+        return distance
+
+    def _subscribe(self, callback):
+        def recorded(distance):
+            with self.recorder.input(DIST, distance):
+                callback(distance)
+        self.sensor.subscribe(recorded)
+
+    def __getattr__(self, name):
+        return getattr(self.sensor, name)
+
+class RecordingLink:
+    """Serial handler wrapper that logs servo sweep messages as inputs"""
+
+    def __init__(self, serial, recorder):
+        self.serial = serial
+        self.recorder = recorder
+
+    def subscribe(self, types, callback):
+        def recorded(message):
+            kind = LINK_KINDS.get(message.type)
+            if kind is None:
+                callback(message)
+                return
+            with self.recorder.input(kind, message.values):
+                callback(message)
+        self.serial.subscribe(types, recorded)
+
+    def __getattr__(self, name):
+        return getattr(self.serial, name)
+
+class RecordingMotors:
+    """Motor wrapper that logs every command the behavior code issues"""
+
+    def __init__(self, motors, recorder):
+        self.motors = motors
+        self.recorder = recorder
+        # Only advertise timed moves if the wrapped motors have them
+        if hasattr(motors, "run_timed"):
+            self.run_timed = self._run_timed
+
+    def move_forward(self, speed=1.0):
+        self._command("move_forward", speed)
+
+    def move_backward(self, speed=1.0):
+        self._command("move_backward", speed)
+
+    def turn_left(self, speed=1.0):
+        self._command("turn_left", speed)
+
+    def turn_right(self, speed=1.0):
+        self._command("turn_right", speed)
+
+    def stop(self):
+        self._command("stop", None)
+
+    def _run_timed(self, action, speed, duration):
+        # Logged like the plain command; the duration comes from the sequence
+        self.recorder.record(MOTOR_CMD, (action, speed))
+        self.motors.run_timed(action, speed, duration)
+
+    def _command(self, action, speed):
+        self.recorder.record(MOTOR_CMD, (action, speed))
+        method = getattr(self.motors, action)
+        if speed is None:
+            method()
+        else:
+            method(speed)
+
+    def __getattr__(self, name):
+        return getattr(self.motors, name)
+
+def encode_payload(kind, payload):
+    if isinstance(payload, bytes):
+        return payload
+    if kind == SESSION:
+        return json.dumps(payload, sort_keys=True).encode("utf-8")
+    if kind in (DIST, POLL):
+        return FLOAT.pack(payload)
+    if kind == SCAN:
+        return SCAN_READING.pack(*payload)
+    if kind == SCAN_END:
+        return b""
+    if kind == MOTOR_CMD:
+        action, speed = payload
+        name = action.encode("utf-8")
+        return MOTOR.pack(math.nan if speed is None else speed, len(name)) + name
+    return str(payload).encode("utf-8")
+
+def decode_payload(kind, data):
+    if kind == SESSION:
+        return json.loads(data.decode("utf-8"))
+    if kind in (DIST, POLL):
+        return FLOAT.unpack(data)[0]
+    if kind == SCAN:
+        return SCAN_READING.unpack(data)
+    if kind == MOTOR_CMD:
+        speed, length = MOTOR.unpack_from(data)
+        action = data[MOTOR.size:MOTOR.size + length].decode("utf-8")
+        return (action, None if math.isnan(speed) else speed)
+    if kind in (TICK, SCAN_END):
+        return None
+    return data.decode("utf-8")
+
+def read_session(path):
+    """Yield (kind, time, payload) for every record in a log file"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a flight recorder log")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return  # End of log (a truncated last record is dropped)
+            kind, when, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield kind, when, decode_payload(kind, data)
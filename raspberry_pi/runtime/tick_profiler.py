@@ -0,0 +1,177 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+# Snapshot file shared with the web status API. Relative paths are taken from
+# the project root, so main.py and web/app.py find the same file wherever
+# they are started from
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_SNAPSHOT_PATH = os.path.join(PROJECT_ROOT,
+                                     os.environ.get("DEWWY_TICK_PROFILE", "tick_profile.json"))
+
+# Histogram bucket upper bounds in milliseconds; one extra bucket catches the rest
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+class StageStats:
+    """Timing histogram for one stage of the control loop"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+        bucket = 0
+        for bound in BUCKET_BOUNDS_MS:
+            if ms <= bound:
+                break
+            bucket += 1
+        self.counts[bucket] += 1
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return BUCKET_BOUNDS_MS[bucket] if bucket < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "histogram": dict(zip([f"<={bound}" for bound in BUCKET_BOUNDS_MS] + ["more"], self.counts)),
+        }
+
+class TickProfiler:
+    """Per-stage timing and deadline accounting for a fixed-rate loop
+
+    Wrap each tick in begin_tick()/end_tick() and each step in stage(name).
+    Times are real elapsed time (perf_counter), also under a VirtualClock,
+    since they measure the cost of the code rather than simulated time.
+    A tick whose stages take longer than the target interval is an overrun;
+    jitter is how far the start of a tick lands from its ideal start.
+    """
+
+    def __init__(self, target_interval=0.1, summary_interval=None,
+                 snapshot_path=DEFAULT_SNAPSHOT_PATH, timer=time.perf_counter):
+        self.target_interval = target_interval
+        self.summary_interval = summary_interval  # Seconds between summaries, None for quiet
+        self.snapshot_path = snapshot_path
+        self.timer = timer
+
+        self.stages = {}
+        self.tick_stats = StageStats()
+        self.jitter_stats = StageStats()
+        self.ticks = 0
+        self.overruns = 0
+        self.worst_overrun_ms = 0.0
+
+        self._tick_start = None
+        self._last_tick_start = None
+        self._last_report = timer()
+
+    def begin_tick(self):
+        """Mark the start of a tick"""
+        now = self.timer()
+        if self._last_tick_start is not None:
+            jitter_ms = abs((now - self._last_tick_start) - self.target_interval) * 1000
+            self.jitter_stats.add(jitter_ms)
+        self._last_tick_start = now
+        self._tick_start = now
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one stage of the current tick"""
+        start = self.timer()
+        try:
+            yield
+        finally:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.add((self.timer() - start) * 1000)
+
+    def end_tick(self):
+        """Mark the end of a tick's work, before the loop sleeps"""
+        if self._tick_start is None:
+            return
+        busy_ms = (self.timer() - self._tick_start) * 1000
+        self._tick_start = None
+        self.ticks += 1
+        self.tick_stats.add(busy_ms)
+
+        overrun_ms = busy_ms - self.target_interval * 1000
+        if overrun_ms > 0:
+            self.overruns += 1
+            self.worst_overrun_ms = max(self.worst_overrun_ms, overrun_ms)
+
+        now = self.timer()
+        if self.summary_interval and now - self._last_report >= self.summary_interval:
+            self._last_report = now
+            self.report()
+
+    def snapshot(self):
+        """All statistics as a JSON-friendly dict"""
+        return {
+            "target_interval_ms": self.target_interval * 1000,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "overrun_rate": round(self.overruns / self.ticks, 4) if self.ticks else 0.0,
+            "worst_overrun_ms": round(self.worst_overrun_ms, 3),
+            "tick": self.tick_stats.as_dict(),
+            "jitter": self.jitter_stats.as_dict(),
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+            "updated": time.time(),
+        }
+
+    def summary(self):
+        """One-line summary of the busiest stages and missed deadlines"""
+        parts = [f"ticks={self.ticks}",
+                 f"overruns={self.overruns}",
+                 f"tick p95={self.tick_stats.percentile(0.95)}ms max={self.tick_stats.max_ms:.1f}ms",
+                 f"jitter p95={self.jitter_stats.percentile(0.95)}ms"]
+        for name, stats in self.stages.items():
+            mean = stats.total_ms / stats.count if stats.count else 0.0
+            parts.append(f"{name} {mean:.2f}/{stats.max_ms:.1f}ms")
+        return " | ".join(parts)
+
+    def report(self):
+        """Print the summary and refresh the snapshot file"""
+        print(f"[PROFILE] {self.summary()}")
+        self.write_snapshot()
+
+    def write_snapshot(self):
+        """Atomically write snapshot() to snapshot_path, if one is set"""
+        if not self.snapshot_path:
+            return
+        temp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"[PROFILE] Could not write snapshot: {e}")
+
+def load_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    """Read the last snapshot written by a running robot, or None"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
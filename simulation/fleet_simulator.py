@@ -0,0 +1,250 @@
+"""
+Vectorized fleet simulator for tuning pet personalities.
+
+Runs the behavior model of RobotStateMachine (behavior metrics, threshold
+triggers and weighted next-state choice) together with the trait-driven random
+behaviors of PetRobot for thousands of robots at once. Every robot's metrics,
+state code and traits live in NumPy arrays and one step() advances the whole
+fleet by one control loop tick.
+
+Obstacles are not modelled, so AVOIDING and STARTLED never occur here.
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.robot_state import RobotState
+from raspberry_pi.behavior.transition_table import (
+    TransitionTable, STATES, STATE_CODES, STATE_DURATION
+)
+
+IDLE = STATE_CODES[RobotState.IDLE]
+ROAMING = STATE_CODES[RobotState.ROAMING]
+AVOIDING = STATE_CODES[RobotState.AVOIDING]
+SLEEPING = STATE_CODES[RobotState.SLEEPING]
+PLAYING = STATE_CODES[RobotState.PLAYING]
+STARTLED = STATE_CODES[RobotState.STARTLED]
+CURIOUS = STATE_CODES[RobotState.CURIOUS]
+
+# Same ranges as PetRobot._randomize_personality_traits (inclusive)
+DEFAULT_TRAIT_RANGES = {
+    "openness": (3, 10),
+    "friendliness": (5, 10),
+    "activeness": (3, 10),
+    "expressiveness": (4, 10),
+    "patience": (2, 10),
+}
+
+# Random behaviors from PetRobot._check_for_random_behaviors
+RANDOM_PLAY, RANDOM_CURIOUS, RANDOM_SLEEP, RANDOM_ATTENTION = range(4)
+
+class FleetSimulator:
+    """Batch behavior engine for N robots held in NumPy arrays"""
+
+    def __init__(self, num_robots, trait_ranges=None, seed=None, tick=0.1,
+                 random_behaviors=True, transition_table=None):
+        self.num_robots = num_robots
+        self.tick = tick  # Seconds per step, same as PetRobot's update interval
+        self.random_behaviors = random_behaviors
+        self.rng = np.random.default_rng(seed)
+        self.time = 0.0
+
+        # Traits, one int8 array per trait
+        self.trait_ranges = dict(DEFAULT_TRAIT_RANGES)
+        if trait_ranges:
+            self.trait_ranges.update(trait_ranges)
+        self.traits = {}
+        self._randomize_personality_traits()
+
+        # Behavior metrics and state, all robots start idle like the real one
+        self.state = np.full(num_robots, IDLE, dtype=np.int8)
+        self.boredom = np.zeros(num_robots)
+        self.curiosity = np.zeros(num_robots)
+        self.tiredness = np.zeros(num_robots)
+        self.last_state_change = np.zeros(num_robots)
+
+        # Per-state lookup tables
+        num_states = len(STATES)
+        self.has_duration = np.zeros(num_states, dtype=bool)
+        self.min_duration = np.zeros(num_states)
+        self.max_duration = np.zeros(num_states)
+        for state, (min_time, max_time) in STATE_DURATION.items():
+            code = STATE_CODES[state]
+            self.has_duration[code] = True
+            self.min_duration[code] = min_time
+            self.max_duration[code] = max_time
+        self.state_deadline = np.full(num_robots, np.inf)
+        self._draw_deadlines(np.arange(num_robots))
+
+        # Next-state weights shared with RobotStateMachine
+        table = (transition_table or TransitionTable()).as_arrays()
+        self.weight_base = table["base"]
+        self.weight_boredom = table["boredom"]
+        self.weight_tiredness = table["tiredness"]
+        self.weight_curiosity = table["curiosity"]
+        self.weight_floor = table["floor"]
+
+        # Random behavior timers
+        self.next_random_behavior = self.rng.uniform(20, 60, num_robots)
+
+        # Statistics
+        self.occupancy = np.zeros((num_robots, num_states), dtype=np.int64)
+        self.transitions = np.zeros(num_robots, dtype=np.int64)
+        self.steps = 0
+        self._rows = np.arange(num_robots)
+
+    def _randomize_personality_traits(self):
+        """Draw every robot's traits from the configured ranges"""
+        for trait, (low, high) in self.trait_ranges.items():
+            self.traits[trait] = self.rng.integers(low, high + 1, self.num_robots).astype(np.int8)
+
+    def step(self):
+        """Advance every robot by one tick"""
+        self.time += self.tick
+        self._update_behavior_metrics()
+        self._check_state_durations()
+        self._check_behavior_triggers()
+        if self.random_behaviors:
+            self._check_for_random_behaviors()
+
+        self.occupancy[self._rows, self.state] += 1
+        self.steps += 1
+
+    def run(self, seconds):
+        """Advance the fleet by the given amount of simulated time"""
+        for _ in range(int(round(seconds / self.tick))):
+            self.step()
+
+    def _update_behavior_metrics(self):
+        """Vectorized RobotStateMachine._update_behavior_metrics"""
+        n = self.num_robots
+        u = self.rng.random((3, n))
+        state = self.state
+
+        idle = state == IDLE
+        active = (state == ROAMING) | (state == PLAYING) | (state == AVOIDING)
+        sleeping = state == SLEEPING
+
+        # Boredom and curiosity build up while idle, tiredness wears off
+        boredom_delta = np.where(idle, 0.2 + 0.3 * u[0], 0.0)
+        curiosity_delta = np.where(idle, 0.3 + 0.5 * u[1], 0.0)
+        tiredness_delta = np.where(idle, -(0.1 + 0.2 * u[2]), 0.0)
+
+        # Activity makes the robot tired and less bored
+        tiredness_delta = np.where(active, 0.1 + 0.3 * u[2], tiredness_delta)
+        boredom_delta = np.where(active, -(0.2 + 0.4 * u[0]), boredom_delta)
+
+        # Sleeping recovers tiredness, boredom creeps up
+        tiredness_delta = np.where(sleeping, -(0.5 + 0.5 * u[2]), tiredness_delta)
+        boredom_delta = np.where(sleeping, 0.1 + 0.1 * u[0], boredom_delta)
+
+        np.clip(self.boredom + boredom_delta, 0, 100, out=self.boredom)
+        np.clip(self.curiosity + curiosity_delta, 0, 100, out=self.curiosity)
+        np.clip(self.tiredness + tiredness_delta, 0, 100, out=self.tiredness)
+
+    def _check_state_durations(self):
+        """Move robots whose state has run its course to a weighted next state"""
+        due = np.flatnonzero(self.time > self.state_deadline)
+        if due.size:
+            self._transition(due, self._choose_next_state(due))
+
+    def _choose_next_state(self, robots):
+        """Vectorized RobotStateMachine._choose_next_state for a subset of robots"""
+        state = self.state[robots]
+        weights = (self.weight_base[state]
+                   + self.weight_boredom[state] * self.boredom[robots, None]
+                   + self.weight_tiredness[state] * self.tiredness[robots, None]
+                   + self.weight_curiosity[state] * self.curiosity[robots, None])
+
+        # Floors only apply to targets that exist for the current state
+        floor = self.weight_floor[state]
+        weights = np.where(floor > 0, np.maximum(weights, floor), weights)
+
+        # Inverse-CDF sampling on the cumulative weights of each row
+        cumulative = np.cumsum(weights, axis=1)
+        draw = self.rng.random(robots.size) * cumulative[:, -1]
+        return (cumulative <= draw[:, None]).sum(axis=1).astype(np.int8)
+
+    def _check_behavior_triggers(self):
+        """Boredom, tiredness and curiosity thresholds, in the scalar order"""
+        state = self.state
+
+        bored = (self.boredom > 70) & (state != PLAYING) & (state != STARTLED) & (state != AVOIDING)
+        tired = ~bored & (self.tiredness > 80) & (state != SLEEPING) & (state != AVOIDING)
+        curious = ~bored & ~tired & (self.curiosity > 90) & (state == IDLE)
+
+        self._transition(np.flatnonzero(bored), PLAYING)
+        self.boredom[bored] = 0
+        self._transition(np.flatnonzero(tired), SLEEPING)
+        self.tiredness[tired] = 0
+        self._transition(np.flatnonzero(curious), CURIOUS)
+        self.curiosity[curious] = 0
+
+    def _check_for_random_behaviors(self):
+        """Vectorized PetRobot._check_for_random_behaviors"""
+        due = np.flatnonzero(self.time > self.next_random_behavior)
+        if not due.size:
+            return
+
+        self.next_random_behavior[due] = self.time + self.rng.uniform(15, 60, due.size)
+        behavior = self.rng.integers(0, 4, due.size)
+        chance = self.rng.random(due.size)
+
+        activeness = self.traits["activeness"][due] / 10
+        openness = self.traits["openness"][due] / 10
+
+        play = (behavior == RANDOM_PLAY) & (chance < activeness)
+        curious = (behavior == RANDOM_CURIOUS) & (chance < openness)
+        sleep = (behavior == RANDOM_SLEEP) & (chance < 1 - activeness)
+
+        # Attention seeking only changes emotion, which isn't modelled here
+        self._transition(due[play], PLAYING)
+        self._transition(due[curious], CURIOUS)
+        self._transition(due[sleep], SLEEPING)
+
+    def _transition(self, robots, new_state):
+        """Move the given robots to new_state (a code or an array of codes)"""
+        if not np.size(robots):
+            return
+        self.state[robots] = new_state
+        self.last_state_change[robots] = self.time
+        self.transitions[robots] += 1
+        self._draw_deadlines(robots)
+
+    def _draw_deadlines(self, robots):
+        """Draw each robot's state deadline once, on entry (inf if untimed)"""
+        state = self.state[robots]
+        deadline = self.time + self.rng.uniform(self.min_duration[state], self.max_duration[state])
+        self.state_deadline[robots] = np.where(self.has_duration[state], deadline, np.inf)
+
+    def state_fractions(self):
+        """(N x states) fraction of ticks each robot has spent in each state"""
+        return self.occupancy / max(1, self.steps)
+
+    def summary(self):
+        """Fleet-wide mean fraction of time per state, keyed by state name"""
+        mean = self.state_fractions().mean(axis=0)
+        return {state: float(mean[code]) for code, state in enumerate(STATES)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of many pet personalities")
+    parser.add_argument("--robots", type=int, default=10000, help="Number of robots in the fleet")
+    parser.add_argument("--minutes", type=float, default=60, help="Simulated minutes to run")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    args = parser.parse_args()
+
+    fleet = FleetSimulator(args.robots, seed=args.seed)
+    fleet.run(args.minutes * 60)
+
+    print(f"Simulated {args.robots} robots for {args.minutes:g} minutes")
+    for state, fraction in fleet.summary().items():
+        print(f"  {state:12s} {fraction * 100:5.1f}%")
+    print(f"  mean transitions per robot: {fleet.transitions.mean():.1f}")
+
+if __name__ == "__main__":
+    main()
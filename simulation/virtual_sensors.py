@@ -1,16 +1,25 @@
 import random
-import time
 import math
+import threading
+
+from raspberry_pi.runtime.clock import SystemClock
 
 class UltrasonicSensor:
-    def __init__(self, canvas=None, robot=None, obstacles=None):
+    def __init__(self, canvas=None, robot=None, obstacles=None, clock=None):
         self.max_range = 200  # Maximum sensor range in cm/pixels
         self.canvas = canvas  # Reference to tkinter canvas for GUI mode
         self.robot = robot    # Reference to robot object in GUI
         self.obstacles = obstacles  # List of obstacles in GUI
         self.noise_factor = 0.05  # 5% noise
         self.last_distance = 100  # Start with default distance
-        self.last_measure_time = time.time()
+        self.clock = clock or SystemClock()  # Real or simulated time source
+        self.last_measure_time = self.clock.time()
+        
+        # Pushed readings for subscribers, same rate as the old polling loop
+        self.stream_interval = 0.1
+        self.listeners = []
+        self.streaming = False
+        self.stream_thread = None
         
     def measure_distance(self):
         """Measure distance to nearest obstacle"""
@@ -21,9 +30,34 @@ class UltrasonicSensor:
             # Simple simulation mode - return semi-random values
             return self._measure_simulated_distance()
     
+    def subscribe(self, callback):
+        """Push every new reading to callback(distance) from a sensor thread"""
+        self.listeners.append(callback)
+        
+        # Start measuring on our own schedule once someone is listening
+        if not self.streaming:
+            self.streaming = True
+            self.stream_thread = threading.Thread(target=self._stream_loop)
+            self.stream_thread.daemon = True
+            self.stream_thread.start()
+    
+    def stop(self):
+        """Stop pushing readings"""
+        self.streaming = False
+    
+    def _stream_loop(self):
+        while self.streaming:
+            distance = self.measure_distance()
+            for callback in list(self.listeners):
+                try:
+                    callback(distance)
+                except Exception as e:
+                    print(f"[SENSOR] Listener error: {e}")
+            self.clock.sleep(self.stream_interval)
+    
     def _measure_simulated_distance(self):
         """Generate a simulated distance reading with some coherence"""
-        current_time = time.time()
+        current_time = self.clock.time()
         time_diff = current_time - self.last_measure_time
         
         # Add some noise and drift to the reading
@@ -1,129 +1,335 @@
 # simulation/virtual_serial.py
-import serial
-import threading
+import os
+import sys
+import tty
 import time
-import queue
 import random
+import select
+import threading
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.binary_protocol import (
+    FrameDecoder, encode_message, PROTO_REQUEST, PROTO_ACCEPT, COMMAND_CODES, COMMAND_NAMES,
+    MOTOR_COMMANDS, MSG_DIST, MSG_SCAN, MSG_SCAN_END, MSG_BATTERY, MSG_ACK, MSG_PONG,
+    MSG_ERROR, MSG_DONE, MSG_MOTOR, MSG_MOTOR_TIMED, MSG_SERVO, MSG_SCAN_REQUEST,
+    MSG_BATTERY_REQUEST, MSG_PING
+)
+
+# Timing of arduino/main_arduino/main_arduino.ino, in seconds
+DISTANCE_INTERVAL = 0.1  # Sensor read every 100 ms
+TX_INTERVAL = 0.05       # Minimum time between distance transmissions
+SCAN_ANGLES = range(0, 181, 15)
+SCAN_DELAY = 0.05        # Servo settling time per scan step
+MAX_COMMAND_LENGTH = 32
+
+MOTOR_SPEEDS = {"FWD": 1, "BCK": -1, "LFT": 0, "RGT": 0, "STP": 0}
 
 class VirtualArduino(threading.Thread):
-    def __init__(self, port="/dev/pts/2", simulator=None):
+    """The main_arduino firmware on the far end of a pseudo-terminal
+
+    Creates a pty pair and serves the firmware's protocol on it: DIST every
+    100 ms (no more often than TX_INTERVAL), SCAN sweeps that block like the
+    real servo does, BAT, PING, ACK with sequence numbers, DONE for timed
+    moves, ERR for anything else, and the switch to binary frames on
+    PROTO:BIN1. port is the slave's path, so the real
+    SerialHandler(simulation=False, port=arduino.port) talks to it exactly as
+    it would to a board.
+
+    Like a board that resets when the port is opened, it boots each time
+    the host opens the slave: input sent while booting is lost, then it
+    says ARDUINO:READY and starts over in text mode. With baud_rate set,
+    bytes to the host leave no faster than a UART at that rate would send
+    them (10 bits per byte). Distances come from the simulator's sensor if
+    there is one, otherwise from a seeded random walk.
+    """
+
+    def __init__(self, simulator=None, baud_rate=None, seed=None, battery=87, boot_delay=0.1):
         threading.Thread.__init__(self)
-        self.port = port
+        self.daemon = True
         self.simulator = simulator  # Reference to simulator for visualization
+        self.baud_rate = baud_rate
+        self.rng = random.Random(seed)
+        self.battery = battery
+        self.boot_delay = boot_delay
         self.running = True
-        self.connected = False
-        
-        # Communication queues
-        self.to_rpi_queue = queue.Queue()  # Messages going to RPi
-        self.from_rpi_queue = queue.Queue()  # Commands from RPi
-        
-        # Sensor data
-        self.distance = 100  # Default distance in cm
+
+        # Raw mode before anyone opens the slave: no echo, no newline translation.
+        # Only the host keeps the slave open, so the master sees when it closes.
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        os.close(slave)
+        self.connected = False  # Host has the port open
+
+        # Firmware state
+        self.binary = False
+        self.command = bytearray()
+        self.decoder = FrameDecoder()
+        self.distance = 100  # Current distance in cm
         self.last_command = "NONE"
         self.motor_speed = 0
-        
-        # Try to open serial port if not in pure simulation mode
-        try:
-            self.ser = serial.Serial(port, 9600)
-            self.connected = True
-            print(f"Serial connection opened on {port}")
-        except:
-            print(f"Could not open serial port {port}. Running in simulation mode.")
-            self.ser = None
-            
+        self.servo_angle = 90
+        self.timed_command = None
+        self.timed_move_end = 0.0
+        self.last_distance = 0.0
+        self.last_tx = 0.0
+        self.tx_free_at = 0.0  # When the UART finishes what it was given
+
+        # Statistics
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.commands = 0
+        self.errors = 0
+        self.boots = 0
+        print(f"[SERIAL] Virtual Arduino on {self.port}")
+
     def run(self):
         while self.running:
-            # In simulation mode, update the distance with some random variation
-            if self.simulator:
-                if hasattr(self.simulator, 'sensor'):
-                    self.distance = self.simulator.sensor.measure_distance()
-                else:
-                    # Add some random drift to distance
-                    self.distance += random.uniform(-5, 5)
-                    self.distance = max(5, min(200, self.distance))
-            
-            # Send simulated data to Raspberry Pi
-            message = f"DIST:{int(self.distance)}\n"
-            self.to_rpi_queue.put(message)
-            
-            if self.ser and self.connected:
-                try:
-                    # Send data over the physical serial connection
-                    self.ser.write(message.encode())
-                    
-                    # Check for commands from Raspberry Pi on physical connection
-                    if self.ser.in_waiting > 0:
-                        command = self.ser.readline().decode().strip()
-                        self._process_command(command)
-                except Exception as e:
-                    print(f"Serial error: {e}")
-                    self.connected = False
-            
-            # Process any commands in the queue (from simulator)
-            try:
-                while not self.from_rpi_queue.empty():
-                    command = self.from_rpi_queue.get_nowait()
-                    self._process_command(command)
-            except queue.Empty:
-                pass
-                
-            time.sleep(0.1)
-            
-    def _process_command(self, command):
-        """Process commands from Raspberry Pi"""
-        print(f"Arduino received: {command}")
-        self.last_command = command
-        
-        # Process motor commands
-        if command == "FWD":
-            self.motor_speed = 150  # Forward speed
-        elif command == "BCK":
-            self.motor_speed = -150  # Backward speed
-        elif command == "LFT":
-            self.motor_speed = 0  # Turn left (simplified)
-        elif command == "RGT":
-            self.motor_speed = 0  # Turn right (simplified)
-        elif command == "STP":
-            self.motor_speed = 0  # Stop
-        
-        # Send acknowledgment
-        ack = f"ACK:{command}\n"
-        self.to_rpi_queue.put(ack)
-        
-        if self.ser and self.connected:
+            if not self.connected:
+                self._wait_for_host()
+                continue
+
+            now = time.monotonic()
+            wait = max(0.0, self.last_distance + DISTANCE_INTERVAL - now)
+            if self.timed_command is not None:
+                wait = min(wait, max(0.0, self.timed_move_end - now))
             try:
-                self.ser.write(ack.encode())
-            except:
-                pass
-    
-    def send_command(self, command):
-        """Send a command to the Arduino (from RPi)"""
-        self.from_rpi_queue.put(command)
-    
-    def get_next_message(self):
-        """Get the next message from Arduino (to RPi)"""
+                readable, _, _ = select.select([self.master], [], [], wait)
+                if readable:
+                    self._receive(os.read(self.master, 256))
+            except OSError:
+                # EIO: the host closed the port
+                self.connected = False
+                self.motor_speed = 0
+                continue
+
+            # Finish a timed move on time
+            now = time.monotonic()
+            if self.timed_command is not None and now >= self.timed_move_end:
+                self.motor_speed = 0
+                self._send_done(self.timed_command)
+                self.timed_command = None
+
+            # Read distance sensor, send it if TX_INTERVAL has passed
+            if now - self.last_distance > DISTANCE_INTERVAL:
+                self.distance = self._read_distance()
+                self.last_distance = now
+                if now - self.last_tx > TX_INTERVAL:
+                    self._send_distance(int(self.distance))
+                    self.last_tx = time.monotonic()
+        self.connected = False
+
+    def _wait_for_host(self):
+        # While nobody has the slave open the master reads EIO; once the
+        # host opens it, there is nothing to read until it writes
+        try:
+            if select.select([self.master], [], [], 0.05)[0]:
+                os.read(self.master, 256)
+        except OSError:
+            time.sleep(0.05)
+            return
+        self._boot()
+
+    def _boot(self):
+        """Start over like setup() after a reset"""
+        self.binary = False
+        self.decoder = FrameDecoder()
+        self.command.clear()
+        self.motor_speed = 0
+        self.servo_angle = 90
+        self.timed_command = None
+        time.sleep(self.boot_delay)
+        # Whatever the host sent while the board was booting is lost
         try:
-            return self.to_rpi_queue.get_nowait()
-        except queue.Empty:
-            return None
-    
+            while select.select([self.master], [], [], 0)[0]:
+                os.read(self.master, 256)
+        except OSError:
+            return
+        self.connected = True
+        self.boots += 1
+        self._send_line("ARDUINO:READY")
+        self.last_distance = time.monotonic()
+
     def get_distance(self):
         """Get the current distance reading"""
         return self.distance
-    
+
+    def stats(self):
+        return {"bytes_sent": self.bytes_sent, "bytes_received": self.bytes_received,
+                "commands": self.commands, "errors": self.errors, "boots": self.boots,
+                "protocol": "binary" if self.binary else "text"}
+
     def stop(self):
         self.running = False
-        if self.ser:
-            self.ser.close()
+        if self.is_alive():
+            self.join(timeout=1.0)
+        try:
+            os.close(self.master)
+        except OSError:
+            pass
+
+    # Sensors
+    def _read_distance(self):
+        if self.simulator and hasattr(self.simulator, 'sensor'):
+            return self.simulator.sensor.measure_distance()
+        # Add some random drift to distance
+        self.distance += self.rng.uniform(-5, 5)
+        return max(5, min(200, self.distance))
+
+    def _scan_distance(self, angle):
+        # Straight ahead is what the sensor sees; elsewhere is random clutter
+        if abs(angle - 90) < 15:
+            return int(self.distance)
+        return self.rng.randint(10, 300)
+
+    # Incoming bytes, like processSerial()
+    def _receive(self, data):
+        self.bytes_received += len(data)
+        for index, byte in enumerate(data):
+            if self.binary:
+                # Hand the rest to the frame parser in one go
+                for msg_type, values in self.decoder.feed(data[index:]):
+                    self._execute_frame(msg_type, values)
+                return
+            if byte in b"\r\n":
+                if self.command:
+                    command = self.command.decode('utf-8', 'replace')
+                    self.command.clear()
+                    self._execute_command(command)
+            elif len(self.command) < MAX_COMMAND_LENGTH - 1:
+                self.command.append(byte)
+
+    def _execute_command(self, command):
+        """Run a text command, like executeCommand()"""
+        self.commands += 1
+        self.last_command = command
+        command, _, seq = command.partition("#")
+        name, _, argument = command.partition(":")
+
+        if name in MOTOR_COMMANDS and (not argument or name != "STP"):
+            speed, _, duration = argument.partition(":")
+            speed = 255 if not speed else int(speed) if speed.isdigit() else 0
+            self._start_motor(name, speed, int(duration) if duration.isdigit() else 0)
+            self._send_ack(name, seq)
+        elif name == "SRV" and argument:
+            self.servo_angle = max(0, min(180, int(argument) if argument.isdigit() else 0))
+            self._send_ack(name, seq)
+        elif command == "SCAN":
+            self._send_ack(name, seq)
+            self._perform_scan()
+        elif command == "PING":
+            self._send_line("PONG")
+        elif command == "BAT":
+            self._send_battery()
+        elif command == PROTO_REQUEST:
+            # Reply in text, then both sides talk in frames
+            self._send_line(PROTO_ACCEPT)
+            self.binary = True
+            self.decoder = FrameDecoder()
+        else:
+            self.errors += 1
+            self._send_line(f"ERR:UNKNOWN_CMD:{command}" + (f"#{seq}" if seq else ""))
+
+    def _execute_frame(self, msg_type, values):
+        """Run a binary command, like executeFrame()"""
+        self.commands += 1
+        name = COMMAND_NAMES.get(values[0]) if values else None
+        if msg_type in (MSG_MOTOR, MSG_MOTOR_TIMED) and name in MOTOR_COMMANDS:
+            self.last_command = name
+            self._start_motor(name, values[1], values[2] if msg_type == MSG_MOTOR_TIMED else 0)
+            self._send_frame(MSG_ACK, values[0])
+        elif msg_type == MSG_SERVO:
+            self.servo_angle = min(180, values[0])
+            self._send_frame(MSG_ACK, COMMAND_CODES["SRV"])
+        elif msg_type == MSG_SCAN_REQUEST:
+            self._send_frame(MSG_ACK, COMMAND_CODES["SCAN"])
+            self._perform_scan()
+        elif msg_type == MSG_BATTERY_REQUEST:
+            self._send_battery()
+        elif msg_type == MSG_PING:
+            self._send_frame(MSG_PONG, values[0])
+        else:
+            self.errors += 1
+            self._send_frame(MSG_ERROR, 0)
+
+    def _start_motor(self, name, speed, duration):
+        speed = max(0, min(255, speed))
+        self.motor_speed = MOTOR_SPEEDS[name] * speed
+        # Any new motor command replaces a timed move still running
+        self.timed_command = name if duration > 0 and name != "STP" else None
+        self.timed_move_end = time.monotonic() + duration / 1000.0
+
+    def _perform_scan(self):
+        # Blocks the loop for the whole sweep, as the firmware does
+        time.sleep(SCAN_DELAY * 2)
+        for angle in SCAN_ANGLES:
+            self.servo_angle = angle
+            time.sleep(SCAN_DELAY)
+            distance = self._scan_distance(angle)
+            if self.binary:
+                self._send_frame(MSG_SCAN, angle, distance)
+            else:
+                self._send_line(f"SCAN:{angle}:{distance}")
+        self.servo_angle = 90
+        if self.binary:
+            self._send_frame(MSG_SCAN_END)
+        else:
+            self._send_line("SCAN:END")
+
+    # Outgoing messages
+    def _send_distance(self, distance):
+        if self.binary:
+            self._send_frame(MSG_DIST, distance)
+        else:
+            self._send_line(f"DIST:{distance}")
+
+    def _send_battery(self):
+        if self.binary:
+            self._send_frame(MSG_BATTERY, self.battery)
+        else:
+            self._send_line(f"BAT:{self.battery}")
+
+    def _send_ack(self, name, seq):
+        self._send_line(f"ACK:{name}" + (f"#{seq}" if seq else ""))
+
+    def _send_done(self, name):
+        if self.binary:
+            self._send_frame(MSG_DONE, COMMAND_CODES[name])
+        else:
+            self._send_line(f"DONE:{name}")
+
+    def _send_line(self, line):
+        # Serial.println() ends lines with \r\n
+        self._write(f"{line}\r\n".encode('utf-8'))
+
+    def _send_frame(self, msg_type, *values):
+        self._write(encode_message(msg_type, *values))
+
+    def _write(self, data):
+        if self.baud_rate:
+            # Hold the bytes back until the UART would have shifted them out
+            now = time.monotonic()
+            self.tx_free_at = max(now, self.tx_free_at) + len(data) * 10.0 / self.baud_rate
+            if self.tx_free_at > now:
+                time.sleep(self.tx_free_at - now)
+        try:
+            os.write(self.master, data)
+            self.bytes_sent += len(data)
+        except OSError as e:
+            if self.running:
+                print(f"[SERIAL] Virtual Arduino write error: {e}")
 
 # Run when executed directly
 if __name__ == "__main__":
     arduino = VirtualArduino()
     arduino.start()
-    
+    print(f"Connect to {arduino.port}")
+
     try:
         while True:
             time.sleep(0.1)
     except KeyboardInterrupt:
         arduino.stop()
-        print("Virtual Arduino stopped")
\ No newline at end of file
+        print("Virtual Arduino stopped")
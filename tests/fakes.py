@@ -0,0 +1,91 @@
+"""Stand-ins for the robot's hardware shared by the tests"""
+
+import random
+
+from raspberry_pi.communication.message_dispatcher import MessageDispatcher
+
+class MockPushSensor:
+    """Sensor that pushes readings to subscribers, like the serial sensor"""
+
+    def __init__(self, distance=100):
+        self.distance = distance
+        self.listeners = []
+        self.measurements = 0
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def push(self, distance):
+        for callback in self.listeners:
+            callback(distance)
+
+    def measure_distance(self):
+        self.measurements += 1
+        return self.distance
+
+class MockPollSensor:
+    """Sensor that is only polled; set distance to change the reading"""
+
+    def __init__(self, distance=100):
+        self.distance = distance
+
+    def measure_distance(self):
+        return self.distance
+
+class MockMotors:
+    """Motors that remember every command by name"""
+
+    def __init__(self):
+        self.commands = []
+
+    @property
+    def last_action(self):
+        return self.commands[-1] if self.commands else None
+
+    def move_forward(self, speed=1.0):
+        self.commands.append("move_forward")
+
+    def move_backward(self, speed=1.0):
+        self.commands.append("move_backward")
+
+    def turn_left(self, speed=1.0):
+        self.commands.append("turn_left")
+
+    def turn_right(self, speed=1.0):
+        self.commands.append("turn_right")
+
+    def stop(self):
+        self.commands.append("stop")
+
+class FakeLink:
+    """Serial handler stand-in; the test plays the Arduino's replies"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.dispatcher = MessageDispatcher(clock=clock)
+        self.port = "/dev/fake"
+        self.sent = []
+        self.sent_at = []
+
+    def subscribe(self, types, callback):
+        self.dispatcher.subscribe(types, callback)
+
+    def send_command(self, command):
+        self.sent.append(command)
+        self.sent_at.append(self.clock.time())
+        return True
+
+    def reply(self, line):
+        self.dispatcher.publish(self.dispatcher.parse(line))
+
+    def sweep(self, distances):
+        """A whole servo sweep, one reading per 15 degrees from 0"""
+        for index, distance in enumerate(distances):
+            self.reply(f"SCAN:{index * 15}:{distance}")
+        self.reply("SCAN:END")
+
+class AlwaysRandom(random.Random):
+    """Every chance roll succeeds"""
+
+    def random(self):
+        return 0.0
@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.runtime.async_runtime import AsyncRuntime, BridgeQueue
+from raspberry_pi.runtime.clock import VirtualClock
+from raspberry_pi.audio.command_processor import CommandProcessor
+from raspberry_pi.audio.fallback_recognition import SimpleMicrophoneInterface
+from raspberry_pi.behavior.state_machine import RobotState
+
+class TestBridgeQueue(unittest.TestCase):
+    def test_put_from_thread_wakes_coroutine(self):
+        bridge = BridgeQueue()
+
+        async def consume():
+            threading.Timer(0.05, bridge.put, args=("hello",)).start()
+            return await asyncio.wait_for(bridge.get_async(), timeout=2.0)
+
+        self.assertEqual(asyncio.run(consume()), "hello")
+
+    def test_bounded_queue_drops_oldest(self):
+        bridge = BridgeQueue(maxsize=2)
+        for item in range(5):
+            bridge.put(item)
+
+        self.assertEqual(bridge.dropped, 3)
+        self.assertEqual(bridge.get_nowait(), 3)
+        self.assertEqual(bridge.get_nowait(), 4)
+
+class TestAsyncRuntime(unittest.TestCase):
+    def test_driver_task_moves_virtual_time(self):
+        clock = VirtualClock(start_time=0.0)
+        runtime = AsyncRuntime(clock=clock)
+        frames = []
+
+        async def display():
+            while True:
+                frames.append(clock.time())
+                await clock.sleep_async(0.2)
+
+        async def main_loop():
+            for _ in range(10):
+                await clock.sleep_async(0.1)
+            runtime.stop()
+
+        runtime.spawn("display", display())
+        runtime.spawn("main_loop", main_loop(), driver=True)
+        runtime.run()
+
+        # One simulated second of 100 ms ticks, display at 5 Hz (the last
+        # frame may land after stop() depending on float rounding)
+        self.assertAlmostEqual(clock.time(), 1.0)
+        self.assertIn(len(frames), (4, 5))
+        for earlier, later in zip(frames, frames[1:]):
+            self.assertAlmostEqual(later - earlier, 0.2, delta=0.1 + 1e-9)
+        self.assertTrue(runtime.loop.is_closed())
+
+    def test_stop_from_another_thread_cancels_tasks(self):
+        runtime = AsyncRuntime()
+        cancelled = threading.Event()
+
+        async def forever():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        runtime.spawn("forever", forever())
+        runtime.start_in_thread()
+        runtime.stop()
+        runtime.thread.join(timeout=2.0)
+
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(runtime.tasks, {})
+
+    def test_command_processor_wakes_on_command(self):
+        recognizer = MockRecognizer()
+        state_machine = MockStateMachine()
+        processor = CommandProcessor(voice_recognizer=recognizer, state_machine=state_machine)
+        runtime = AsyncRuntime()
+
+        runtime.spawn("command_processor", processor.run_async())
+        runtime.start_in_thread()
+        recognizer.command_queue.put("sleep")
+        self.assertTrue(state_machine.changed.wait(timeout=2.0))
+        runtime.stop()
+        runtime.thread.join(timeout=2.0)
+
+        self.assertEqual(state_machine.state, RobotState.SLEEPING)
+
+    def test_simulated_microphone_follows_virtual_time(self):
+        clock = VirtualClock(start_time=0.0)
+        runtime = AsyncRuntime(clock=clock)
+        microphone = SimpleMicrophoneInterface(clock=clock)
+
+        async def main_loop():
+            for _ in range(10):
+                await clock.sleep_async(0.1)
+            runtime.stop()
+
+        runtime.spawn("microphone", microphone.run_async())
+        runtime.spawn("main_loop", main_loop(), driver=True)
+        runtime.run()
+
+        # One chunk per 100 ms of simulated time, however fast it ran
+        self.assertIn(microphone.audio_queue.qsize(), (10, 11))
+
+# Mock classes for testing
+class MockRecognizer:
+    def __init__(self):
+        self.command_queue = BridgeQueue()
+
+class MockStateMachine:
+    def __init__(self):
+        self.state = None
+        self.changed = threading.Event()
+
+    def transition_to(self, new_state):
+        self.state = new_state
+        self.changed.set()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.binary_protocol import (
+    FrameDecoder, cobs_encode, cobs_decode_in_place, crc8, encode_message, encode_command,
+    describe, PROTO_REQUEST, PROTO_ACCEPT,
+    MSG_DIST, MSG_SCAN, MSG_ACK, MSG_MOTOR, MSG_MOTOR_TIMED, MSG_DONE, MSG_PING, COMMAND_CODES
+)
+from raspberry_pi.communication.serial_handler import SerialHandler
+
+class TestBinaryProtocol(unittest.TestCase):
+    def test_crc8_check_value(self):
+        # CRC-8/SMBUS check value
+        self.assertEqual(crc8(b"123456789"), 0xF4)
+
+    def test_cobs_round_trip(self):
+        for data in [b"\x00", b"\x11\x00\x22", b"\x01" * 300, bytes(range(256)), b"\x00\x00"]:
+            encoded = cobs_encode(data)
+            self.assertNotIn(0, encoded[:-1])
+            self.assertEqual(encoded[-1], 0)
+
+            buffer = bytearray(encoded[:-1])
+            length = cobs_decode_in_place(buffer, 0, len(buffer))
+            self.assertEqual(bytes(buffer[:length]), data)
+
+    def test_distance_frame_is_compact(self):
+        frame = encode_message(MSG_DIST, 123)
+        self.assertLess(len(frame), len(b"DIST:123\r\n"))
+
+    def test_decoder_handles_split_frames(self):
+        stream = (encode_message(MSG_DIST, 42) + encode_message(MSG_SCAN, 90, 300) +
+                  encode_message(MSG_ACK, COMMAND_CODES["STP"]))
+        decoder = FrameDecoder()
+        messages = []
+        for byte in stream:
+            messages.extend(decoder.feed(bytes((byte,))))
+
+        self.assertEqual(messages, [(MSG_DIST, (42,)), (MSG_SCAN, (90, 300)),
+                                    (MSG_ACK, (COMMAND_CODES["STP"],))])
+        self.assertEqual([describe(*message) for message in messages],
+                         ["DIST:42", "SCAN:90:300", "ACK:STP"])
+
+    def test_corrupted_frame_dropped_and_resynced(self):
+        bad = bytearray(encode_message(MSG_DIST, 42))
+        bad[2] ^= 0x10
+        decoder = FrameDecoder()
+        messages = decoder.feed(bytes(bad) + encode_message(MSG_DIST, 7))
+        self.assertEqual(messages, [(MSG_DIST, (7,))])
+
+        # Noise takes the frame it runs into with it, the next one decodes
+        messages = decoder.feed(b"DIST:1\n" + encode_message(MSG_DIST, 8) + encode_message(MSG_DIST, 9))
+        self.assertEqual(messages, [(MSG_DIST, (9,))])
+        self.assertEqual(decoder.stats()["crc_errors"] + decoder.stats()["framing_errors"], 2)
+
+    def test_encode_text_commands(self):
+        decoder = FrameDecoder()
+        self.assertEqual(decoder.feed(encode_command("FWD:180")),
+                         [(MSG_MOTOR, (COMMAND_CODES["FWD"], 180))])
+        self.assertEqual(decoder.feed(encode_command("LFT")),
+                         [(MSG_MOTOR, (COMMAND_CODES["LFT"], 255))])
+        self.assertEqual(decoder.feed(encode_command("PING:513")), [(MSG_PING, (513,))])
+        self.assertEqual(encode_command("FWD:180#7"), encode_command("FWD:180"))
+        self.assertEqual(decoder.feed(encode_command("RGT:128:300#4")),
+                         [(MSG_MOTOR_TIMED, (COMMAND_CODES["RGT"], 128, 300))])
+        self.assertEqual(describe(MSG_DONE, (COMMAND_CODES["RGT"],)), "DONE:RGT")
+        self.assertIsNone(encode_command("DANCE"))
+        self.assertIsNone(encode_command("SRV:abc"))
+
+class TestProtocolNegotiation(unittest.TestCase):
+    def setUp(self):
+        # A handler wired to a fake port instead of a real one
+        self.handler = SerialHandler(simulation=True)
+        self.handler.disconnect()
+        self.handler.simulation = False
+        self.handler.connected = True
+        self.handler.ser = FakePort()
+
+    def test_switches_to_binary_when_accepted(self):
+        self.handler._process_data("ARDUINO:READY")
+        self.assertEqual(self.handler.ser.written, [f"{PROTO_REQUEST}\n".encode()])
+
+        self.handler._process_data(PROTO_ACCEPT)
+        self.handler.send_command("FWD:100")
+
+        self.assertEqual(self.handler.protocol_stats()["protocol"], "binary")
+        self.assertEqual(self.handler.ser.written[-1], encode_command("FWD:100"))
+
+    def test_falls_back_to_text(self):
+        self.handler._process_data("ARDUINO:READY")
+        self.handler._process_data(f"ERR:UNKNOWN_CMD:{PROTO_REQUEST}")
+        self.handler.send_command("STP")
+
+        self.assertFalse(self.handler.binary)
+        self.assertEqual(self.handler.ser.written[-1], b"STP\n")
+
+    def test_text_only_never_asks(self):
+        self.handler.protocol = "text"
+        self.handler._process_data("ARDUINO:READY")
+
+        self.assertEqual(self.handler.ser.written, [])
+
+    def test_binary_distance_reaches_listeners(self):
+        readings = []
+        lines = []
+        self.handler.subscribe_distance(readings.append)
+        self.handler.subscribe_lines(lines.append)
+        for msg_type, values in FrameDecoder().feed(encode_message(MSG_DIST, 55)):
+            self.handler._process_message(msg_type, values)
+
+        self.assertEqual(readings, [55])
+        self.assertEqual(lines, ["DIST:55"])
+        self.assertEqual(self.handler.get_distance(), 55)
+
+# Mock classes for testing
+class FakePort:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+    def close(self):
+        pass
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import threading
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.runtime.clock import VirtualClock, parse_speed
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+
+class TestVirtualClock(unittest.TestCase):
+    def test_driver_sleep_advances_time(self):
+        clock = VirtualClock(start_time=1000.0)
+        start = time.perf_counter()
+        clock.sleep(3600)
+
+        self.assertEqual(clock.time(), 4600.0)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_other_threads_wait_for_driver(self):
+        clock = VirtualClock(start_time=0.0)
+        woke_at = []
+
+        def sleeper():
+            clock.sleep(1.0)
+            woke_at.append(clock.time())
+
+        thread = threading.Thread(target=sleeper)
+        thread.start()
+
+        # Drive time forward in ticks until the sleeper is released
+        for _ in range(20):
+            clock.sleep(0.1)
+        thread.join(timeout=2.0)
+
+        self.assertEqual(len(woke_at), 1)
+        self.assertGreaterEqual(woke_at[0], 1.0)
+
+    def test_parse_speed(self):
+        self.assertEqual(parse_speed("1000x"), 1000.0)
+        self.assertEqual(parse_speed("20"), 20.0)
+        self.assertIsNone(parse_speed("max"))
+        with self.assertRaises(ValueError):
+            parse_speed("fast")
+
+class TestSimulatedDynamics(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0.0)
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.personality = RobotPersonality(
+            db_path=os.path.join(self.db_dir.name, "memory.db"), clock=self.clock)
+
+    def tearDown(self):
+        self.db_dir.cleanup()
+
+    def test_emotion_wears_off_in_simulated_time(self):
+        self.personality.random_emotion_chance = 0
+        self.personality.set_emotion(Emotion.SCARED)
+
+        # Scared lasts at most 30 seconds, checked every 5
+        for _ in range(400):
+            self.clock.sleep(0.1)
+            self.personality.update()
+
+        self.assertEqual(self.personality.get_emotion(), Emotion.NEUTRAL)
+
+    def test_simulated_hour_reaches_sleep(self):
+        state_machine = RobotStateMachine(ClearPathSensor(), NullMotors(), clock=self.clock)
+        visited = set()
+
+        # One simulated hour of 100 ms ticks
+        for _ in range(36000):
+            state_machine.update()
+            visited.add(state_machine.current_state)
+            self.clock.sleep(0.1)
+
+        self.assertAlmostEqual(self.clock.time(), 3600.0, places=3)
+        self.assertIn(RobotState.SLEEPING, visited)
+
+# Mock classes for testing
+class ClearPathSensor:
+    def measure_distance(self):
+        return 150
+
+class NullMotors:
+    def move_forward(self, speed=1.0):
+        pass
+
+    def move_backward(self, speed=1.0):
+        pass
+
+    def turn_left(self, speed=1.0):
+        pass
+
+    def turn_right(self, speed=1.0):
+        pass
+
+    def stop(self):
+        pass
+
+if __name__ == "__main__":
+    unittest.main()
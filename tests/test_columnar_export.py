@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+import numpy as np
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.memory.columnar_export import ColumnarExporter, load_table, append_npy
+from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+from raspberry_pi.runtime.clock import VirtualClock
+
+START = time.mktime((2026, 3, 1, 12, 0, 0, 0, 0, -1))
+
+class TestColumnarExport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "memory.db")
+        self.out_dir = os.path.join(self.temp_dir.name, "export")
+        self.memory = MemoryStore(self.db_path, threaded=False)
+        self.clock = VirtualClock(start_time=START)
+        self.personality = RobotPersonality(clock=self.clock, memory=self.memory)
+
+    def tearDown(self):
+        self.memory.close()
+        self.temp_dir.cleanup()
+
+    def _log_emotions(self, emotions):
+        for emotion in emotions:
+            self.personality.set_emotion(emotion)
+            self.clock.sleep(90)
+        self.memory.flush()
+
+    def test_columns_and_codes(self):
+        self._log_emotions([Emotion.HAPPY, Emotion.SAD, Emotion.HAPPY])
+        self.personality.learn_response("hello", "wag")
+        self.memory.flush()
+
+        exporter = ColumnarExporter(self.db_path, self.out_dir)
+        self.assertEqual(exporter.export(), {"interactions": 3, "learning": 1})
+
+        table = load_table(self.out_dir, "interactions")
+        emotions = exporter.manifest["dictionaries"]["emotion"]
+        self.assertEqual([emotions[code] for code in table["emotion"]],
+                         [Emotion.HAPPY, Emotion.SAD, Emotion.HAPPY])
+        self.assertEqual(list(table["timestamp"]), [START, START + 90, START + 180])
+        self.assertEqual(table["interaction_type"].dtype, np.int16)
+        self.assertIsInstance(table["id"], np.memmap)
+
+        learning = load_table(self.out_dir, "learning")
+        self.assertEqual(exporter.manifest["dictionaries"]["response"][learning["response"][0]], "wag")
+        self.assertAlmostEqual(float(learning["confidence"][0]), 0.5)
+
+    def test_incremental_append(self):
+        self._log_emotions([Emotion.HAPPY, Emotion.SAD])
+        ColumnarExporter(self.db_path, self.out_dir).export()
+
+        self._log_emotions([Emotion.GRUMPY])
+        written = ColumnarExporter(self.db_path, self.out_dir).export()
+        self.assertEqual(written["interactions"], 1)
+
+        # The same codes keep their meaning across runs
+        exporter = ColumnarExporter(self.db_path, self.out_dir)
+        self.assertEqual(exporter.export()["interactions"], 0)
+        table = load_table(self.out_dir, "interactions")
+        emotions = exporter.manifest["dictionaries"]["emotion"]
+        self.assertEqual([emotions[code] for code in table["emotion"]],
+                         [Emotion.HAPPY, Emotion.SAD, Emotion.GRUMPY])
+        self.assertEqual(list(table["id"]), [1, 2, 3])
+
+    def test_rows_after_pruning_are_exported(self):
+        self._log_emotions([Emotion.HAPPY, Emotion.SAD, Emotion.HAPPY])
+        ColumnarExporter(self.db_path, self.out_dir).export()
+
+        # Retention deletes the newest rows too once they are old enough
+        self.memory.execute("DELETE FROM interactions")
+        self.memory.flush()
+        self._log_emotions([Emotion.GRUMPY])
+
+        self.assertEqual(ColumnarExporter(self.db_path, self.out_dir).export()["interactions"], 1)
+        table = load_table(self.out_dir, "interactions")
+        self.assertEqual(list(table["id"]), [1, 2, 3, 4])
+
+    def test_interrupted_append_is_overwritten(self):
+        path = os.path.join(self.temp_dir.name, "column.npy")
+        append_npy(path, np.arange(3, dtype=np.int64), 0)
+        append_npy(path, np.arange(3, 6, dtype=np.int64), 3)  # Manifest never recorded these
+        append_npy(path, np.array([9], dtype=np.int64), 3)
+
+        self.assertEqual(list(np.load(path)), [0, 1, 2, 9])
+
+    def test_dtype_mismatch_rejected(self):
+        path = os.path.join(self.temp_dir.name, "column.npy")
+        append_npy(path, np.arange(3, dtype=np.int64), 0)
+        with self.assertRaises(ValueError):
+            append_npy(path, np.arange(3, dtype=np.int16), 3)
+
+if __name__ == "__main__":
+    unittest.main()
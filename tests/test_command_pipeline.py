@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.command_pipeline import CommandPipeline
+from raspberry_pi.communication.message_dispatcher import MessageDispatcher
+from raspberry_pi.communication.serial_handler import SerialHandler
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestCommandPipeline(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0)
+        self.link = FakeLink()
+        self.pipeline = CommandPipeline(self.link, clock=self.clock, window=2, timeout=0.3,
+                                        max_retries=2, max_queue=3)
+
+    def test_against_simulated_arduino(self):
+        handler = SerialHandler(simulation=True)
+        handler.running = False  # No simulated distance readings
+        pipeline = CommandPipeline(handler, clock=self.clock)
+        for command in ["FWD", "LFT", "SRV:90", "STP"]:
+            pipeline.send(command)
+
+        stats = pipeline.stats()
+        self.assertEqual((stats["sent"], stats["acked"], stats["in_flight"]), (4, 4, 0))
+        self.assertEqual(stats["rtt_ms"]["p50"], 0.0)
+
+    def test_window_and_ack_matching(self):
+        for command in ["FWD", "LFT", "RGT"]:
+            self.pipeline.send(command)
+        self.assertEqual(self.link.sent, ["FWD#1", "LFT#2"])
+
+        self.clock.advance(0.05)
+        self.link.reply("ACK:LFT#2")
+        self.assertEqual(self.link.sent[-1], "RGT#3")
+
+        self.clock.advance(0.05)
+        self.link.reply("ACK:FWD#1")
+        self.link.reply("ACK:RGT")  # Binary ACKs have no sequence number
+        stats = self.pipeline.stats()
+        self.assertEqual((stats["acked"], stats["in_flight"]), (3, 0))
+        self.assertEqual(self.pipeline.rtt_percentiles((50, 100)), {"p50": 50.0, "p100": 100.0})
+
+    def test_retransmit_then_give_up(self):
+        self.pipeline.send("SRV:45")
+        for _ in range(3):
+            self.clock.advance(0.31)
+            self.pipeline.poll()
+
+        self.assertEqual(self.link.sent, ["SRV:45#1"] * 3)
+        stats = self.pipeline.stats()
+        self.assertEqual((stats["retransmits"], stats["failed"], stats["in_flight"]), (2, 1, 0))
+
+    def test_non_idempotent_not_retransmitted(self):
+        self.pipeline.send("SCAN")
+        self.pipeline.send("FWD:128:300")  # A second copy would restart the timer
+        self.clock.advance(0.31)
+        self.pipeline.poll()
+
+        self.assertEqual(self.link.sent, ["SCAN#1", "FWD:128:300#2"])
+        self.assertEqual(self.pipeline.stats()["failed"], 2)
+
+    def test_stop_jumps_queue(self):
+        for command in ["FWD", "LFT", "RGT", "BCK", "SRV:10"]:
+            self.pipeline.send(command)
+        self.pipeline.send("STP")
+
+        # Sent past the full window; the queued motor commands are obsolete
+        self.assertEqual(self.link.sent, ["FWD#1", "LFT#2", "STP#6"])
+        self.link.reply("ACK:FWD#1")
+        self.link.reply("ACK:LFT#2")
+        self.assertEqual(self.link.sent[-1], "SRV:10#5")
+
+    def test_superseded_command_not_resent(self):
+        self.pipeline.send("FWD")
+        self.pipeline.send("STP")
+        self.link.reply("ACK:STP#2")
+        self.clock.advance(0.31)
+        self.pipeline.poll()
+
+        # Resending FWD now would undo the stop
+        self.assertEqual(self.link.sent, ["FWD#1", "STP#2"])
+        self.assertEqual(self.pipeline.stats()["superseded"], 1)
+
+    def test_queue_overflow_and_rejection(self):
+        for command in ["FWD", "BCK", "LFT", "RGT", "SRV:1", "SRV:2"]:
+            self.pipeline.send(command)
+        self.assertEqual(self.pipeline.stats()["dropped"], 1)
+
+        self.link.reply("ERR:UNKNOWN_CMD:FWD#1")
+        self.assertEqual(self.pipeline.stats()["failed"], 1)
+
+    def test_unacknowledged_commands_pass_through(self):
+        self.assertIsNone(self.pipeline.send("BAT"))
+        self.assertEqual(self.link.sent, ["BAT"])
+        self.assertEqual(self.pipeline.stats()["in_flight"], 0)
+
+# Mock classes for testing
+class FakeLink:
+    """Serial handler stand-in that only answers when told to"""
+
+    def __init__(self):
+        self.dispatcher = MessageDispatcher()
+        self.sent = []
+
+    def subscribe(self, types, callback):
+        self.dispatcher.subscribe(types, callback)
+
+    def send_command(self, command):
+        self.sent.append(command)
+        return True
+
+    def reply(self, line):
+        self.dispatcher.publish(self.dispatcher.parse(line))
+
+if __name__ == "__main__":
+    unittest.main()
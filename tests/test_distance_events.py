@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import random
+import threading
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.communication.serial_handler import SerialHandler
+from raspberry_pi.runtime.clock import VirtualClock
+from fakes import MockPushSensor, MockMotors
+
+class TestDistanceEvents(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0.0)
+        self.sensor = MockPushSensor()
+        self.motors = MockMotors()
+        self.state_machine = RobotStateMachine(self.sensor, self.motors, clock=self.clock,
+                                               rng=random.Random(3))
+
+    def test_obstacle_reaction_without_update(self):
+        self.state_machine.transition_to(RobotState.ROAMING)
+        self.sensor.push(10)
+
+        # Avoidance starts from the push itself, no tick needed
+        self.assertEqual(self.state_machine.current_state, RobotState.AVOIDING)
+        self.assertEqual(self.motors.last_action, "stop")
+        self.assertTrue(self.state_machine.motion.is_busy())
+
+    def test_update_does_not_poll_push_sensor(self):
+        for _ in range(20):
+            self.state_machine.update()
+            self.clock.sleep(0.1)
+
+        self.assertEqual(self.sensor.measurements, 0)
+
+    def test_clear_reading_ends_avoidance(self):
+        self.state_machine.transition_to(RobotState.ROAMING)
+        self.sensor.push(10)
+        self.sensor.push(100)
+
+        # Back to roaming once the stop-and-turn has played out
+        for _ in range(20):
+            self.clock.sleep(0.1)
+            self.state_machine.update()
+
+        self.assertEqual(self.state_machine.current_state, RobotState.ROAMING)
+
+    def test_transition_waits_for_pushed_reading(self):
+        # A voice command thread must not switch state mid-reaction
+        self.state_machine.transition_to(RobotState.ROAMING)
+        done = threading.Event()
+        with self.state_machine.lock:
+            voice = threading.Thread(
+                target=lambda: (self.state_machine.transition_to(RobotState.IDLE), done.set()))
+            voice.start()
+            self.assertFalse(done.wait(0.1))
+            self.assertEqual(self.state_machine.current_state, RobotState.ROAMING)
+        voice.join(timeout=1.0)
+        self.assertEqual(self.state_machine.current_state, RobotState.IDLE)
+
+    def test_serial_handler_pushes_distance(self):
+        serial = SerialHandler(simulation=True)
+        readings = []
+        try:
+            serial.subscribe_distance(readings.append)
+            serial._process_data("DIST:12")
+            serial._process_data("DIST:bad")
+        finally:
+            serial.disconnect()
+
+        self.assertIn(12, readings)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.distance_filter import DistanceFilter
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.runtime.clock import VirtualClock
+from fakes import MockPushSensor, MockMotors, AlwaysRandom
+
+class TestDistanceFilter(unittest.TestCase):
+    def _feed(self, distance_filter, readings, interval=0.1):
+        outputs = []
+        for index, reading in enumerate(readings):
+            outputs.append(distance_filter.update(reading, now=index * interval))
+        return outputs
+
+    def test_median_ignores_single_glitch(self):
+        outputs = self._feed(DistanceFilter("median", window=3), [100, 100, 12, 100, 100])
+        self.assertEqual(outputs, [100, 100, 100, 100, 100])
+
+    def test_ema_smooths(self):
+        outputs = self._feed(DistanceFilter("ema", alpha=0.5), [100, 50, 50])
+        self.assertEqual(outputs, [100, 75, 62.5])
+
+    def test_kalman_tracks_approach(self):
+        distance_filter = DistanceFilter()
+        # Closing in at 50 cm/s with +-1 cm of noise
+        readings = [150 - 5 * step + (1 if step % 2 else -1) for step in range(20)]
+        self._feed(distance_filter, readings)
+
+        self.assertAlmostEqual(distance_filter.distance, 55, delta=3)
+        self.assertAlmostEqual(distance_filter.closing_rate(), 50, delta=10)
+        self.assertEqual(distance_filter.outliers, 0)
+
+    def test_kalman_rejects_glitch_but_follows_real_jump(self):
+        distance_filter = DistanceFilter()
+        self._feed(distance_filter, [100] * 10 + [15, 100, 100])
+        self.assertEqual(distance_filter.outliers, 1)
+        self.assertAlmostEqual(distance_filter.distance, 100, delta=1)
+        self.assertEqual(distance_filter.closing_rate(), 0.0)
+
+        # Two readings in agreement mean something is really there
+        distance_filter.update(30, now=1.3)
+        distance_filter.update(31, now=1.4)
+        self.assertEqual(distance_filter.distance, 31)
+        self.assertGreater(distance_filter.closing_rate(), 100)
+
+    def test_kalman_settles_after_step(self):
+        distance_filter = DistanceFilter()
+        self._feed(distance_filter, [150] * 20)
+        for step in range(30):
+            distance_filter.update(30, now=2.0 + step * 0.1)
+
+        # Only the first reading of the step is held back until it is confirmed
+        self.assertEqual(distance_filter.outliers, 1)
+        self.assertAlmostEqual(distance_filter.distance, 30, delta=0.5)
+        self.assertAlmostEqual(distance_filter.velocity, 0, delta=1)
+        self.assertEqual(distance_filter.closing_rate(), 0.0)
+
+    def test_timeouts_and_age(self):
+        clock = VirtualClock(start_time=0.0)
+        distance_filter = DistanceFilter(clock=clock)
+        self.assertEqual(distance_filter.age(), float("inf"))
+
+        distance_filter.update(80)
+        clock.advance(0.5)
+        distance_filter.update(0)    # No echo
+        distance_filter.update(999)  # Out of range
+
+        self.assertEqual(distance_filter.distance, 80)
+        self.assertEqual(distance_filter.invalid, 2)
+        self.assertAlmostEqual(distance_filter.age(), 0.5)
+
+class TestStartle(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0.0)
+        self.sensor = MockPushSensor()
+        self.state_machine = RobotStateMachine(self.sensor, MockMotors(), clock=self.clock,
+                                               rng=AlwaysRandom())
+        self.state_machine.transition_to(RobotState.ROAMING)
+
+    def _push(self, readings):
+        for reading in readings:
+            self.clock.advance(0.1)
+            self.sensor.push(reading)
+
+    def test_glitch_does_not_startle(self):
+        self._push([100] * 10 + [30, 100, 100])
+        self.assertEqual(self.state_machine.current_state, RobotState.ROAMING)
+
+    def test_sudden_obstacle_startles(self):
+        self._push([100] * 10 + [30, 30])
+        self.assertEqual(self.state_machine.current_state, RobotState.STARTLED)
+
+if __name__ == "__main__":
+    unittest.main()
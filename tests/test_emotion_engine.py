@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.emotion_engine import EmotionEngine, NEVER
+from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestEmotionEngine(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0.0)
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.memory = MemoryStore(os.path.join(self.db_dir.name, "memory.db"), threaded=False)
+
+    def tearDown(self):
+        self.memory.close()
+        self.db_dir.cleanup()
+
+    def _engine(self, **kwargs):
+        return EmotionEngine("neutral", {"scared": (10, 30)}, {"scared": (-0.8, 0.8)},
+                             clock=self.clock, rng=random.Random(1), **kwargs)
+
+    def test_expiry_drawn_once_and_exact(self):
+        personality = RobotPersonality(clock=self.clock, memory=self.memory, rng=CountingRandom(2))
+        personality.random_emotion_chance = 0
+        personality.set_emotion(Emotion.SCARED)
+        deadline = personality.emotions.expires_at
+        draws = personality.rng.draws
+
+        # Scared until the deadline to the tick, then neutral
+        while self.clock.time() + 0.1 < deadline:
+            self.clock.sleep(0.1)
+            personality.update()
+            self.assertEqual(personality.get_emotion(), Emotion.SCARED)
+        self.clock.sleep(0.1)
+        personality.update()
+
+        self.assertEqual(personality.get_emotion(), Emotion.NEUTRAL)
+        self.assertLessEqual(10, deadline)
+        self.assertLessEqual(deadline, 30)
+        self.assertEqual(personality.rng.draws, draws)  # No draws while waiting
+
+    def test_neutral_never_expires(self):
+        engine = self._engine(random_chance=0)
+        engine.set("neutral")
+
+        self.assertEqual(engine.expires_at, NEVER)
+        self.assertFalse(engine.due(1e9))
+
+    def test_intensity_decays_in_closed_form(self):
+        engine = self._engine(random_chance=0, half_life=10.0)
+        engine.set("scared")
+
+        self.assertAlmostEqual(engine.intensity(0.0), 1.0)
+        self.assertAlmostEqual(engine.intensity(10.0), 0.5)
+        self.assertAlmostEqual(engine.intensity(20.0), 0.25)
+        valence, arousal = engine.valence_arousal(10.0)
+        self.assertAlmostEqual(valence, -0.4)
+        self.assertAlmostEqual(arousal, 0.4)
+
+    def test_random_mood_matches_per_check_chance(self):
+        engine = self._engine(random_chance=0.01, check_interval=5.0)
+        waits = []
+        for _ in range(5000):
+            engine.schedule_random_mood(0.0)
+            waits.append(engine.next_random_mood)
+
+        # Whole checks apart, on average 1 / 0.01 checks
+        self.assertTrue(all(wait % 5.0 == 0 and wait >= 5.0 for wait in waits))
+        self.assertAlmostEqual(sum(waits) / len(waits) / 5.0, 100, delta=5)
+
+    def test_setting_chance_reschedules(self):
+        engine = self._engine(random_chance=0.01)
+        engine.random_chance = 0
+        self.assertEqual(engine.next_random_mood, NEVER)
+
+        engine.random_chance = 1.0
+        self.assertEqual(engine.next_random_mood, 5.0)
+
+class CountingRandom(random.Random):
+    """Random that counts draws"""
+    draws = 0
+
+    def random(self):
+        self.draws += 1
+        return super().random()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from simulation.fleet_simulator import FleetSimulator, STATES, STATE_CODES
+from raspberry_pi.behavior.state_machine import RobotState
+
+class TestFleetSimulator(unittest.TestCase):
+    def test_metrics_and_states_stay_valid(self):
+        fleet = FleetSimulator(500, seed=1)
+        fleet.run(300)
+
+        for metric in [fleet.boredom, fleet.curiosity, fleet.tiredness]:
+            self.assertTrue(np.all((metric >= 0) & (metric <= 100)))
+        self.assertTrue(np.all((fleet.state >= 0) & (fleet.state < len(STATES))))
+
+        # Without obstacles the robot never avoids or gets startled
+        fractions = fleet.summary()
+        self.assertEqual(fractions[RobotState.AVOIDING], 0.0)
+        self.assertEqual(fractions[RobotState.STARTLED], 0.0)
+        self.assertAlmostEqual(sum(fractions.values()), 1.0)
+
+    def test_seed_is_reproducible(self):
+        first = FleetSimulator(200, seed=7)
+        second = FleetSimulator(200, seed=7)
+        first.run(60)
+        second.run(60)
+
+        np.testing.assert_array_equal(first.state, second.state)
+        np.testing.assert_array_equal(first.occupancy, second.occupancy)
+
+    def test_trait_ranges_are_respected(self):
+        fleet = FleetSimulator(1000, trait_ranges={"activeness": (9, 10)}, seed=3)
+        self.assertTrue(np.all((fleet.traits["activeness"] >= 9) & (fleet.traits["activeness"] <= 10)))
+        self.assertTrue(np.all((fleet.traits["patience"] >= 2) & (fleet.traits["patience"] <= 10)))
+
+    def test_boredom_threshold_starts_play(self):
+        fleet = FleetSimulator(10, seed=5, random_behaviors=False)
+        fleet.boredom[:] = 99
+        fleet.step()
+
+        self.assertTrue(np.all(fleet.state == STATE_CODES[RobotState.PLAYING]))
+        self.assertTrue(np.all(fleet.boredom == 0))
+
+if __name__ == "__main__":
+    unittest.main()
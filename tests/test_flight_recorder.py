@@ -0,0 +1,151 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from raspberry_pi.runtime.flight_recorder import (
+    FlightRecorder, read_session, encode_payload, decode_payload,
+    SESSION, TICK, DIST, POLL, VOICE, STATE, MOTOR_CMD, SCAN, SCAN_END, LINK, OUTPUT_KINDS
+)
+from raspberry_pi.behavior.pet_behaviors import create_pet, component_rng
+from raspberry_pi.behavior.scan_aggregator import ScanAggregator
+from raspberry_pi.audio.command_processor import CommandProcessor
+from raspberry_pi.runtime.clock import VirtualClock
+from replay_session import SessionReplayer
+from fakes import MockPushSensor, MockPollSensor, MockMotors, FakeLink
+
+class TestFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.temp_dir.name, "session.dwfr")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_payload_round_trip(self):
+        cases = [
+            (SESSION, {"seed": 7, "push_sensor": True}),
+            (DIST, 12.5),
+            (POLL, 150.0),
+            (VOICE, "come here"),
+            (STATE, "roaming"),
+            (MOTOR_CMD, ("turn_left", 0.6)),
+            (MOTOR_CMD, ("stop", None)),
+            (SCAN, (45, 120)),
+            (SCAN_END, None),
+            (LINK, "degraded:port closed"),
+        ]
+        for kind, payload in cases:
+            self.assertEqual(decode_payload(kind, encode_payload(kind, payload)), payload)
+
+    def test_push_sensor_session_replays_identically(self):
+        self._record_session(push_sensor=True, seed=42)
+        self._assert_replay_identical()
+
+    def test_polled_sensor_session_replays_identically(self):
+        self._record_session(push_sensor=False, seed=1234)
+        self._assert_replay_identical()
+
+    def test_scan_driven_avoidance_replays_identically(self):
+        scans = self._record_session(push_sensor=True, seed=42, seconds=60, scanner=True)
+        self._assert_replay_identical()
+
+        events = list(read_session(self.log_path))
+        self.assertTrue(events[0][2]["scanner"])
+        self.assertGreater(scans["sweeps"], 0)
+        result = SessionReplayer(self.log_path).run()
+        self.assertEqual(result["inputs"]["scan_end"], scans["sweeps"])
+        self.assertEqual(result["scans"]["readings"], scans["readings"])
+
+        # The right half is blocked in every sweep, so the turn after one goes left
+        first_sweep = next(index for index, event in enumerate(events) if event[0] == SCAN_END)
+        turns = [payload[0] for kind, _, payload in events[first_sweep:]
+                 if kind == MOTOR_CMD and payload[0].startswith("turn")]
+        self.assertEqual(turns[0], "turn_left")
+
+    def test_link_drops_replay_identically(self):
+        self._record_session(push_sensor=True, seed=7, seconds=60, link_drops=True)
+        self._assert_replay_identical()
+
+        result = SessionReplayer(self.log_path).run()
+        self.assertEqual(result["inputs"]["link"], 4)
+
+    def test_truncated_log_is_readable(self):
+        self._record_session(push_sensor=True, seed=5, seconds=5)
+        with open(self.log_path, "ab") as f:
+            f.write(b"\x01\x00\x00")  # Half-written record from a crash
+
+        events = list(read_session(self.log_path))
+        self.assertEqual(events[0][0], SESSION)
+        self.assertEqual(events[0][2]["seed"], 5)
+
+    def _assert_replay_identical(self):
+        recorded = [event for event in read_session(self.log_path) if event[0] in OUTPUT_KINDS]
+        result = SessionReplayer(self.log_path).run()
+
+        self.assertTrue(result["identical"], result["first_mismatch"])
+        self.assertEqual(result["replayed_outputs"], len(recorded))
+        self.assertTrue(any(kind == MOTOR_CMD for kind, _, _ in recorded))
+
+    def _record_session(self, push_sensor, seed, seconds=120, scanner=False, link_drops=False):
+        """Drive a pet the way PetRobot does, with a recorder attached"""
+        clock = VirtualClock(start_time=1000.0)
+        recorder = FlightRecorder(self.log_path, clock)
+        sensor = recorder.wrap_sensor(MockPushSensor(120) if push_sensor else MockPollSensor(120))
+        motors = recorder.wrap_motors(MockMotors())
+        link = FakeLink(clock)
+        if scanner:
+            scanner = ScanAggregator(recorder.wrap_link(link), clock=recorder.clock)
+
+        session = {"seed": seed, "push_sensor": push_sensor, "simulation": True,
+                   "scanner": bool(scanner)}
+        with recorder.input(SESSION, session):
+            personality, state_machine, behaviors = create_pet(
+                sensor, motors, recorder.clock, seed,
+                db_path=os.path.join(self.temp_dir.name, "memory.db"),
+                scanner=scanner or None)
+            recorder.watch(state_machine, personality)
+        command_processor = CommandProcessor(state_machine=state_machine,
+                                             personality=personality,
+                                             rng=component_rng(seed, "commands"),
+                                             recorder=recorder)
+
+        # Inputs arrive on their own schedule, unrelated to the seed
+        commands = {50: "come", 300: "play", 700: "stop", 1000: "dance"}
+        # As PetRobot's LinkSupervisor callbacks log them
+        drops = {120: "degraded:no reading for 2.0s", 160: "restored",
+                 400: "degraded:port closed", 430: "restored"} if link_drops else {}
+        for tick in range(int(seconds * 10)):
+            if push_sensor and tick % 3 == 0:
+                sensor.sensor.push(15 if tick % 90 < 6 else 120)
+            elif not push_sensor:
+                sensor.sensor.distance = 15 if tick % 90 < 6 else 120
+            if tick in commands:
+                command_processor.handle_command(commands[tick])
+            if tick in drops:
+                with recorder.input(LINK, drops[tick]):
+                    if drops[tick] == "restored":
+                        state_machine.resume()
+                    else:
+                        state_machine.safe_stop("serial link " + drops[tick].partition(":")[2])
+            if link.sent_at and clock.time() >= link.sent_at[0] + 0.45:
+                # Sweeps come back about half a second after they are asked for
+                link.sent_at.clear()
+                link.sweep([200] * 7 + [30] * 6)
+
+            with recorder.input(TICK):
+                personality.update()
+                state_machine.update()
+                behaviors.check_for_random_behaviors()
+            clock.sleep(0.1)
+
+        personality.close()
+        recorder.close()
+        return scanner.stats() if scanner else None
+
+if __name__ == "__main__":
+    unittest.main()
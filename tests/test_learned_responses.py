@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.memory.learned_responses import LearnedResponses
+from raspberry_pi.behavior.robot_personality import RobotPersonality
+from raspberry_pi.audio.command_processor import CommandProcessor
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestLearnedResponses(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.db_dir.name, "memory.db")
+        self.memory = MemoryStore(self.db_path, threaded=False)
+
+    def tearDown(self):
+        self.memory.close()
+        self.db_dir.cleanup()
+
+    def test_repeat_lookups_are_cache_hits(self):
+        cache = LearnedResponses(self.memory)
+        cache.learn("hello", "wag")
+        for _ in range(100):
+            self.assertEqual(cache.lookup("hello"), ("wag", 0.5))
+
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_unknown_keywords_are_cached(self):
+        cache = LearnedResponses(self.memory)
+        self.assertIsNone(cache.lookup("nothing"))
+        self.assertIsNone(cache.lookup("nothing"))
+
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_write_through_matches_database(self):
+        cache = LearnedResponses(self.memory)
+        for response in ["wag", "spin", "bark"]:
+            cache.learn("hello", response)
+        self.memory.flush()
+
+        row = self.memory.fetchone(
+            "SELECT response, confidence, times_used FROM learning WHERE keyword=?", ("hello",))
+        self.assertEqual(row[0], "bark")
+        self.assertAlmostEqual(row[1], 0.7)
+        self.assertEqual(row[2], 3)
+        self.assertEqual(cache.lookup("hello")[0], "bark")
+        self.assertAlmostEqual(cache.lookup("hello")[1], 0.7)
+
+    def test_evicted_keyword_reloads_latest(self):
+        cache = LearnedResponses(self.memory, capacity=2)
+        cache.learn("hello", "wag")
+        cache.learn("hello", "spin")  # Still queued when evicted
+        cache.lookup("a")
+        cache.lookup("b")
+
+        self.assertNotIn("hello", cache.entries)
+        self.assertEqual(cache.lookup("hello")[0], "spin")
+        self.assertAlmostEqual(cache.lookup("hello")[1], 0.6)
+        # Answered without waiting for the writer
+        self.assertEqual(self.memory.stats()["pending"], 2)
+
+        self.memory.flush()
+        self.assertEqual(cache.unwritten, {})
+        cache.lookup("a")
+        cache.lookup("b")
+        self.assertAlmostEqual(cache.lookup("hello")[1], 0.6)
+
+    def test_miss_does_not_flush(self):
+        cache = LearnedResponses(self.memory)
+        self.memory.execute("INSERT INTO learning (keyword, response, confidence, times_used) "
+                            "VALUES ('queued', 'wag', 0.5, 1)")
+        self.assertIsNone(cache.lookup("other"))
+
+        self.assertEqual(self.memory.stats()["pending"], 1)
+
+    def test_one_row_per_keyword(self):
+        for _ in range(3):
+            self.memory.execute("INSERT INTO learning (keyword, response, confidence, times_used) "
+                                "VALUES ('hi', 'old', 0.5, 1)")
+            self.memory.flush()
+
+        # The duplicate insert fails against the unique index
+        self.assertEqual(self.memory.fetchone("SELECT COUNT(*) FROM learning")[0], 1)
+
+    def test_command_processor_uses_learned_phrase(self):
+        personality = RobotPersonality(clock=VirtualClock(start_time=0.0), memory=self.memory)
+        personality.learn_response("lie down", "sleep")
+        state_machine = MockStateMachine()
+        processor = CommandProcessor(state_machine=state_machine, personality=personality)
+
+        processor.handle_command("lie down")
+
+        self.assertEqual(state_machine.transitions, ["sleeping"])
+
+# Mock classes for testing
+class MockStateMachine:
+    current_state = "idle"
+
+    def __init__(self):
+        self.transitions = []
+
+    def transition_to(self, state):
+        self.transitions.append(state)
+
+if __name__ == "__main__":
+    unittest.main()
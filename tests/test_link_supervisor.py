@@ -0,0 +1,159 @@
+import unittest
+import sys
+import os
+import random
+import threading
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.link_supervisor import LinkSupervisor, OK, DEGRADED, DISCONNECTED
+from raspberry_pi.communication.message_dispatcher import LINK
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.runtime.clock import VirtualClock
+from raspberry_pi.runtime.async_runtime import AsyncRuntime
+from fakes import FakeLink, MockPollSensor, MockMotors
+
+class TestLinkSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0.0)
+        self.serial = FakeSerial(self.clock)
+        self.events = []
+        self.supervisor = LinkSupervisor(
+            self.serial, clock=self.clock, ping_interval=1.0, pong_timeout=0.5, max_missed=3,
+            stale_after=2.0, reopen_after=5.0, backoff_initial=0.5, backoff_max=4.0,
+            on_degraded=lambda reason: self.events.append("degraded"),
+            on_restored=lambda: self.events.append("restored"),
+            on_reset=lambda: self.events.append("reset"))
+
+    def _run(self, seconds, answer=True, readings=True):
+        """Check every 0.1s; the fake Arduino answers PINGs and streams readings"""
+        for _ in range(int(round(seconds * 10))):
+            self.clock.advance(0.1)
+            if readings and self.serial.connected:
+                self.serial.reply("DIST:80")
+            self.supervisor.check()
+            if answer and self.serial.connected and self.serial.sent:
+                self.clock.advance(0.01)
+                self.serial.reply("PONG")
+                self.serial.sent.clear()
+
+    def test_healthy_link_measures_rtt(self):
+        self._run(3)
+        stats = self.supervisor.stats()
+        self.assertEqual(stats["state"], OK)
+        self.assertEqual(stats["pings"], 3)
+        self.assertEqual(stats["pongs"], 3)
+        self.assertAlmostEqual(stats["rtt_ms"], 10.0)
+        self.assertEqual(self.events, [])
+
+    def test_missing_pongs_degrade(self):
+        self._run(4, answer=False)
+        self.assertEqual(self.supervisor.state, DEGRADED)
+        self.assertEqual(self.events, ["degraded"])
+
+        self._run(1)
+        self.assertEqual(self.supervisor.state, OK)
+        self.assertEqual(self.events, ["degraded", "restored"])
+
+    def test_stale_readings_degrade_then_reopen(self):
+        self._run(2.5, readings=False)
+        self.assertEqual(self.supervisor.state, DEGRADED)
+        self.assertIn("no reading", self.supervisor.reason)
+
+        self._run(5, readings=False)
+        self.assertEqual(self.supervisor.stats()["reconnects"], 1)
+
+    def test_reconnect_with_backoff(self):
+        self._run(1)
+        self.serial.connected = False
+        self.serial.reconnect_results = [False, False, False, True]
+        self._run(0.1)
+        self.assertEqual(self.supervisor.state, DISCONNECTED)
+
+        # Retries after 0.5s, 1s then 2s (checked every 0.1s)
+        self._run(3.7, readings=False, answer=False)
+        times = self.serial.attempt_times
+        self.assertEqual(len(times), 4)
+        for gap, expected in zip([b - a for a, b in zip(times, times[1:])], [0.5, 1.0, 2.0]):
+            self.assertAlmostEqual(gap, expected, delta=0.11)
+        self.assertEqual(self.supervisor.state, DEGRADED)
+        self.assertEqual(self.supervisor.reason, "waiting for Arduino")
+
+        # The board resets on open and says hello
+        self.serial.reply("ARDUINO:READY")
+        self._run(0.5)
+        stats = self.supervisor.stats()
+        self.assertEqual(stats["state"], OK)
+        self.assertEqual((stats["reconnects"], stats["reconnect_failures"], stats["resets"]), (1, 3, 1))
+        self.assertEqual(self.events, ["degraded", "reset", "restored"])
+
+    def test_reconnect_runs_off_the_event_loop(self):
+        runtime = AsyncRuntime(clock=self.clock)
+        self.serial.connected = False
+
+        async def main_loop():
+            while not self.supervisor.reconnects:
+                await self.clock.sleep_async(0.1)
+            runtime.stop()
+
+        runtime.spawn("link", self.supervisor.run_async())
+        runtime.spawn("main_loop", main_loop(), driver=True)
+        runtime.run()
+
+        self.assertNotIn(threading.current_thread(), self.serial.attempt_threads)
+        self.assertEqual(self.supervisor.stats()["reconnects"], 1)
+
+    def test_backoff_counts_from_end_of_slow_reopen(self):
+        self.serial.connected = False
+        self.serial.reconnect_results = [False]
+        self.serial.reconnect_time = 3.0
+        self.supervisor.check()
+
+        # The next attempt is backoff_initial after the 3 s open gave up
+        self.assertAlmostEqual(self.supervisor.next_attempt, 3.5)
+
+    def test_metrics_published(self):
+        link = []
+        self.serial.dispatcher.subscribe(LINK, link.append)
+        self._run(6)
+        self.assertEqual(link[-1].values[0]["state"], OK)
+        self.assertGreaterEqual(len(link), 1)
+
+class TestSafeStop(unittest.TestCase):
+    def test_safe_stop_freezes_state_machine(self):
+        clock = VirtualClock(start_time=0.0)
+        motors = MockMotors()
+        state_machine = RobotStateMachine(MockPollSensor(), motors, clock=clock, rng=random.Random(1))
+        state_machine.transition_to(RobotState.ROAMING)
+
+        state_machine.safe_stop("serial link degraded")
+        self.assertEqual(motors.last_action, "stop")
+        for _ in range(50):
+            clock.advance(0.1)
+            state_machine.update()
+        self.assertEqual(motors.commands, ["stop"])
+
+        state_machine.resume()
+        self.assertIsNone(state_machine.safe_stop_reason)
+        self.assertEqual(state_machine.current_state, RobotState.IDLE)
+
+# Mock classes for testing
+class FakeSerial(FakeLink):
+    def __init__(self, clock):
+        FakeLink.__init__(self, clock)
+        self.connected = True
+        self.reconnect_results = []
+        self.attempt_times = []
+        self.attempt_threads = []
+        self.reconnect_time = 0.0
+
+    def reconnect(self):
+        self.attempt_times.append(self.clock.time())
+        self.clock.advance(self.reconnect_time)
+        self.attempt_threads.append(threading.current_thread())
+        self.connected = self.reconnect_results.pop(0) if self.reconnect_results else True
+        return self.connected
+
+if __name__ == "__main__":
+    unittest.main()
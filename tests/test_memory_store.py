@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestMemoryStore(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.db_dir.name, "memory.db")
+
+    def tearDown(self):
+        self.db_dir.cleanup()
+
+    def test_writes_are_batched_into_one_transaction(self):
+        store = MemoryStore(self.db_path, threaded=False)
+        for i in range(50):
+            store.execute("INSERT INTO interactions (details) VALUES (?)", (f"event {i}",))
+
+        # Nothing written until the writer flushes
+        self.assertEqual(store.fetchone("SELECT COUNT(*) FROM interactions")[0], 0)
+        store.flush()
+
+        self.assertEqual(store.fetchone("SELECT COUNT(*) FROM interactions")[0], 50)
+        self.assertEqual(store.stats()["transactions"], 1)
+        store.close()
+
+    def test_old_interactions_table_is_upgraded(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE interactions (id INTEGER PRIMARY KEY, timestamp TEXT, "
+                     "interaction_type TEXT, details TEXT, emotion TEXT)")
+        conn.executemany("INSERT INTO interactions (details) VALUES (?)", [("a",), ("b",), ("c",)])
+        conn.execute("DELETE FROM interactions WHERE id = 3")
+        conn.commit()
+        conn.close()
+
+        store = MemoryStore(self.db_path, threaded=False)
+        self.assertEqual(store.fetchall("SELECT id, details, rolled_up FROM interactions"),
+                         [(1, "a", 0), (2, "b", 0)])
+        store.execute("DELETE FROM interactions WHERE id = 2")
+        store.execute("INSERT INTO interactions (details) VALUES ('d')")
+        store.close()
+
+        # Reopening leaves it alone; the pruned id is not reused
+        store = MemoryStore(self.db_path, threaded=False)
+        self.assertEqual(store.fetchall("SELECT id FROM interactions"), [(1,), (3,)])
+        indexes = [row[0] for row in store.fetchall(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'interactions'")]
+        self.assertIn("idx_interactions_timestamp", indexes)
+        store.close()
+
+    def test_wal_mode(self):
+        store = MemoryStore(self.db_path, threaded=False)
+        self.assertEqual(store.fetchone("PRAGMA journal_mode")[0], "wal")
+        store.close()
+
+    def test_bounded_queue_drops_oldest(self):
+        store = MemoryStore(self.db_path, max_pending=10, threaded=False)
+        for i in range(25):
+            store.execute("INSERT INTO interactions (details) VALUES (?)", (str(i),))
+        store.flush()
+
+        rows = store.fetchall("SELECT details FROM interactions ORDER BY id")
+        self.assertEqual([row[0] for row in rows], [str(i) for i in range(15, 25)])
+        self.assertEqual(store.stats()["dropped"], 15)
+        store.close()
+
+    def test_close_flushes_pending_writes(self):
+        store = MemoryStore(self.db_path, flush_interval=60.0)
+        store.execute("INSERT INTO interactions (details) VALUES (?)", ("goodbye",))
+        store.close()
+
+        reopened = MemoryStore(self.db_path, threaded=False)
+        self.assertEqual(reopened.fetchone("SELECT details FROM interactions")[0], "goodbye")
+        reopened.close()
+
+    def test_failed_batch_is_rolled_back(self):
+        store = MemoryStore(self.db_path, threaded=False)
+        store.execute("INSERT INTO interactions (details) VALUES (?)", ("kept?",))
+        store.execute("INSERT INTO missing_table VALUES (1)")
+        store.flush()
+
+        self.assertEqual(store.fetchone("SELECT COUNT(*) FROM interactions")[0], 0)
+        self.assertEqual(store.stats()["failed"], 2)
+        store.close()
+
+    def test_personality_memories(self):
+        memory = MemoryStore(self.db_path, threaded=False)
+        personality = RobotPersonality(clock=VirtualClock(start_time=0.0), memory=memory)
+        personality.set_emotion(Emotion.HAPPY)
+        personality.learn_response("hello", "wag")
+        personality.learn_response("hello", "spin")
+        memory.flush()
+
+        self.assertEqual(personality.get_learned_response("hello"), "spin")
+        self.assertEqual(memory.fetchone("SELECT confidence, times_used FROM learning")[1], 2)
+        self.assertEqual(memory.fetchone("SELECT emotion FROM interactions")[0], Emotion.HAPPY)
+        personality.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.binary_protocol import encode_message, FrameDecoder, MSG_ACK, MSG_SCAN, COMMAND_CODES
+from raspberry_pi.communication.message_dispatcher import (
+    MessageDispatcher, DIST, SCAN, SCAN_END, BAT, ACK, ERR, READY, ALL, DROP_NEWEST
+)
+from raspberry_pi.communication.serial_handler import SerialHandler
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestMessageDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=1000)
+        self.dispatcher = MessageDispatcher(clock=self.clock)
+
+    def _publish(self, *lines):
+        for line in lines:
+            message = self.dispatcher.parse(line)
+            if message is not None:
+                self.dispatcher.publish(message)
+
+    def test_lines_parsed_once(self):
+        messages = [self.dispatcher.parse(line) for line in
+                    ["DIST:42", "SCAN:90:300", "SCAN:END", "BAT:77", "ACK:FWD",
+                     "ARDUINO:READY", "ERR:UNKNOWN_CMD:PROTO:BIN1"]]
+        self.assertEqual([(message.type, message.values) for message in messages],
+                         [(DIST, (42,)), (SCAN, (90, 300)), (SCAN_END, ()), (BAT, (77,)),
+                          (ACK, ("FWD",)), (READY, ()), (ERR, ("UNKNOWN_CMD", "PROTO:BIN1"))])
+        self.assertEqual(messages[0].time, 1000)
+
+    def test_malformed_lines_counted(self):
+        seen = []
+        self.dispatcher.subscribe(ALL, seen.append)
+        self._publish("DIST:abc", "SCAN:90", "DIST:5")
+
+        self.assertEqual([message.line for message in seen], ["DIST:5"])
+        self.assertEqual(self.dispatcher.stats()["parse_errors"], 2)
+
+    def test_typed_subscriptions_and_latest(self):
+        distances = []
+        acks = []
+        self.dispatcher.subscribe(DIST, lambda message: distances.append(message.values[0]))
+        self.dispatcher.subscribe([ACK, ERR], acks.append)
+        self._publish("DIST:10", "ACK:STP", "BAT:50", "DIST:20", "ERR:UNKNOWN_CMD:X")
+
+        self.assertEqual(distances, [10, 20])
+        self.assertEqual([message.type for message in acks], [ACK, ERR])
+        self.assertEqual(self.dispatcher.latest(DIST).values, (20,))
+        self.assertEqual(self.dispatcher.latest(BAT).values, (50,))
+        self.assertIsNone(self.dispatcher.latest(SCAN))
+        self.assertEqual(self.dispatcher.stats()["messages"][DIST], 2)
+
+    def test_ring_buffer_drop_policies(self):
+        freshest = self.dispatcher.buffer(DIST, maxlen=3)
+        earliest = self.dispatcher.buffer(DIST, maxlen=3, policy=DROP_NEWEST)
+        self._publish(*[f"DIST:{value}" for value in range(5)])
+
+        self.assertEqual([message.values[0] for message in freshest.drain()], [2, 3, 4])
+        self.assertEqual([message.values[0] for message in earliest.drain()], [0, 1, 2])
+        self.assertEqual(freshest.dropped + earliest.dropped, 4)
+        self.assertEqual(self.dispatcher.stats()["dropped"], 4)
+        self.assertIsNone(freshest.get())
+
+    def test_failing_subscriber_is_isolated(self):
+        seen = []
+        self.dispatcher.subscribe(DIST, lambda message: 1 / 0)
+        self.dispatcher.subscribe(DIST, seen.append)
+        self._publish("DIST:1")
+
+        self.assertEqual(len(seen), 1)
+        self.assertEqual(self.dispatcher.stats()["callback_errors"], 1)
+
+    def test_binary_frames_match_text(self):
+        decoder = FrameDecoder()
+        frames = decoder.feed(encode_message(MSG_SCAN, 45, 120) +
+                              encode_message(MSG_ACK, COMMAND_CODES["LFT"]))
+        messages = [self.dispatcher.from_frame(*frame) for frame in frames]
+
+        self.assertEqual([(message.type, message.values) for message in messages],
+                         [(SCAN, (45, 120)), (ACK, ("LFT",))])
+        self.assertEqual(messages[0].line, "SCAN:45:120")
+
+class TestHandlerDispatch(unittest.TestCase):
+    def test_handler_publishes_messages(self):
+        handler = SerialHandler(simulation=True)
+        handler.disconnect()
+        scans = handler.buffer(SCAN, maxlen=8)
+        readings = []
+        handler.subscribe_distance(readings.append)
+
+        handler._receive(b"DIST:33\nSCAN:0:50\nSCAN:10:60\nBAT:90\n")
+
+        self.assertEqual(readings, [33])
+        self.assertEqual(handler.get_distance(), 33)
+        self.assertEqual([message.values for message in scans.drain()], [(0, 50), (10, 60)])
+        self.assertEqual(handler.latest(BAT).values, (90,))
+        self.assertFalse(hasattr(handler, "receive_queue"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import time
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.motion_scheduler import MotionScheduler, STOP
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+
+class TestMotionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.motors = RecordingMotors()
+        self.scheduler = MotionScheduler(self.motors)
+
+    def test_sequence_advances_by_time(self):
+        # "turn_left 0.7 for 400 ms, then stop"
+        self.scheduler.play([("turn_left", 0.7, 0.4), STOP], now=10.0)
+        self.assertEqual(self.motors.commands, [("turn_left", 0.7)])
+        self.assertTrue(self.scheduler.is_busy())
+
+        # Nothing changes before the step has run its course
+        self.scheduler.update(now=10.3)
+        self.assertEqual(self.motors.commands, [("turn_left", 0.7)])
+
+        # Once it has, the stop is issued and the scheduler goes idle
+        self.scheduler.update(now=10.41)
+        self.assertEqual(self.motors.commands[-1], ("stop", None))
+        self.assertFalse(self.scheduler.is_busy())
+
+    def test_steps_chain_without_drift(self):
+        self.scheduler.play([("move_forward", 0.5, 0.25), ("turn_right", 0.5, 0.25), STOP], now=0.0)
+
+        # A late tick starts the next step, but its end is measured from the
+        # planned end of the previous one
+        self.scheduler.update(now=0.3)
+        self.assertEqual(self.scheduler.current_action(), "turn_right")
+        self.scheduler.update(now=0.51)
+        self.assertFalse(self.scheduler.is_busy())
+
+    def test_cancel_preempts(self):
+        self.scheduler.play([("move_forward", 1.0, 5.0), STOP], now=0.0)
+        self.scheduler.cancel()
+        self.scheduler.update(now=10.0)
+
+        # The trailing stop of a cancelled sequence is never issued
+        self.assertEqual(self.motors.commands, [("move_forward", 1.0)])
+
+    def test_timed_motors_get_one_command_per_primitive(self):
+        motors = TimedMotors()
+        scheduler = MotionScheduler(motors)
+        scheduler.play([("move_forward", 0.5, 0.25), ("turn_right", 0.5, 0.3), STOP], now=0.0)
+        scheduler.update(now=0.25)
+        scheduler.update(now=0.55)
+
+        # Only the step before the stop is timed, and the motors do the stopping
+        self.assertEqual(motors.commands, [("move_forward", 0.5), ("timed", "turn_right", 0.5, 0.3)])
+        self.assertFalse(scheduler.is_busy())
+
+class TestNonBlockingStateMachine(unittest.TestCase):
+    def setUp(self):
+        self.sensor = MockSensor()
+        self.motors = RecordingMotors()
+        self.state_machine = RobotStateMachine(self.sensor, self.motors)
+
+    def test_handlers_do_not_block(self):
+        # Every state with a timed movement must return well under a tick
+        for state in [RobotState.PLAYING, RobotState.STARTLED, RobotState.CURIOUS,
+                      RobotState.SEARCHING, RobotState.AVOIDING]:
+            self.state_machine.transition_to(state)
+            start = time.perf_counter()
+            self.state_machine.update()
+            self.assertLess(time.perf_counter() - start, 0.05)
+
+    def test_obstacle_preempts_running_primitive(self):
+        self.state_machine.transition_to(RobotState.PLAYING)
+        self.state_machine.motion.play([("move_forward", 0.8, 5.0), STOP])
+
+        # Obstacle right in front of the robot mid-dash
+        self.sensor.distance = 5
+        self.state_machine.last_distance = 5
+        self.state_machine.update()
+
+        self.assertEqual(self.state_machine.current_state, RobotState.AVOIDING)
+        self.assertNotEqual(self.state_machine.motion.current_action(), "move_forward")
+
+# Mock classes for testing
+class MockSensor:
+    def __init__(self):
+        self.distance = 100
+
+    def measure_distance(self):
+        return self.distance
+
+class RecordingMotors:
+    def __init__(self):
+        self.commands = []
+
+    def move_forward(self, speed=1.0):
+        self.commands.append(("move_forward", speed))
+
+    def move_backward(self, speed=1.0):
+        self.commands.append(("move_backward", speed))
+
+    def turn_left(self, speed=1.0):
+        self.commands.append(("turn_left", speed))
+
+    def turn_right(self, speed=1.0):
+        self.commands.append(("turn_right", speed))
+
+    def stop(self):
+        self.commands.append(("stop", None))
+
+class TimedMotors(RecordingMotors):
+    def run_timed(self, action, speed, duration):
+        self.commands.append(("timed", action, speed, duration))
+
+if __name__ == "__main__":
+    unittest.main()
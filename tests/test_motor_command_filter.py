@@ -0,0 +1,140 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.motor_command_filter import MotorCommandFilter
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestMotorCommandFilter(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start_time=0.0)
+        self.motors = MockSerialMotors()
+        self.filter = MotorCommandFilter(self.motors, max_rate=10.0, clock=self.clock)
+
+    def test_repeated_stop_sent_once(self):
+        for _ in range(50):
+            self.filter.stop()
+            self.clock.sleep(0.1)
+
+        self.assertEqual(self.motors.sent, ["STP"])
+        self.assertEqual(self.filter.stats()["suppressed"], 49)
+
+    def test_speed_only_changes_are_duplicates_on_the_wire(self):
+        self.filter.move_forward(0.3)
+        self.clock.sleep(0.2)
+        self.filter.move_forward(0.6)
+
+        self.assertEqual(self.motors.sent, ["FWD"])
+
+    def test_tick_coalesces_to_last_command(self):
+        self.filter.hold()
+        self.filter.turn_left(0.4)
+        self.filter.move_forward(0.4)
+        self.assertEqual(self.motors.sent, [])
+        self.filter.flush()
+
+        self.assertEqual(self.motors.sent, ["FWD"])
+        self.assertEqual(self.filter.stats()["coalesced"], 1)
+
+    def test_rate_limit_delays_until_flush(self):
+        self.filter.move_forward()
+        self.filter.turn_left()  # Only 0 ms after the last command
+        self.assertEqual(self.motors.sent, ["FWD"])
+
+        self.clock.sleep(0.1)
+        self.filter.flush()
+        self.assertEqual(self.motors.sent, ["FWD", "LFT"])
+        self.assertEqual(self.filter.stats()["delayed"], 1)
+
+    def test_stop_is_never_delayed(self):
+        self.filter.move_forward()
+        self.filter.stop()
+
+        self.assertEqual(self.motors.sent, ["FWD", "STP"])
+
+    def test_reset_resends(self):
+        self.filter.stop()
+        self.filter.reset()
+        self.filter.stop()
+
+        self.assertEqual(self.motors.sent, ["STP", "STP"])
+
+    def test_timed_moves_are_never_duplicates(self):
+        motors = MockTimedMotors()
+        motor_filter = MotorCommandFilter(motors, max_rate=10.0, clock=self.clock)
+        for _ in range(2):
+            motor_filter.run_timed("turn_left", 0.5, 0.2)
+            self.clock.sleep(0.2)
+            motor_filter.stop()
+            self.clock.sleep(0.2)
+
+        # The motors stopped themselves, so no stop is sent after either move
+        self.assertEqual(motors.sent, ["LFT:0.5:0.2", "LFT:0.5:0.2"])
+        self.assertEqual(motor_filter.stats()["suppressed"], 2)
+        self.assertFalse(hasattr(self.filter, "run_timed"))
+
+    def test_stop_during_timed_move_is_sent(self):
+        motors = MockTimedMotors()
+        motor_filter = MotorCommandFilter(motors, max_rate=10.0, clock=self.clock)
+        motor_filter.run_timed("turn_left", 0.5, 0.5)
+        self.clock.sleep(0.2)
+        motor_filter.stop()
+        self.clock.sleep(0.5)
+        motor_filter.move_forward()
+
+        self.assertEqual(motors.sent, ["LFT:0.5:0.5", "STP", "FWD"])
+
+    def test_idle_robot_stops_link_chatter(self):
+        state_machine = RobotStateMachine(ClearPathSensor(), self.filter, clock=self.clock)
+        state_machine.idle_fidget_chance = 0
+        state_machine.state_deadline = None  # Stay idle
+
+        for _ in range(100):
+            self.filter.hold()
+            state_machine.update()
+            self.filter.flush()
+            self.clock.sleep(0.1)
+
+        self.assertEqual(state_machine.current_state, RobotState.IDLE)
+        self.assertEqual(self.motors.sent, ["STP"])
+
+# Mock classes for testing
+class MockSerialMotors:
+    codes = {"move_forward": "FWD", "move_backward": "BCK",
+             "turn_left": "LFT", "turn_right": "RGT", "stop": "STP"}
+
+    def __init__(self):
+        self.sent = []
+
+    def command_for(self, action, speed=None):
+        return self.codes[action]
+
+    def move_forward(self, speed=1.0):
+        self.sent.append("FWD")
+
+    def move_backward(self, speed=1.0):
+        self.sent.append("BCK")
+
+    def turn_left(self, speed=1.0):
+        self.sent.append("LFT")
+
+    def turn_right(self, speed=1.0):
+        self.sent.append("RGT")
+
+    def stop(self):
+        self.sent.append("STP")
+
+class MockTimedMotors(MockSerialMotors):
+    def run_timed(self, action, speed, duration):
+        self.sent.append(f"{self.codes[action]}:{speed}:{duration}")
+
+class ClearPathSensor:
+    def measure_distance(self):
+        return 150
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.memory.profile_store import ProfileStore
+from raspberry_pi.behavior.pet_behaviors import create_pet
+from raspberry_pi.behavior.robot_personality import Emotion
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestProfileStore(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.db_dir.name, "memory.db")
+        self.clock = VirtualClock(start_time=0.0)
+
+    def tearDown(self):
+        self.db_dir.cleanup()
+
+    def _boot(self, seed, new_pet=False):
+        """Start a pet the way PetRobot does"""
+        memory = MemoryStore(self.db_path, threaded=False)
+        store = ProfileStore(memory, clock=self.clock)
+        profile = None if new_pet else store.load()
+        if new_pet:
+            store.clear()
+        personality, state_machine, _ = create_pet(ClearPathSensor(), NullMotors(), self.clock,
+                                                   seed, memory=memory, profile=profile)
+        return memory, store, personality, state_machine
+
+    def test_pet_survives_reboot(self):
+        memory, store, personality, state_machine = self._boot(seed=1)
+        state_machine.boredom_level = 42.5
+        state_machine.tiredness_level = 12.0
+        personality.set_emotion(Emotion.PLAYFUL)
+        remaining = personality.emotions.remaining()
+        self.clock.sleep(5)
+        store.save(personality, state_machine)
+        memory.close()
+
+        # A different seed would draw different traits for a new pet
+        memory, _, restored, restored_state = self._boot(seed=2)
+
+        self.assertEqual(restored.traits, personality.traits)
+        self.assertEqual(restored.emotional_reactivity, personality.emotional_reactivity)
+        self.assertEqual(restored_state.boredom_level, 42.5)
+        self.assertEqual(restored_state.tiredness_level, 12.0)
+        self.assertEqual(restored_state.attention_span, state_machine.attention_span)
+        self.assertEqual(restored.get_emotion(), Emotion.PLAYFUL)
+        self.assertAlmostEqual(restored.emotions.remaining(), remaining - 5)
+        memory.close()
+
+    def test_new_pet_forgets_profile(self):
+        memory, store, personality, state_machine = self._boot(seed=1)
+        store.save(personality, state_machine)
+        memory.close()
+
+        memory, store, fresh, _ = self._boot(seed=2, new_pet=True)
+        memory.flush()
+
+        self.assertEqual(fresh.get_emotion(), Emotion.EXCITED)
+        self.assertIsNone(store.load())
+        memory.close()
+
+    def test_periodic_save(self):
+        memory, store, personality, state_machine = self._boot(seed=1)
+        store.maybe_save(personality, state_machine)
+        memory.flush()
+        self.assertIsNone(store.load())
+
+        self.clock.sleep(store.interval)
+        store.maybe_save(personality, state_machine)
+        memory.flush()
+        self.assertEqual(store.load()["traits"], personality.traits)
+        memory.close()
+
+    def test_unknown_version_is_ignored(self):
+        memory = MemoryStore(self.db_path, threaded=False)
+        memory.execute("INSERT INTO memory_meta (key, value) VALUES ('profile', '{\"version\": 99}')")
+        memory.flush()
+
+        self.assertIsNone(ProfileStore(memory).load())
+        memory.close()
+
+# Mock classes for testing
+class ClearPathSensor:
+    def measure_distance(self):
+        return 150
+
+class NullMotors:
+    def move_forward(self, speed=1.0):
+        pass
+
+    def move_backward(self, speed=1.0):
+        pass
+
+    def turn_left(self, speed=1.0):
+        pass
+
+    def turn_right(self, speed=1.0):
+        pass
+
+    def stop(self):
+        pass
+
+if __name__ == "__main__":
+    unittest.main()
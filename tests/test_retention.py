@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.memory.memory_store import MemoryStore
+from raspberry_pi.memory.retention import InteractionRetention
+from raspberry_pi.behavior.robot_personality import RobotPersonality, Emotion
+from raspberry_pi.runtime.clock import VirtualClock
+
+# Local midnight, since interaction timestamps are local time
+MIDNIGHT = time.mktime((2026, 1, 1, 0, 0, 0, 0, 0, -1))
+
+class TestInteractionRetention(unittest.TestCase):
+    def setUp(self):
+        self.db_dir = tempfile.TemporaryDirectory()
+        self.memory = MemoryStore(os.path.join(self.db_dir.name, "memory.db"), threaded=False)
+        self.clock = VirtualClock(start_time=MIDNIGHT)
+        self.personality = RobotPersonality(clock=self.clock, memory=self.memory)
+        self.personality.random_emotion_chance = 0
+        self.retention = InteractionRetention(self.memory, clock=self.clock, raw_days=1,
+                                              hourly_days=2)
+
+    def tearDown(self):
+        self.memory.close()
+        self.db_dir.cleanup()
+
+    def _emotions_every_minute(self, hours):
+        emotions = [Emotion.HAPPY, Emotion.SAD, Emotion.HAPPY]
+        for minute in range(hours * 60):
+            self.personality.set_emotion(emotions[minute % 3])
+            self.clock.sleep(60)
+        self.memory.flush()
+
+    def _maintain(self):
+        self.retention.last_run = None
+        self.retention.maybe_run()
+        self.memory.flush()
+
+    def _raw_rows(self):
+        return self.memory.fetchone("SELECT COUNT(*) FROM interactions")[0]
+
+    def test_histogram_same_before_and_after_rollup(self):
+        self._emotions_every_minute(3)
+        before = self.retention.emotion_histogram(6)
+        self._maintain()
+
+        self.assertEqual(before, {Emotion.HAPPY: 120, Emotion.SAD: 60})
+        self.assertEqual(self.retention.emotion_histogram(6), before)
+        self.assertEqual(self.retention.histogram("type", 6), {"emotion_change": 180})
+
+    def test_only_completed_hours_are_rolled_up(self):
+        self._emotions_every_minute(2)
+        self.clock.sleep(30 * 60)  # Half way through the third hour
+        self.personality.set_emotion(Emotion.SLEEPY)
+        self.memory.flush()
+        self._maintain()
+
+        rolled = self.memory.fetchall(
+            "SELECT bucket, SUM(count) FROM interaction_rollups "
+            "WHERE period = 'hour' AND kind = 'emotion' GROUP BY bucket")
+        self.assertEqual([count for _, count in rolled], [60, 60])
+        # The window covers the whole hour it starts in
+        self.assertEqual(self.retention.emotion_histogram(1),
+                         {Emotion.HAPPY: 40, Emotion.SAD: 20, Emotion.SLEEPY: 1})
+
+    def test_old_raw_rows_are_pruned(self):
+        self._emotions_every_minute(4)
+        self.clock.sleep(3 * 86400)
+        self._maintain()
+
+        self.assertEqual(self._raw_rows(), 0)
+        # Hourly counts are gone too, the daily ones remain
+        self.assertEqual(self.retention.emotion_histogram(4 * 24), {})
+        self.assertEqual(self.retention.daily_history(7),
+                         {"2026-01-01": {Emotion.HAPPY: 160, Emotion.SAD: 80}})
+
+    def test_late_write_is_rolled_up_next_pass(self):
+        self._emotions_every_minute(1)
+        self._maintain()
+
+        # Logged in the first hour but only written after its rollup
+        self.memory.execute("INSERT INTO interactions (timestamp, interaction_type, details, emotion) "
+                            "VALUES ('2026-01-01 00:59:59', 'emotion_change', 'late', 'grumpy')")
+        self._maintain()
+
+        self.assertEqual(self.retention.emotion_histogram(2)[Emotion.GRUMPY], 1)
+        self.assertEqual(sum(self.retention.emotion_histogram(2).values()), 61)
+
+    def test_out_of_order_timestamps_are_rolled_up_when_due(self):
+        self._emotions_every_minute(1)
+        # Stamped hours ahead (as under --speed max) but written before later rows
+        self.memory.execute("INSERT INTO interactions (timestamp, interaction_type, details, emotion) "
+                            "VALUES ('2026-01-01 05:10:00', 'emotion_change', 'ahead', 'grumpy')")
+        self.personality.set_emotion(Emotion.SLEEPY)
+        self.clock.sleep(90 * 60)
+        self.memory.flush()
+        self._maintain()
+
+        # Its hour hasn't finished, so it stays raw while the rows around it are rolled
+        self.assertEqual(self._raw_rows(), 62)
+        self.assertEqual(self.memory.fetchone(
+            "SELECT COUNT(*) FROM interactions WHERE rolled_up = 0")[0], 1)
+
+        self.clock.sleep(3 * 86400)
+        self._maintain()
+        self.assertEqual(self._raw_rows(), 0)
+        self.assertEqual(self.retention.daily_history(7),
+                         {"2026-01-01": {Emotion.HAPPY: 40, Emotion.SAD: 20,
+                                         Emotion.SLEEPY: 1, Emotion.GRUMPY: 1}})
+
+    def test_rollups_by_row_id_carry_over(self):
+        self._emotions_every_minute(1)
+        # A database rolled up by the old row id watermark, up to row 30
+        self.memory.execute("INSERT INTO memory_meta (key, value) VALUES ('rolled_up_id', 30)")
+        self._maintain()
+
+        self.assertEqual(sum(self.retention.emotion_histogram(2).values()), 30)
+        self.assertIsNone(self.memory.fetchone(
+            "SELECT value FROM memory_meta WHERE key = 'rolled_up_id'"))
+
+    def test_personality_update_schedules_maintenance(self):
+        self._emotions_every_minute(2)
+        self.personality.update()
+        self.memory.flush()
+
+        rolled = self.memory.fetchone("SELECT SUM(count) FROM interaction_rollups "
+                                      "WHERE period = 'day' AND kind = 'type'")[0]
+        self.assertEqual(rolled, 120)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import random
+import math
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.scan_aggregator import ScanAggregator
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.runtime.clock import VirtualClock
+from fakes import FakeLink, MockPollSensor, MockMotors
+
+# Obstacles on the right half of the sweep (servo angles above 90)
+RIGHT_BLOCKED = [200] * 7 + [30] * 6
+
+class TestScanAggregator(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.link = FakeLink(self.clock)
+        self.scanner = ScanAggregator(self.link, clock=self.clock, sweeps=2)
+
+    def _sweep(self, distances):
+        self.assertTrue(self.scanner.request())
+        self.link.sweep(distances)
+
+    def test_request_does_not_block(self):
+        self.assertTrue(self.scanner.request())
+        self.assertEqual(self.link.sent, ["SCAN"])
+        self.assertTrue(self.scanner.busy())
+        # A second request while the sweep runs is not sent
+        self.assertFalse(self.scanner.request())
+        self.assertEqual(len(self.link.sent), 1)
+
+    def test_sweep_fills_arrays(self):
+        self._sweep([100 + angle for angle in range(13)])
+
+        self.assertFalse(self.scanner.busy())
+        self.assertEqual(list(self.scanner.angles), list(range(0, 181, 15)))
+        self.assertEqual(list(self.scanner.merged_ranges()), [100 + angle for angle in range(13)])
+        self.assertEqual(self.scanner.stats()["sweeps"], 1)
+        self.assertEqual(self.scanner.age(), 0)
+
+    def test_widest_free_sector(self):
+        self._sweep(RIGHT_BLOCKED)
+        self.assertEqual(self.scanner.widest_free_sector(), (0.0, 90.0, 45.0))
+
+        # Equally wide sectors: the one closest to straight ahead wins
+        self.clock.advance(1)
+        self._sweep([30, 200, 200, 30, 30, 30, 200, 200, 30, 30, 30, 200, 200])
+        self.assertEqual(self.scanner.widest_free_sector(since=self.clock.time()),
+                         (90.0, 105.0, 97.5))
+
+    def test_no_free_sector(self):
+        self.assertIsNone(self.scanner.widest_free_sector())
+        self._sweep([10] * 13)
+        self.assertIsNone(self.scanner.widest_free_sector())
+
+    def test_nearest_obstacle_merges_recent_sweeps(self):
+        self._sweep([200] * 12 + [40])
+        self._sweep([200] * 3 + [60] + [200] * 9)
+        self.assertEqual(self.scanner.nearest_obstacle_bearing(), (180.0, 40.0))
+
+        # Older sweeps age out
+        self.clock.advance(10)
+        self.assertIsNone(self.scanner.nearest_obstacle_bearing())
+
+    def test_keeps_last_sweeps(self):
+        self._sweep([20] * 13)
+        self._sweep([200] * 13)
+        self._sweep([200] * 13)
+        # The first sweep's row was reused
+        self.assertEqual(self.scanner.nearest_obstacle_bearing()[1], 200)
+
+    def test_no_echo_reads_as_max_range(self):
+        self._sweep([0] * 13)
+        self.assertEqual(self.scanner.widest_free_sector(), (0.0, 180.0, 90.0))
+        self.assertEqual(self.scanner.nearest_obstacle_bearing(), (0.0, 400.0))
+
+    def test_timeout(self):
+        self.scanner.request()
+        self.clock.advance(3)
+        self.assertFalse(self.scanner.busy())
+        self.assertEqual(self.scanner.stats()["timeouts"], 1)
+        self.assertTrue(self.scanner.request())
+
+    def test_ignores_unrequested_and_off_grid_readings(self):
+        self.link.reply("SCAN:90:50")
+        self.scanner.request()
+        self.link.reply("SCAN:92:50")
+        self.link.reply("SCAN:195:50")
+        self.assertEqual(self.scanner.stats()["ignored"], 3)
+        self.assertTrue(math.isnan(self.scanner.merged_ranges()[6]))
+
+class TestScanAvoidance(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.link = FakeLink(self.clock)
+        self.scanner = ScanAggregator(self.link, clock=self.clock)
+        self.motors = MockMotors()
+        self.state_machine = RobotStateMachine(MockPollSensor(10), self.motors, clock=self.clock,
+                                               rng=random.Random(1), scanner=self.scanner)
+        self.state_machine.transition_to(RobotState.AVOIDING)
+        self.state_machine.last_distance = 10
+
+    def test_waits_for_sweep_then_turns_toward_open_space(self):
+        self.state_machine._handle_avoiding()
+        self.assertEqual(self.link.sent, ["SCAN"])
+        self.assertEqual(self.motors.commands, ["stop"])
+
+        # Nothing happens until the sweep is in
+        self.clock.advance(0.5)
+        self.state_machine._handle_avoiding()
+        self.assertEqual(self.motors.commands, ["stop"])
+
+        self.link.sweep(RIGHT_BLOCKED)
+        self.state_machine._handle_avoiding()
+        self.clock.advance(0.2)
+        self.state_machine.motion.update()
+        self.assertEqual(self.motors.commands[-1], "turn_left")
+
+    def test_each_turn_gets_a_new_sweep(self):
+        self.state_machine._handle_avoiding()
+        self.link.sweep(RIGHT_BLOCKED)
+        self.state_machine._handle_avoiding()
+        for _ in range(2):
+            self.clock.advance(1)
+            self.state_machine.motion.update()
+        self.assertFalse(self.state_machine.motion.is_busy())
+
+        # Still blocked after the turn: look again
+        self.state_machine._handle_avoiding()
+        self.assertEqual(self.link.sent, ["SCAN", "SCAN"])
+
+    def test_falls_back_to_random_without_sweep(self):
+        self.state_machine._handle_avoiding()
+        self.clock.advance(3)
+        self.state_machine._handle_avoiding()
+        self.clock.advance(0.2)
+        self.state_machine.motion.update()
+        self.assertIn(self.motors.commands[-1], ["turn_left", "turn_right"])
+
+if __name__ == "__main__":
+    unittest.main()
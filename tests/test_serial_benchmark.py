@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import json
+import threading
+import subprocess
+
+import numpy as np
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+TESTER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools", "serial_tester.py")
+
+from serial_tester import SerialTester, SerialBenchmark, parse_mix, summarize, thread_cpu_seconds
+
+try:
+    os.close(os.openpty()[0])
+    PTY_AVAILABLE = True
+except (OSError, AttributeError):
+    PTY_AVAILABLE = False
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("FWD:180=3, STP,PING=0.5"),
+                         [("FWD:180", 3.0), ("STP", 1.0), ("PING", 0.5)])
+
+    def test_summarize(self):
+        self.assertIsNone(summarize(np.array([])))
+        summary = summarize(np.arange(1, 101, dtype=float))
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["max"], 100)
+        self.assertAlmostEqual(summary["p50"], 50.5)
+
+    def test_thread_cpu_seconds(self):
+        if not os.path.exists("/proc/self/task"):
+            self.skipTest("needs /proc")
+        self.assertGreaterEqual(thread_cpu_seconds(threading.current_thread()), 0)
+        self.assertIsNone(thread_cpu_seconds(None))
+
+@unittest.skipUnless(PTY_AVAILABLE, "needs pseudo-terminals")
+class TestSerialBenchmark(unittest.TestCase):
+    def test_run_against_virtual_arduino(self):
+        tester = SerialTester(simulation=True, protocol="text", show_messages=False)
+        try:
+            benchmark = SerialBenchmark(tester.pi_serial, rate=40, mix="FWD:180=1,PING=1", seed=3)
+            self.assertTrue(benchmark.wait_ready())
+            results = benchmark.run(1.0, settle=0.2)
+        finally:
+            tester.shutdown()
+
+        json.dumps(results)  # Machine-readable as is
+        self.assertEqual(results["config"]["protocol"], "text")
+        self.assertGreaterEqual(results["commands"]["sent"], 35)
+        self.assertGreater(results["latency_ms"]["ack"]["count"], 0)
+        self.assertGreater(results["latency_ms"]["pong"]["count"], 0)
+        self.assertAlmostEqual(results["distance_stream"]["interval_ms"]["p50"], 100, delta=20)
+        self.assertEqual(results["errors"]["parse_errors"], 0)
+
+    def test_cli_prints_only_json(self):
+        result = subprocess.run(
+            [sys.executable, TESTER, "--benchmark", "--duration", "0.5", "--protocol", "text"],
+            capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        results = json.loads(result.stdout)
+        # Progress went to stderr; the virtual board ran without a baud limit
+        self.assertIn("simulation mode", result.stderr)
+        self.assertIsNone(results["config"]["baud_rate"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.binary_protocol import PROTO_ACCEPT, encode_message, MSG_DIST
+from raspberry_pi.communication.serial_handler import SerialHandler, LineFramer
+
+class TestLineFramer(unittest.TestCase):
+    def _lines(self, framer):
+        lines = []
+        while True:
+            line = framer.pop_line()
+            if line is None:
+                return lines
+            lines.append(line)
+
+    def test_partial_lines_are_kept(self):
+        framer = LineFramer()
+        framer.feed(b"DIST:4")
+        self.assertEqual(self._lines(framer), [])
+        framer.feed(b"2\r\nDIST:7\r\n\r\nSC")
+        self.assertEqual(self._lines(framer), ["DIST:42", "DIST:7"])
+        framer.feed(b"AN:END\n")
+        self.assertEqual(self._lines(framer), ["SCAN:END"])
+        self.assertEqual(framer.lines, 3)
+
+    def test_bad_bytes_are_skipped(self):
+        framer = LineFramer(max_line=16)
+        framer.feed(b"\xff\xfeDIST:1\nDIST:2\n")
+        self.assertEqual(self._lines(framer), ["DIST:2"])
+        self.assertEqual(framer.decode_errors, 1)
+
+        framer.feed(b"x" * 40)
+        self.assertEqual(self._lines(framer), [])
+        framer.feed(b"\nDIST:3\n")
+        self.assertEqual(self._lines(framer), ["DIST:3"])
+        self.assertEqual(framer.overflows, 1)
+
+class TestSerialReader(unittest.TestCase):
+    def setUp(self):
+        # A handler wired to a fake port instead of a real one
+        self.handler = SerialHandler(simulation=True)
+        self.handler.disconnect()
+        self.handler.simulation = False
+        self.handler.connected = True
+        self.handler.ser = FakePort()
+        self.readings = []
+        self.handler.subscribe_distance(self.readings.append)
+
+    def test_bulk_read_drains_port(self):
+        port = self.handler.ser
+        port.chunks = [b"DIST:10\nDIST:", b"20\nDIST:30\n"]
+        self.handler.running = True
+        self.handler._read_loop()
+
+        self.assertEqual(self.readings, [10, 20, 30])
+        self.assertEqual(port.sizes, [13, 11, 1])  # Whole backlog, then a 1-byte blocking read
+        stats = self.handler.protocol_stats()
+        self.assertEqual((stats["bytes"], stats["frames"], stats["parse_errors"]), (24, 3, 0))
+        self.assertFalse(self.handler.connected)
+        self.assertEqual(stats["read_errors"], 1)
+
+    def test_garbage_does_not_drop_link(self):
+        self.handler._receive(b"DIST:abc\n\x80\x81\nDIST:5\n")
+        self.assertEqual(self.readings, [5])
+        self.assertTrue(self.handler.connected)
+        self.assertEqual(self.handler.protocol_stats()["parse_errors"], 2)
+
+    def test_switch_to_binary_mid_chunk(self):
+        self.handler._receive(f"DIST:1\n{PROTO_ACCEPT}\n".encode() + encode_message(MSG_DIST, 2))
+        self.assertTrue(self.handler.binary)
+        self.assertEqual(self.readings, [1, 2])
+
+        # A reset puts the board back on text
+        self.handler._receive(b"ARDUINO:READY\nDIST:3\n")
+        self.assertFalse(self.handler.binary)
+        self.assertEqual(self.readings, [1, 2, 3])
+
+# Mock classes for testing
+class FakePort:
+    def __init__(self):
+        self.chunks = []
+        self.sizes = []
+        self.written = []
+
+    @property
+    def in_waiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, size):
+        self.sizes.append(size)
+        if not self.chunks:
+            raise OSError("device unplugged")
+        return self.chunks.pop(0)
+
+    def write(self, data):
+        self.written.append(bytes(data))
+
+    def close(self):
+        pass
+
+if __name__ == "__main__":
+    unittest.main()
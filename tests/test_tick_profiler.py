@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import tempfile
+import subprocess
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.runtime.tick_profiler import TickProfiler, load_snapshot
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTickProfiler(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.profiler = TickProfiler(target_interval=0.1, snapshot_path=None, timer=self.timer)
+
+    def _tick(self, stage_seconds, sleep=0.0):
+        self.profiler.begin_tick()
+        for name, seconds in stage_seconds.items():
+            with self.profiler.stage(name):
+                self.timer.now += seconds
+        self.profiler.end_tick()
+        self.timer.now += sleep
+
+    def test_stage_histograms(self):
+        for _ in range(9):
+            self._tick({"state_machine": 0.002, "personality": 0.0004}, sleep=0.0975)
+        self._tick({"state_machine": 0.040, "personality": 0.0004}, sleep=0.06)
+
+        stages = self.profiler.snapshot()["stages"]
+        self.assertEqual(stages["state_machine"]["count"], 10)
+        self.assertEqual(stages["state_machine"]["p50_ms"], 2.5)
+        self.assertAlmostEqual(stages["state_machine"]["max_ms"], 40.0)
+        self.assertEqual(stages["personality"]["p99_ms"], 0.5)
+
+    def test_overruns_and_jitter(self):
+        self._tick({"state_machine": 0.01}, sleep=0.09)
+        self._tick({"state_machine": 0.15})  # Misses the 100 ms deadline
+        self._tick({"state_machine": 0.01}, sleep=0.09)
+
+        snapshot = self.profiler.snapshot()
+        self.assertEqual(snapshot["ticks"], 3)
+        self.assertEqual(snapshot["overruns"], 1)
+        self.assertAlmostEqual(snapshot["worst_overrun_ms"], 50.0)
+
+        # Second tick started on time, the third 50 ms late
+        self.assertEqual(snapshot["jitter"]["count"], 2)
+        self.assertAlmostEqual(snapshot["jitter"]["max_ms"], 50.0)
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "profile.json")
+            self.profiler.snapshot_path = path
+            self._tick({"random_behaviors": 0.001}, sleep=0.099)
+            self.profiler.write_snapshot()
+
+            snapshot = load_snapshot(path)
+            self.assertEqual(snapshot["ticks"], 1)
+            self.assertIn("random_behaviors", snapshot["stages"])
+            self.assertIsNone(load_snapshot(os.path.join(temp_dir, "missing.json")))
+
+    def test_default_path_ignores_working_directory(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env.pop("DEWWY_TICK_PROFILE", None)
+        env["PYTHONPATH"] = project_root
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # As web/app.py would see it when started from another directory
+            path = subprocess.run(
+                [sys.executable, "-c", "from raspberry_pi.runtime.tick_profiler import "
+                 "DEFAULT_SNAPSHOT_PATH; print(DEFAULT_SNAPSHOT_PATH)"],
+                cwd=temp_dir, env=env, capture_output=True, text=True, check=True).stdout.strip()
+
+        self.assertEqual(path, os.path.join(project_root, "tick_profile.json"))
+
+    def test_summary_is_periodic(self):
+        self.profiler.summary_interval = 1.0
+        reports = []
+        self.profiler.report = lambda: reports.append(self.profiler.summary())
+
+        for _ in range(25):
+            self._tick({"state_machine": 0.001}, sleep=0.099)
+
+        self.assertEqual(len(reports), 2)
+        self.assertIn("overruns=0", reports[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import random
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.behavior.transition_table import TransitionTable, NEXT_STATE_WEIGHTS
+from raspberry_pi.behavior.state_machine import RobotStateMachine, RobotState
+from raspberry_pi.runtime.clock import VirtualClock
+
+class TestTransitionTable(unittest.TestCase):
+    def setUp(self):
+        self.table = TransitionTable()
+
+    def test_matches_weight_formula(self):
+        # From IDLE with boredom 50, tiredness 20, curiosity 40 the weights are
+        # roaming 45, sleeping max(5, 14), curious 20, playing 10
+        rng = random.Random(1)
+        counts = {}
+        draws = 20000
+        for _ in range(draws):
+            state = self.table.sample(RobotState.IDLE, 50, 20, 40, rng)
+            counts[state] = counts.get(state, 0) + 1
+
+        total = 45 + 14 + 20 + 10
+        self.assertAlmostEqual(counts[RobotState.ROAMING] / draws, 45 / total, delta=0.02)
+        self.assertAlmostEqual(counts[RobotState.SLEEPING] / draws, 14 / total, delta=0.02)
+        self.assertAlmostEqual(counts[RobotState.PLAYING] / draws, 10 / total, delta=0.02)
+
+    def test_floor_and_untabled_states(self):
+        # Tiredness 0 still leaves the floor weight for sleeping
+        rng = random.Random(2)
+        seen = {self.table.sample(RobotState.ROAMING, 0, 0, 0, rng) for _ in range(2000)}
+        self.assertIn(RobotState.SLEEPING, seen)
+
+        # States without weights return to idle
+        self.assertNotIn(RobotState.SEARCHING, NEXT_STATE_WEIGHTS)
+        self.assertEqual(self.table.sample(RobotState.SEARCHING, 0, 0, 0, rng), RobotState.IDLE)
+
+    def test_concurrent_samples_do_not_share_weights(self):
+        # Another thread samples a different row while this draw is in flight
+        table = self.table
+
+        class InterleavingRng:
+            def random(self):
+                table.sample(RobotState.ROAMING, 0, 0, 0, random.Random(3))
+                return 0.9
+
+        # Idle weights are roaming 30 and sleeping 5; 0.9 of 35 is sleeping
+        self.assertEqual(table.sample(RobotState.IDLE, 0, 0, 0, InterleavingRng()),
+                         RobotState.SLEEPING)
+
+    def test_seeded_state_machines_agree(self):
+        histories = []
+        for _ in range(2):
+            clock = VirtualClock(start_time=0.0)
+            state_machine = RobotStateMachine(ClearPathSensor(), NullMotors(), clock=clock,
+                                              rng=random.Random(42))
+            history = []
+            for _ in range(3000):
+                state_machine.update()
+                history.append(state_machine.current_state)
+                clock.sleep(0.1)
+            histories.append(history)
+
+        self.assertEqual(histories[0], histories[1])
+
+    def test_deadline_drawn_once_on_entry(self):
+        clock = VirtualClock(start_time=0.0)
+        state_machine = RobotStateMachine(ClearPathSensor(), NullMotors(), clock=clock)
+        state_machine.transition_to(RobotState.PLAYING)
+        deadline = state_machine.state_deadline
+
+        self.assertTrue(5 <= deadline <= 15)
+        clock.sleep(1.0)
+        state_machine.update()
+        self.assertEqual(state_machine.state_deadline, deadline)
+
+# Mock classes for testing
+class ClearPathSensor:
+    def measure_distance(self):
+        return 150
+
+class NullMotors:
+    def move_forward(self, speed=1.0):
+        pass
+
+    def move_backward(self, speed=1.0):
+        pass
+
+    def turn_left(self, speed=1.0):
+        pass
+
+    def turn_right(self, speed=1.0):
+        pass
+
+    def stop(self):
+        pass
+
+if __name__ == "__main__":
+    unittest.main()
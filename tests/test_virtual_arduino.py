@@ -0,0 +1,137 @@
+import unittest
+import sys
+import os
+import time
+import threading
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.communication.serial_handler import SerialHandler
+from raspberry_pi.communication.message_dispatcher import DIST, SCAN, SCAN_END, ACK, PONG, DONE, BAT, ERR
+
+try:
+    from simulation.virtual_serial import VirtualArduino
+    os.close(os.openpty()[0])
+    PTY_AVAILABLE = True
+except (ImportError, OSError, AttributeError):
+    PTY_AVAILABLE = False
+
+@unittest.skipUnless(PTY_AVAILABLE, "needs pseudo-terminals")
+class TestVirtualArduino(unittest.TestCase):
+    def _start(self, protocol, baud_rate=None):
+        self.arduino = VirtualArduino(seed=1, baud_rate=baud_rate)
+        self.arduino.start()
+        self.handler = SerialHandler(port=self.arduino.port, simulation=False, protocol=protocol)
+        self.messages = Collector()
+        self.handler.subscribe([DIST, SCAN, SCAN_END, ACK, PONG, DONE, BAT, ERR], self.messages)
+
+    def _wait_binary(self, timeout=2.0):
+        deadline = time.time() + timeout
+        while not (self.handler.binary and self.arduino.binary) and time.time() < deadline:
+            time.sleep(0.01)
+        return self.handler.binary and self.arduino.binary
+
+    def tearDown(self):
+        self.handler.disconnect()
+        self.arduino.stop()
+
+    def test_text_protocol(self):
+        self._start("text")
+        self.assertTrue(self.messages.wait(DIST))
+
+        self.handler.send_command("FWD:180#12")
+        self.assertTrue(self.messages.wait(ACK))
+        self.assertEqual(self.messages.of(ACK)[0].values, ("FWD", 12))
+        self.assertEqual(self.arduino.motor_speed, 180)
+
+        self.handler.send_command("NOPE#3")
+        self.assertTrue(self.messages.wait(ERR))
+        self.assertEqual(self.messages.of(ERR)[0].line, "ERR:UNKNOWN_CMD:NOPE#3")
+
+        self.handler.send_command("BAT")
+        self.assertTrue(self.messages.wait(BAT))
+        self.assertEqual(self.messages.of(BAT)[0].values, (87,))
+        self.assertEqual(self.handler.protocol_stats()["protocol"], "text")
+
+    def test_scan_blocks_distance_stream(self):
+        self._start("text")
+        self.assertTrue(self.messages.wait(DIST))
+        self.handler.send_command("SCAN")
+        self.assertTrue(self.messages.wait(SCAN_END, timeout=3.0))
+
+        angles = [message.values[0] for message in self.messages.of(SCAN)]
+        self.assertEqual(angles, list(range(0, 181, 15)))
+        # No reading goes out while the servo sweeps
+        start = self.messages.of(SCAN)[0].time
+        end = self.messages.of(SCAN_END)[0].time
+        self.assertFalse([m for m in self.messages.of(DIST) if start < m.time < end])
+
+    def test_binary_protocol(self):
+        self._start("auto")
+        self.assertTrue(self._wait_binary())
+
+        self.messages.clear()
+        self.assertTrue(self.messages.wait(DIST))
+        self.handler.send_command("PING")
+        self.assertTrue(self.messages.wait(PONG))
+
+        # Timed moves stop on their own and report DONE
+        self.handler.send_command("LFT:100:50")
+        self.assertTrue(self.messages.wait(DONE))
+        self.assertEqual(self.messages.of(DONE)[0].values, ("LFT",))
+        self.assertEqual(self.arduino.motor_speed, 0)
+
+    def test_reopening_the_port_resets_the_board(self):
+        self._start("auto")
+        self.assertTrue(self._wait_binary())
+        self.assertEqual(self.arduino.boots, 1)
+
+        self.handler.send_command("FWD:200")
+        self.assertTrue(self.messages.wait(ACK))
+        self.assertTrue(self.handler.reconnect())
+        self.assertTrue(self._wait_binary())
+        self.assertEqual(self.arduino.boots, 2)
+        self.assertEqual(self.arduino.motor_speed, 0)
+
+    def test_distance_rate(self):
+        self._start("text")
+        time.sleep(1.0)
+        # One reading every 100 ms, give or take scheduling
+        self.assertGreaterEqual(len(self.messages.of(DIST)), 7)
+        self.assertLessEqual(len(self.messages.of(DIST)), 11)
+
+    def test_baud_rate_throttles(self):
+        # 300 baud is 30 bytes/s, less than the ~100 bytes/s of readings
+        self._start("text", baud_rate=300)
+        time.sleep(1.0)
+        self.assertLessEqual(self.arduino.bytes_sent, 45)
+
+# Mock classes for testing
+class Collector:
+    """Subscriber that keeps every message and lets the test wait for one"""
+
+    def __init__(self):
+        self.messages = []
+        self.condition = threading.Condition()
+
+    def __call__(self, message):
+        with self.condition:
+            self.messages.append(message)
+            self.condition.notify_all()
+
+    def of(self, msg_type):
+        with self.condition:
+            return [message for message in self.messages if message.type == msg_type]
+
+    def clear(self):
+        with self.condition:
+            self.messages.clear()
+
+    def wait(self, msg_type, timeout=1.0):
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: any(message.type == msg_type for message in self.messages), timeout)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Memory Export
+
+Converts a robot's robot_memory.db into one .npy file per column for
+offline analysis. Run it again on the same output directory to append only
+the interactions logged since the last export.
+
+    python tools/export_memory.py robot_memory.db exports/robot-01
+    >>> from raspberry_pi.memory.columnar_export import load_table
+    >>> load_table("exports/robot-01", "interactions")["emotion"]
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.memory.columnar_export import ColumnarExporter
+
+def main():
+    parser = argparse.ArgumentParser(description="Export robot memory to columnar .npy files")
+    parser.add_argument("db", help="Path to robot_memory.db")
+    parser.add_argument("out_dir", help="Export directory (created if missing)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: {args.db} not found")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    exporter = ColumnarExporter(args.db, args.out_dir)
+    written = exporter.export()
+    elapsed = time.perf_counter() - start
+
+    manifest = exporter.manifest
+    print(f"Exported {args.db} to {args.out_dir} in {elapsed:.2f}s")
+    print(f"  interactions: {written['interactions']} new, "
+          f"{manifest['interactions']['rows']} total")
+    print(f"  learning: {written['learning']} rows")
+
+if __name__ == "__main__":
+    main()
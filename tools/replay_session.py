@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Session Replay
+
+Feeds a log written by `main.py --record` back through the personality,
+state machine, scan aggregator, random behaviors and command processor on
+simulated time, as fast as the CPU allows, and checks that every state
+change, emotion change and motor command comes out exactly as it did on the
+robot.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import argparse
+from collections import deque
+
+# Add project root to Python path for proper importing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from raspberry_pi.runtime.clock import VirtualClock
+from raspberry_pi.runtime.flight_recorder import (
+    FlightRecorder, read_session, decode_payload,
+    SESSION, TICK, DIST, POLL, VOICE, SCAN, SCAN_END, LINK, OUTPUT_KINDS, KIND_NAMES
+)
+from raspberry_pi.behavior.pet_behaviors import create_pet, component_rng
+from raspberry_pi.behavior.scan_aggregator import ScanAggregator
+from raspberry_pi.communication.message_dispatcher import MessageDispatcher
+from raspberry_pi.audio.command_processor import CommandProcessor
+
+class ReplaySensor:
+    """Serves the recorded sensor readings back in order"""
+
+    def __init__(self, polls, push_sensor):
+        self.polls = deque(polls)
+        self.listeners = []
+        if push_sensor:
+            self.subscribe = self.listeners.append
+
+    def measure_distance(self):
+        if not self.polls:
+            raise RuntimeError("Replay asked for more sensor readings than were recorded")
+        return self.polls.popleft()
+
+    def push(self, distance):
+        for callback in self.listeners:
+            callback(distance)
+
+class ReplayLink:
+    """Serial link that delivers the recorded sweeps; commands go nowhere"""
+
+    def __init__(self, clock):
+        self.dispatcher = MessageDispatcher(clock)
+
+    def subscribe(self, types, callback):
+        self.dispatcher.subscribe(types, callback)
+
+    def send_command(self, command):
+        return True
+
+    def deliver(self, kind, values):
+        line = f"SCAN:{values[0]}:{values[1]}" if kind == SCAN else "SCAN:END"
+        self.dispatcher.publish(self.dispatcher.parse(line))
+
+class NullMotors:
+    """Motors that go nowhere; the recorder wrapper captures the commands"""
+
+    def move_forward(self, speed=1.0):
+        pass
+
+    def move_backward(self, speed=1.0):
+        pass
+
+    def turn_left(self, speed=1.0):
+        pass
+
+    def turn_right(self, speed=1.0):
+        pass
+
+    def stop(self):
+        pass
+
+class NullTimedMotors(NullMotors):
+    """NullMotors for sessions recorded on motors that run timed moves"""
+
+    def run_timed(self, action, speed, duration):
+        pass
+
+class SessionReplayer:
+    def __init__(self, path):
+        self.path = path
+        self.events = list(read_session(path))
+        if not self.events or self.events[0][0] != SESSION:
+            raise ValueError(f"{path} does not start with a session record")
+        self.session = self.events[0][2]
+
+    def run(self):
+        """Replay every input; returns a dict describing how the outputs compare"""
+        seed = self.session["seed"]
+        clock = VirtualClock(start_time=self.events[0][1])
+        recorder = FlightRecorder(None, clock)
+        sensor = ReplaySensor([payload for kind, _, payload in self.events if kind == POLL],
+                              self.session["push_sensor"])
+        timed = self.session.get("timed_motors", False)
+        motors = recorder.wrap_motors(NullTimedMotors() if timed else NullMotors())
+        link = ReplayLink(recorder.clock)
+        scanner = ScanAggregator(link, clock=recorder.clock) if self.session.get("scanner") else None
+        counts = {}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "replay_memory.db")
+
+            # Mirrors PetRobot.__init__
+            with recorder.input(SESSION, self.session):
+                personality, state_machine, behaviors = create_pet(
+                    sensor, motors, recorder.clock, seed, db_path=db_path,
+                    profile=self.session.get("profile"), scanner=scanner)
+                recorder.watch(state_machine, personality)
+            command_processor = CommandProcessor(
+                state_machine=state_machine,
+                personality=personality,
+                rng=component_rng(seed, "commands"),
+                recorder=recorder
+            )
+
+            for kind, when, payload in self.events[1:]:
+                counts[kind] = counts.get(kind, 0) + 1
+                if kind not in (TICK, DIST, VOICE, SCAN, SCAN_END, LINK):
+                    continue
+                clock.advance_to(when)
+
+                if kind == TICK:
+                    # Mirrors one pass of PetRobot._main_loop
+                    with recorder.input(TICK):
+                        personality.update()
+                        state_machine.update()
+                        behaviors.check_for_random_behaviors()
+                elif kind == DIST:
+                    with recorder.input(DIST, payload):
+                        sensor.push(payload)
+                elif kind in (SCAN, SCAN_END):
+                    with recorder.input(kind, payload):
+                        link.deliver(kind, payload)
+                elif kind == LINK:
+                    # Mirrors PetRobot._on_link_degraded and _on_link_restored
+                    event, _, reason = payload.partition(":")
+                    with recorder.input(LINK, payload):
+                        if event == "degraded":
+                            state_machine.safe_stop(f"serial link {reason}")
+                        else:
+                            state_machine.resume()
+                elif kind == VOICE:
+                    command_processor.handle_command(payload)
+
+            personality.close()
+
+        expected = [(kind, when, payload) for kind, when, payload in self.events
+                    if kind in OUTPUT_KINDS]
+        replayed = [(kind, when, decode_payload(kind, data)) for kind, when, data in recorder.records
+                    if kind in OUTPUT_KINDS]
+
+        mismatch = None
+        for index in range(max(len(expected), len(replayed))):
+            want = expected[index] if index < len(expected) else None
+            got = replayed[index] if index < len(replayed) else None
+            if want != got:
+                mismatch = {"index": index, "recorded": want, "replayed": got}
+                break
+
+        return {
+            "seed": seed,
+            "inputs": {KIND_NAMES[kind]: count for kind, count in counts.items()
+                       if kind not in OUTPUT_KINDS},
+            "outputs": len(expected),
+            "replayed_outputs": len(replayed),
+            "identical": mismatch is None,
+            "first_mismatch": mismatch,
+            "final_state": state_machine.current_state,
+            "final_emotion": personality.get_emotion(),
+            "scans": scanner.stats() if scanner else None,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded pet robot session")
+    parser.add_argument("log", help="Log file written by main.py --record")
+    args = parser.parse_args()
+
+    replayer = SessionReplayer(args.log)
+    start = time.perf_counter()
+    result = replayer.run()
+    elapsed = time.perf_counter() - start
+
+    events = replayer.events
+    duration = events[-1][1] - events[0][1]
+    print(f"Replayed {duration:.1f}s of robot time in {elapsed:.2f}s (seed {result['seed']})")
+    print(f"  inputs: {result['inputs']}")
+    print(f"  outputs: {result['outputs']} recorded, {result['replayed_outputs']} replayed")
+    if result["identical"]:
+        print("  decisions identical")
+    else:
+        mismatch = result["first_mismatch"]
+        print(f"  first difference at output {mismatch['index']}:")
+        print(f"    recorded: {mismatch['recorded']}")
+        print(f"    replayed: {mismatch['replayed']}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -4,53 +4,70 @@ Serial Communication Tester
 
 This tool helps test the serial communication between the Raspberry Pi
 and Arduino components, either with real hardware or in simulation.
+
+--benchmark drives a command mix at a fixed rate instead and reports
+throughput, ACK latency, sensor jitter, errors and reader CPU as JSON on
+stdout (progress goes to stderr), to compare protocols, baud rates and
+reader changes:
+
+    python tools/serial_tester.py --benchmark --duration 30 --rate 50 --protocol text
 """
 
 import sys
 import os
 import time
-import threading
+import json
+import random
 import argparse
+import threading
+import contextlib
+from collections import deque
+
+import numpy as np
 
 # Add project root to Python path for proper importing
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from simulation.virtual_serial import VirtualArduino
 from raspberry_pi.communication.serial_handler import SerialHandler
+from raspberry_pi.communication.command_pipeline import CommandPipeline
+from raspberry_pi.communication.message_dispatcher import ALL, DIST, PONG
+
+# command=weight pairs; PING isn't sequenced, its PONG is timed separately
+DEFAULT_MIX = "FWD:180=3,STP=2,LFT:150=1,RGT:150=1,SRV:90=1,PING=2"
 
 class SerialTester:
-    def __init__(self, simulation=True, port=None):
+    def __init__(self, simulation=True, port=None, protocol="auto", baud_rate=None,
+                 show_messages=True):
         self.simulation = simulation
         self.port = port
         self.running = True
         
         if simulation:
             print(f"Starting in simulation mode")
-            self.arduino = VirtualArduino()
+            self.arduino = VirtualArduino(baud_rate=baud_rate)
             self.arduino.start()
-            self.pi_serial = SerialHandler(simulation=True)
+            # The real serial code talks to the virtual board through its pty
+            self.pi_serial = SerialHandler(port=self.arduino.port, baud_rate=baud_rate or 9600,
+                                           simulation=False, protocol=protocol)
         else:
             if not port:
                 print("Error: Real hardware mode requires a serial port")
                 sys.exit(1)
             print(f"Connecting to real hardware on port {port}")
             self.arduino = None  # Arduino should be connected for real hardware
-            self.pi_serial = SerialHandler(port=port, simulation=False)
+            self.pi_serial = SerialHandler(port=port, baud_rate=baud_rate or 9600,
+                                           simulation=False, protocol=protocol)
         
-        # Start receive thread
-        self.receive_thread = threading.Thread(target=self._receive_loop)
-        self.receive_thread.daemon = True
-        self.receive_thread.start()
+        # Show every message as it arrives
+        if show_messages:
+            self.pi_serial.subscribe(ALL, self._show_message)
     
-    def _receive_loop(self):
-        """Loop to receive and display messages"""
-        while self.running:
-            message = self.pi_serial.get_next_message(block=False)
-            if message:
-                timestamp = time.strftime("%H:%M:%S")
-                print(f"[{timestamp}] ARDUINO → PI: {message}")
-            
-            time.sleep(0.1)
+    def _show_message(self, message):
+        """Display a received message"""
+        if self.running:
+            timestamp = time.strftime("%H:%M:%S")
+            print(f"[{timestamp}] ARDUINO → PI: {message.line}")
     
     def send_command(self, command):
         """Send a command to the Arduino"""
@@ -84,17 +101,240 @@ class SerialTester:
     def shutdown(self):
         """Clean shutdown"""
         self.running = False
+        self.pi_serial.disconnect()
         if self.simulation and self.arduino:
             self.arduino.stop()
 
+class SerialBenchmark:
+    """Drives a command mix at a fixed rate and measures the link
+
+    Sequenced commands go through the CommandPipeline, which times each
+    first-try ACK; PINGs are sent raw and their PONGs timed here. Every
+    message received during the run is counted, DIST arrival times give the
+    sensor stream's jitter, and the reader thread's CPU time comes from
+    /proc where there is one. run() returns the results as a dict ready for
+    json.dumps().
+    """
+
+    def __init__(self, serial, rate=20.0, mix=DEFAULT_MIX, seed=None):
+        self.serial = serial
+        self.rate = rate
+        self.mix = parse_mix(mix)
+        self.rng = random.Random(seed)
+        self.pipeline = CommandPipeline(serial, rtt_samples=1000000)
+        self.lock = threading.Lock()
+        self.measuring = False
+
+        self.received = 0
+        self.dist_times = []
+        self.ping_times = deque()
+        self.pong_rtts = []
+        self.commands = 0
+        self.late = 0  # Sends that started more than one interval behind schedule
+
+        serial.subscribe(ALL, self._on_message)
+        serial.subscribe(PONG, self._on_pong)
+
+    def wait_ready(self, timeout=3.0):
+        """Wait for the first reading and, if asked for, the switch to binary"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            negotiating = self.serial.protocol == "auto" and not self.serial.binary
+            if self.serial.latest(DIST) is not None and not negotiating:
+                return True
+            time.sleep(0.01)
+        return self.serial.latest(DIST) is not None
+
+    def run(self, duration, settle=0.5):
+        commands, weights = zip(*self.mix)
+        interval = 1.0 / self.rate
+        stats_before = self.serial.protocol_stats()
+        cpu_before = thread_cpu_seconds(getattr(self.serial, "read_thread", None))
+
+        with self.lock:
+            self.measuring = True
+        start = time.perf_counter()
+        end = start + duration
+        next_send = start
+        now = start
+        while now < end:
+            if now >= next_send:
+                command = self.rng.choices(commands, weights)[0]
+                if command == "PING":
+                    with self.lock:
+                        self.ping_times.append(time.perf_counter())
+                self.pipeline.send(command)
+                self.commands += 1
+                if now - next_send > interval:
+                    self.late += 1
+                next_send += interval
+            self.pipeline.poll()
+            time.sleep(max(0.0, min(next_send - time.perf_counter(), 0.01)))
+            now = time.perf_counter()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.measuring = False
+        cpu_after = thread_cpu_seconds(getattr(self.serial, "read_thread", None))
+
+        # Give the last commands time to be acknowledged
+        settle_end = time.perf_counter() + settle
+        while time.perf_counter() < settle_end:
+            self.pipeline.poll()
+            time.sleep(0.01)
+
+        return self._results(duration, elapsed, stats_before, cpu_before, cpu_after)
+
+    def _results(self, duration, elapsed, stats_before, cpu_before, cpu_after):
+        link = self.serial.protocol_stats()
+        pipeline = self.pipeline.stats()
+        frames = link["frames"] - stats_before["frames"]
+        parse_errors = link["parse_errors"] - stats_before["parse_errors"]
+        sequenced = pipeline["acked"] + pipeline["failed"]
+        intervals = np.diff(np.array(self.dist_times)) * 1000
+
+        reader_cpu = None
+        if cpu_before is not None and cpu_after is not None:
+            seconds = cpu_after - cpu_before
+            reader_cpu = {"seconds": round(seconds, 3), "percent": round(100 * seconds / elapsed, 1)}
+
+        return {
+            "config": {
+                "port": self.serial.port,
+                "protocol": link["protocol"],
+                "baud_rate": self.serial.baud_rate,
+                "rate": self.rate,
+                "duration": duration,
+                "mix": dict(self.mix),
+            },
+            "elapsed": round(elapsed, 3),
+            "messages": {
+                "received": self.received,
+                "per_second": round(self.received / elapsed, 1),
+                "bytes_per_second": round((link["bytes"] - stats_before["bytes"]) / elapsed, 1),
+            },
+            "commands": {
+                "sent": self.commands,
+                "per_second": round(self.commands / elapsed, 1),
+                "late": self.late,
+                "acked": pipeline["acked"],
+                "retransmits": pipeline["retransmits"],
+                "failed": pipeline["failed"],
+                "dropped": pipeline["dropped"],
+                "superseded": pipeline["superseded"],
+            },
+            "latency_ms": {
+                "ack": summarize(np.array(self.pipeline.rtts) * 1000),
+                "pong": summarize(np.array(self.pong_rtts) * 1000),
+            },
+            "distance_stream": {
+                "readings": len(self.dist_times),
+                "interval_ms": summarize(intervals),
+                "jitter_ms": round(float(intervals.std()), 2) if len(intervals) else None,
+            },
+            "errors": {
+                "parse_errors": parse_errors,
+                "parse_error_rate": round(parse_errors / max(1, frames + parse_errors), 5),
+                "read_errors": link["read_errors"] - stats_before["read_errors"],
+                "dropped": link["dropped"] - stats_before["dropped"],
+                "command_loss_rate": round((pipeline["failed"] + pipeline["dropped"]) /
+                                           max(1, sequenced + pipeline["dropped"]), 5),
+            },
+            "reader_cpu": reader_cpu,
+        }
+
+    # Called on the serial read thread
+    def _on_message(self, message):
+        with self.lock:
+            if not self.measuring:
+                return
+            self.received += 1
+            if message.type == DIST:
+                self.dist_times.append(time.perf_counter())
+
+    def _on_pong(self, message):
+        with self.lock:
+            if self.ping_times:
+                self.pong_rtts.append(time.perf_counter() - self.ping_times.popleft())
+
+def parse_mix(text):
+    """"FWD:180=3,STP=1" -> [("FWD:180", 3.0), ("STP", 1.0)]; weights default to 1"""
+    mix = []
+    for item in text.split(","):
+        command, _, weight = item.strip().rpartition("=")
+        if not command:
+            command, weight = weight, "1"
+        mix.append((command, float(weight)))
+    return mix
+
+def summarize(samples):
+    """Percentiles of a sample array in its own units, or None if empty"""
+    if not len(samples):
+        return None
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {"count": int(len(samples)), "mean": round(float(samples.mean()), 2),
+            "p50": round(float(p50), 2), "p90": round(float(p90), 2),
+            "p99": round(float(p99), 2), "max": round(float(samples.max()), 2)}
+
+def thread_cpu_seconds(thread):
+    """User plus system CPU time of a thread from /proc, or None"""
+    native_id = getattr(thread, "native_id", None)
+    if native_id is None:
+        return None
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as stat:
+            # Fields after the command name, which may contain spaces
+            fields = stat.read().rpartition(")")[2].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
 def main():
     parser = argparse.ArgumentParser(description="Test serial communication with Arduino")
     parser.add_argument("--real", action="store_true", help="Use real hardware instead of simulation")
     parser.add_argument("--port", type=str, default="/dev/ttyUSB0", help="Serial port for real hardware mode")
+    parser.add_argument("--protocol", choices=["auto", "text"], default="auto",
+                        help="auto switches to binary frames if the firmware supports them")
+    parser.add_argument("--baud", type=int, default=None,
+                        help="Baud rate (the virtual Arduino is only throttled when given one)")
+    parser.add_argument("--benchmark", action="store_true", help="Run the benchmark instead of prompting")
+    parser.add_argument("--duration", type=float, default=10.0, help="Benchmark length in seconds")
+    parser.add_argument("--rate", type=float, default=20.0, help="Commands per second to send")
+    parser.add_argument("--mix", type=str, default=DEFAULT_MIX, help="Command mix as command=weight,...")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the command sequence")
+    parser.add_argument("--output", type=str, default=None, help="Write JSON results here instead of stdout")
     args = parser.parse_args()
     
-    tester = SerialTester(simulation=not args.real, port=args.port)
-    tester.run_interactive()
+    if not args.benchmark:
+        tester = SerialTester(simulation=not args.real, port=args.port, protocol=args.protocol,
+                              baud_rate=args.baud)
+        tester.run_interactive()
+        return
+    
+    # Only the JSON goes to stdout, so it can be piped
+    with contextlib.redirect_stdout(sys.stderr):
+        tester = SerialTester(simulation=not args.real, port=args.port, protocol=args.protocol,
+                              baud_rate=args.baud, show_messages=False)
+        try:
+            benchmark = SerialBenchmark(tester.pi_serial, rate=args.rate, mix=args.mix, seed=args.seed)
+            if not benchmark.wait_ready():
+                print("Error: no readings from the Arduino")
+                sys.exit(1)
+            results = benchmark.run(args.duration)
+            if tester.arduino:
+                # The pty carries bytes at any speed; only the board's own
+                # throttle limits it, and None means there is none
+                results["config"]["baud_rate"] = tester.arduino.baud_rate
+                results["virtual_arduino"] = tester.arduino.stats()
+        finally:
+            tester.shutdown()
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
 
 if __name__ == "__main__":
     main()
@@ -8,6 +8,8 @@ from flask_socketio import SocketIO, emit
 # Add project root to Python path for proper importing
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from raspberry_pi.runtime.tick_profiler import load_snapshot
+
 # Create the Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'dewwy-secret-key'
@@ -116,6 +118,9 @@ def get_status():
             "emotion": "neutral",
             "time": time.time()
         }
+    
+    # Control loop timing from a robot started with --profile
+    status["timing"] = load_snapshot()
     return jsonify(status)
 
 if __name__ == '__main__':